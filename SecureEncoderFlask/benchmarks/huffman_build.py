@@ -0,0 +1,85 @@
+"""Report build time and peak memory for Huffman code construction.
+
+"bounded" is what the compressor uses: heap-built lengths, with package-merge
+only when a code would be longer than MAX_CODE_LENGTH.
+
+Run from the SecureEncoderFlask directory with::
+
+    python -m benchmarks.huffman_build
+"""
+import random
+import time
+import tracemalloc
+from collections import Counter
+from typing import Callable
+
+from src.huffman import HuffmanCoding
+
+
+def uniform_alphabet(size: int) -> Counter:
+    random.seed(size)
+    return Counter({chr(0x4E00 + i): random.randint(1, 10_000) for i in range(size)})
+
+
+def skewed_alphabet(size: int) -> Counter:
+    """Fibonacci frequencies give the deepest possible unrestricted Huffman tree."""
+    frequencies = [1, 1]
+    while len(frequencies) < size:
+        frequencies.append(frequencies[-1] + frequencies[-2])
+    return Counter({chr(0x4E00 + i): f for i, f in enumerate(frequencies)})
+
+
+def tree_codes(huffman: HuffmanCoding, freq_table: Counter) -> dict[str, str]:
+    huffman.build_huffman_tree(freq_table)
+    return huffman.build_codes(huffman.huffman_tree)
+
+
+def bounded_codes(huffman: HuffmanCoding, freq_table: Counter) -> dict[str, str]:
+    return huffman.build_canonical_codes(huffman.build_bounded_code_lengths(freq_table))
+
+
+def limited_codes(huffman: HuffmanCoding, freq_table: Counter) -> dict[str, str]:
+    return huffman.build_canonical_codes(huffman.build_limited_code_lengths(freq_table))
+
+
+def measure(
+    build: Callable[[HuffmanCoding, Counter], dict[str, str]], freq_table: Counter
+):
+    start = time.perf_counter()
+    codebook = build(HuffmanCoding(), freq_table)
+    elapsed = time.perf_counter() - start
+    # Trace allocations in a separate run so tracing does not skew the timing
+    tracemalloc.start()
+    build(HuffmanCoding(), freq_table)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, max(len(code) for code in codebook.values())
+
+
+def main() -> None:
+    cases = [
+        ("uniform", uniform_alphabet(256)),
+        ("uniform", uniform_alphabet(5_000)),
+        ("uniform", uniform_alphabet(50_000)),
+        ("skewed", skewed_alphabet(20)),
+        ("skewed", skewed_alphabet(60)),
+    ]
+    print(
+        f"{'alphabet':>16} {'builder':>14} {'time (ms)':>10} "
+        f"{'peak (KiB)':>11} {'max len':>8}"
+    )
+    for name, freq_table in cases:
+        for label, build in (
+            ("tree", tree_codes),
+            ("bounded", bounded_codes),
+            ("package-merge", limited_codes),
+        ):
+            elapsed, peak, max_length = measure(build, freq_table)
+            print(
+                f"{name + ' ' + str(len(freq_table)):>16} {label:>14} "
+                f"{elapsed * 1000:>10.2f} {peak / 1024:>11.1f} {max_length:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
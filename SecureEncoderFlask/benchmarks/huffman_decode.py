@@ -0,0 +1,105 @@
+"""Compare the table-driven Huffman decoder with per-bit tree walking.
+
+"table" builds the decode table for every payload, as HuffmanCoding does;
+"reused" decodes with a table built once, as trained dictionaries do.
+
+Run from the SecureEncoderFlask directory with::
+
+    python -m benchmarks.huffman_decode
+"""
+import random
+import timeit
+
+from src.huffman import HuffmanCoding, HuffmanDecodeTable
+
+SIZES = [1_000, 10_000, 100_000]
+REPEAT = 5
+
+
+def build_tree(codebook: dict[str, str]) -> HuffmanCoding.Node:
+    """Build the tree that matches a codebook, for the tree-walk baseline."""
+    root = HuffmanCoding.Node()
+    for char, code in codebook.items():
+        node = root
+        for bit in code:
+            if bit == "0":
+                node.left = node.left or HuffmanCoding.Node()
+                node = node.left
+            else:
+                node.right = node.right or HuffmanCoding.Node()
+                node = node.right
+        node.char = char
+    return root
+
+
+def tree_walk_decode(root: HuffmanCoding.Node, bits: str) -> str:
+    """Decode one bit at a time by walking tree nodes, as the old decoder did."""
+    decoded_data = []
+    current_node = root
+    for bit in bits:
+        current_node = current_node.left if bit == "0" else current_node.right
+        if current_node.char is not None:
+            decoded_data.append(current_node.char)
+            current_node = root
+    return "".join(decoded_data)
+
+
+def make_text(size: int) -> str:
+    random.seed(size)
+    words = ["secure", "encoder", "lorem", "ipsum", "dolor", "sit", "amet", "ünïcødé"]
+    text = " ".join(random.choice(words) for _ in range(size // 5))
+    return text[:size]
+
+
+def make_cjk_text(size: int) -> str:
+    """Text over a few thousand CJK characters with a skewed distribution."""
+    random.seed(size)
+    alphabet = [chr(0x4E00 + i) for i in range(3000)]
+    weights = [1 / (rank + 1) for rank in range(len(alphabet))]
+    return "".join(random.choices(alphabet, weights, k=size))
+
+
+def main() -> None:
+    print(
+        f"{'input':>6} {'size':>8} {'symbols':>8} {'tree walk (ms)':>15} "
+        f"{'table (ms)':>11} {'speedup':>8} {'reused (ms)':>12} {'speedup':>8}"
+    )
+    for name, make in (("words", make_text), ("cjk", make_cjk_text)):
+        for size in SIZES:
+            text = make(size)
+            huffman = HuffmanCoding()
+            code_lengths = huffman.build_limited_code_lengths(
+                huffman.build_frequency_table(text)
+            )
+            codebook = huffman.build_canonical_codes(code_lengths)
+            root = build_tree(codebook)
+            payload, bit_count = huffman.pack_codes(text, codebook)
+            bits = "".join(codebook[char] for char in text)
+
+            def table_decode() -> str:
+                return HuffmanDecodeTable(codebook).decode(payload, bit_count)
+
+            assert table_decode() == tree_walk_decode(root, bits) == text
+
+            tree_walk = min(
+                timeit.repeat(
+                    lambda: tree_walk_decode(root, bits), number=1, repeat=REPEAT
+                )
+            )
+            table = min(timeit.repeat(table_decode, number=1, repeat=REPEAT))
+            shared = HuffmanDecodeTable(codebook)
+            shared.decode(payload, bit_count)
+            reused = min(
+                timeit.repeat(
+                    lambda: shared.decode(payload, bit_count), number=1, repeat=REPEAT
+                )
+            )
+            print(
+                f"{name:>6} {size:>8} {len(codebook):>8} {tree_walk * 1000:>15.2f} "
+                f"{table * 1000:>11.2f} {tree_walk / table:>7.1f}x "
+                f"{reused * 1000:>12.2f} {tree_walk / reused:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
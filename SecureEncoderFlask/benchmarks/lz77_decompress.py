@@ -0,0 +1,117 @@
+"""Compare lz77_decompress with the original per-character decoder.
+
+The original decoder only reads the legacy flag-byte format, so both decode
+the same legacy payloads; the last column decodes the current token format.
+
+Run from the SecureEncoderFlask directory with::
+
+    python -m benchmarks.lz77_decompress
+"""
+import base64
+import random
+import timeit
+
+from src.compression_decompression import (
+    _HashChainMatcher,
+    encode_number,
+    lz77_compress,
+    lz77_decompress,
+)
+
+SIZE = 200_000
+REPEAT = 3
+# Below 16256, so no offset's leading byte can be mistaken for an escaped flag
+LEGACY_WINDOW_SIZE = 16_000
+
+
+def legacy_compress(text: str) -> str:
+    """Greedy LZ77 in the legacy format of literals, flag bytes and varint matches."""
+    data = text.encode("latin-1")
+    matcher = _HashChainMatcher(data, LEGACY_WINDOW_SIZE, 3, 64)
+    result = bytearray()
+    i = 0
+    while i < len(data):
+        offset, length = matcher.longest_match(i)
+        if length:
+            result.append(255)
+            result.extend(encode_number(offset))
+            result.extend(encode_number(length))
+            i += length
+        else:
+            if data[i] == 255:
+                result.append(255)
+            result.append(data[i])
+            i += 1
+    return base64.b64encode(result).decode("ascii")
+
+
+def list_decompress(compressed: str) -> str:
+    """The original decoder (one chr() per byte appended to a list), with
+    overlapping matches copied one character at a time."""
+    data = base64.b64decode(compressed)
+    result = []
+    i = 0
+    while i < len(data):
+        if data[i] == 255:
+            i += 1
+            if i < len(data) and data[i] == 255:
+                result.append(chr(255))
+                i += 1
+                continue
+            offset, length = 0, 0
+            while data[i] > 127:
+                offset = (offset << 7) | (data[i] & 0x7F)
+                i += 1
+            offset = (offset << 7) | data[i]
+            i += 1
+            while data[i] > 127:
+                length = (length << 7) | (data[i] & 0x7F)
+                i += 1
+            length = (length << 7) | data[i]
+            i += 1
+            start = len(result) - offset
+            for k in range(length):
+                result.append(result[start + k])
+        else:
+            result.append(chr(data[i]))
+            i += 1
+    return "".join(result)
+
+
+def inputs() -> dict[str, str]:
+    random.seed(SIZE)
+    words = ["secure", "encoder", "lorem", "ipsum", "dolor", "sit", "amet"]
+    return {
+        "repetitive": ("abc" * 10 + "z" * 500) * (SIZE // 530),
+        "text": " ".join(random.choice(words) for _ in range(SIZE // 6))[:SIZE],
+        "random": "".join(chr(random.randrange(256)) for _ in range(SIZE)),
+    }
+
+
+def main() -> None:
+    print(
+        f"{'input':>10} {'list (ms)':>10} {'bytearray (ms)':>15} {'speedup':>8}"
+        f" {'tokens (ms)':>12}"
+    )
+    for name, text in inputs().items():
+        legacy = legacy_compress(text)
+        compressed = lz77_compress(text, window_size=LEGACY_WINDOW_SIZE)
+        assert lz77_decompress(legacy) == list_decompress(legacy) == text
+        assert lz77_decompress(compressed) == text
+        old = min(
+            timeit.repeat(lambda: list_decompress(legacy), number=1, repeat=REPEAT)
+        )
+        new = min(
+            timeit.repeat(lambda: lz77_decompress(legacy), number=1, repeat=REPEAT)
+        )
+        tokens = min(
+            timeit.repeat(lambda: lz77_decompress(compressed), number=1, repeat=REPEAT)
+        )
+        print(
+            f"{name:>10} {old * 1000:>10.2f} {new * 1000:>15.2f} {old / new:>7.1f}x"
+            f" {tokens * 1000:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
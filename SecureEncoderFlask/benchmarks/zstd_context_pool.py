@@ -0,0 +1,53 @@
+"""Compare per-call zstd latency with fresh contexts and with pooled contexts.
+
+"fresh" builds a ZstdCompressor or ZstdDecompressor for every call, as the
+codecs did before the context pool; "pooled" goes through the shared pool.
+
+Run from the SecureEncoderFlask directory with::
+
+    python -m benchmarks.zstd_context_pool
+"""
+import random
+import timeit
+
+import zstandard as zstd
+
+from src.compression_decompression import zstd_compress_bytes, zstd_decompress_bytes
+
+SIZES = [100, 1_000, 10_000]
+NUMBER = 2_000
+REPEAT = 5
+
+
+def sample(size: int) -> bytes:
+    random.seed(size)
+    words = ["secure", "encoder", "flask", "payload", "token", "stream", "key"]
+    return " ".join(random.choice(words) for _ in range(size)).encode()[:size]
+
+
+def per_call_us(func) -> float:
+    return min(timeit.repeat(func, number=NUMBER, repeat=REPEAT)) / NUMBER * 1e6
+
+
+def main() -> None:
+    print(
+        f"{'size (B)':>9} {'compress fresh':>15} {'pooled':>8} "
+        f"{'decompress fresh':>17} {'pooled':>8}"
+    )
+    for size in SIZES:
+        data = sample(size)
+        compressed = zstd_compress_bytes(data)
+        timings = [
+            per_call_us(lambda: zstd.ZstdCompressor(level=3).compress(data)),
+            per_call_us(lambda: zstd_compress_bytes(data)),
+            per_call_us(lambda: zstd.ZstdDecompressor().decompress(compressed)),
+            per_call_us(lambda: zstd_decompress_bytes(compressed)),
+        ]
+        print(
+            f"{size:>9} {timings[0]:>13.1f}us {timings[1]:>6.1f}us "
+            f"{timings[2]:>15.1f}us {timings[3]:>6.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
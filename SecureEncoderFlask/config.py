@@ -1,5 +1,5 @@
 import os
-from decouple import config
+from decouple import config, Csv
 
 
 class Config(object):
@@ -11,6 +11,29 @@ class Config(object):
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
     SQLALCHEMY_DATABASE_URI = config("DATABASE_URL", default="sqlite:///md5.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DICTIONARY_TRAINING_SAMPLES = 1000
+    BATCH_MAX_ITEMS = 10_000
+    BATCH_WORKERS = os.cpu_count() or 4
+    COMPRESSION_PROFILE = config("COMPRESSION_PROFILE", default="default")
+    COMPRESSION_MAX_ZSTD_LEVEL = 19
+    COMPRESSION_MAX_THREADS = 4
+    # Memory kept by idle pooled zstd contexts, in bytes
+    CODEC_CONTEXT_POOL_MAX_BYTES = 64 * 1024 * 1024
+    # Server-side text state: total characters kept, and seconds until unused
+    # state expires
+    STATE_STORE_MAX_SIZE = 64 * 1024 * 1024
+    STATE_STORE_TTL = 3600
+    # MD5 lookups: Bloom filter target false positive rate, and how many
+    # confirmed misses are remembered and for how many seconds
+    MD5_FILTER_FALSE_POSITIVE_RATE = 0.01
+    MD5_NEGATIVE_CACHE_SIZE = 100_000
+    MD5_NEGATIVE_CACHE_TTL = 60
+    RSA_KEY_SIZE = config("RSA_KEY_SIZE", default=2048, cast=int)
+    RSA_KEY_POOL_SIZE = config("RSA_KEY_POOL_SIZE", default=4, cast=int)
+    # Pooled key sizes; init_app always adds RSA_KEY_SIZE
+    RSA_KEY_POOL_SIZES = config(
+        "RSA_KEY_POOL_SIZES", default=str(RSA_KEY_SIZE), cast=Csv(int)
+    )
 
 
 class ProductionConfig(Config):
@@ -1,15 +1,15 @@
-from flask import Flask, jsonify, Response, session
+from flask import Flask, jsonify, Response
 from .create_app import create_app
-from .md5_model import db, populate_db
+from .md5_model import db, MD5Hash, build_md5_index, init_md5_index, populate_db
+from .dictionaries import init_dictionaries
 from faker import Faker
 from werkzeug.exceptions import HTTPException
-import json
 
 app: Flask = create_app()
 with app.app_context():
     db.create_all()
-    faker: Faker = Faker()
-    populate_db(faker, 100)
+    init_dictionaries(app)
+    init_md5_index(app)
 
 
 # When serving a single-page application, we need to catch all routes and serve the index.html file.
@@ -34,16 +34,6 @@ def apply_security_headers(response: Response):
     return response
 
 
-@app.after_request
-def add_session_to_response(response: Response):
-    response.set_cookie("files", json.dumps(session.get("files", [])))
-    response.set_cookie("result", session.get("result", ""))
-    response.set_cookie("operation", session.get("operation", ""))
-    response.set_cookie("action", session.get("action", ""))
-    response.set_cookie("text", session.get("text", ""))
-    return response
-
-
 @app.errorhandler(Exception)
 def handle_exception(e: Exception) -> Response:
     if isinstance(e, HTTPException):
@@ -59,7 +49,20 @@ def page_not_found(e: HTTPException):
     return """<h1>404</h1><h2>The resource could not be found.</h2>""", 404
 
 
+def seed_db() -> None:
+    """Give an empty database some sample hashes, and train dictionaries on them.
+
+    Larger wordlists are loaded with ``flask --app src.app load-wordlist``.
+    """
+    with app.app_context():
+        if MD5Hash.query.first() is None:
+            populate_db(Faker(), 100)
+            init_dictionaries(app)
+            build_md5_index(app.config["MD5_INDEX_PATH"])
+
+
 def main():
+    seed_db()
     if app.config["FLASK_DEVELOPMENT"]:
         app.run(
             port=int(app.config["FLASK_PORT"]),
@@ -0,0 +1,92 @@
+import os
+import time
+import click
+from typing import Optional
+from faker import Faker
+from flask import Flask
+from .md5_model import (
+    BULK_INSERT_BATCH_SIZE,
+    HASH_ALGORITHMS,
+    build_md5_index,
+    db,
+    populate_db,
+)
+from .ingestion import WordlistLoader
+
+
+def register_commands(app: Flask) -> None:
+    """Add the database management commands to ``flask --app src.app``."""
+
+    @app.cli.command("populate-db")
+    @click.option("--entries", default=1000, show_default=True)
+    def populate_db_command(entries: int) -> None:
+        """Store the hashes of random Faker sentences."""
+        db.create_all()
+        inserted = populate_db(Faker(), entries)
+        build_md5_index(app.config["MD5_INDEX_PATH"])
+        click.echo(f"Inserted {inserted} hashes")
+
+    @app.cli.command("load-wordlist")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--batch-size", default=BULK_INSERT_BATCH_SIZE, show_default=True)
+    @click.option(
+        "--algorithm",
+        "algorithms",
+        type=click.Choice(list(HASH_ALGORITHMS)),
+        multiple=True,
+        default=list(HASH_ALGORITHMS),
+        show_default=True,
+        help="Repeat to store several; the file is read once for all of them.",
+    )
+    @click.option(
+        "--workers",
+        default=os.cpu_count() or 1,
+        show_default=True,
+        help="Hashing processes; 1 hashes in this process.",
+    )
+    @click.option(
+        "--checkpoint",
+        type=click.Path(dir_okay=False),
+        help="Progress file to resume from  [default: PATH.checkpoint]",
+    )
+    def load_wordlist_command(
+        path: str,
+        batch_size: int,
+        algorithms: tuple[str, ...],
+        workers: int,
+        checkpoint: Optional[str],
+    ) -> None:
+        """Store the hashes of every line of a wordlist file."""
+        db.create_all()
+        loader = WordlistLoader(
+            path, algorithms, batch_size, workers, checkpoint or path + ".checkpoint"
+        )
+        reported_at = time.perf_counter()
+
+        def report(loader: WordlistLoader) -> None:
+            nonlocal reported_at
+            if time.perf_counter() - reported_at >= 5:
+                reported_at = time.perf_counter()
+                click.echo(
+                    f"{loader.lines} lines, {loader.lines_per_second:.0f} lines/s"
+                )
+
+        inserted = loader.run(report)
+        if loader.resumed_lines:
+            click.echo(f"Resumed after {loader.resumed_lines} lines")
+        counts = ", ".join(f"{count} {name}" for name, count in inserted.items())
+        click.echo(
+            f"Inserted {counts} hashes in {loader.elapsed:.1f}s"
+            f" ({loader.lines_per_second:.0f} lines/s)"
+        )
+        if "md5" in inserted:
+            build_md5_index(app.config["MD5_INDEX_PATH"])
+
+    @app.cli.command("build-md5-index")
+    def build_md5_index_command() -> None:
+        """Rebuild the memory-mapped index of the stored MD5 hashes."""
+        db.create_all()
+        start = time.perf_counter()
+        count = build_md5_index(app.config["MD5_INDEX_PATH"])
+        elapsed = time.perf_counter() - start
+        click.echo(f"Indexed {count} hashes in {elapsed:.1f}s")
@@ -2,178 +2,826 @@ import zlib
 import brotli
 import zstandard as zstd
 import base64
-
-
-def encode_number(n: int) -> list:
-    """Encode a number using a simpler variable-length encoding."""
-    encoded: list = []
-    while n > 127:
-        encoded.insert(0, (n & 0x7F) | 0x80)
-        n >>= 7
-    encoded.insert(0, n & 0x7F)
-    return encoded
-
-
-def lz77_compress(text: str, window_size: int = 100, min_match_length: int = 3) -> str:
-    """Compress using LZ77 with reduced overhead for smaller matches."""
+import functools
+import math
+from collections import Counter
+from typing import Any, Callable, Iterable, Iterator, Optional
+from .context_pool import codec_context_pool
+from .huffman import HuffmanCoding
+from .varint import encode_number, decode_number
+
+
+# LZ77 container: the FF 00 prefix (a match flag with offset zero, which no
+# legacy stream can contain), format version and flags, followed by sequences
+# of a literal-run length, the literal bytes, a match length and an offset. A
+# zero match length ends the stream. With LZ77_FLAG_ENTROPY the sequences are
+# Huffman-coded as a whole.
+LZ77_MAGIC = b"\xff\x00"
+LZ77_FORMAT_VERSION = 1
+LZ77_FLAG_ENTROPY = 0x01
+LZ77_WINDOW_SIZE = 32 * 1024
+# Lengths are varints, so one long match covers a long run cheaply
+LZ77_MAX_MATCH_LENGTH = 64 * 1024
+# Matches at least this long are taken without looking one position ahead
+LZ77_MAX_LAZY = 32
+# Largest output a decoder produces, as a match can repeat its source without
+# limit; the same as the default MAX_CONTENT_LENGTH
+DECOMPRESS_MAX_OUTPUT = 16 * 1024 * 1024
+
+
+def _common_length(data: bytes, candidate: int, pos: int, limit: int) -> int:
+    """Return how many bytes match at ``candidate`` and ``pos``, up to ``limit``."""
+    length = 0
+    # Compare in chunks first so long matches are not extended one byte at a time
+    step = 32
+    while length + step <= limit and (
+        data[candidate + length : candidate + length + step]
+        == data[pos + length : pos + length + step]
+    ):
+        length += step
+    while length < limit and data[candidate + length] == data[pos + length]:
+        length += 1
+    return length
+
+
+class _HashChainMatcher:
+    """Find LZ77 matches through hash chains keyed on ``min_match_length`` prefixes."""
+
+    def __init__(
+        self,
+        data: bytes,
+        window_size: int,
+        min_match_length: int,
+        max_chain_length: int,
+        max_match_length: int = LZ77_MAX_MATCH_LENGTH,
+    ) -> None:
+        self.data = data
+        self.window_size = window_size
+        self.min_match_length = min_match_length
+        self.max_chain_length = max_chain_length
+        self.max_match_length = max_match_length
+        self.head: dict[bytes, int] = {}
+        self.prev: list[int] = [-1] * len(data)
+        self.inserted = 0
+
+    def insert_until(self, end: int) -> None:
+        """Add every position before ``end`` to the hash chains."""
+        data, head, prev, size = self.data, self.head, self.prev, self.min_match_length
+        last = min(end, len(data) - size + 1)
+        for pos in range(self.inserted, last):
+            key = data[pos : pos + size]
+            prev[pos] = head.get(key, -1)
+            head[key] = pos
+        self.inserted = max(self.inserted, last)
+
+    def longest_match(self, pos: int) -> tuple[int, int]:
+        """Return the ``(offset, length)`` of the longest match for ``pos``."""
+        data = self.data
+        size = self.min_match_length
+        if pos + size > len(data):
+            return 0, 0
+        self.insert_until(pos)
+        limit = min(len(data) - pos, self.max_match_length)
+        best_offset, best_length = 0, 0
+        candidate = self.head.get(data[pos : pos + size], -1)
+        chain = self.max_chain_length
+        while candidate >= 0 and chain > 0:
+            offset = pos - candidate
+            if offset > self.window_size:
+                break
+            chain -= 1
+            # Skip candidates that cannot beat the current best
+            if data[candidate + best_length] == data[pos + best_length]:
+                length = _common_length(data, candidate, pos, limit)
+                if length > best_length:
+                    best_offset, best_length = offset, length
+                    if length == limit:
+                        break
+            candidate = self.prev[candidate]
+        if best_length < size:
+            return 0, 0
+        return best_offset, best_length
+
+
+def lz77_compress(
+    text: str,
+    window_size: int = LZ77_WINDOW_SIZE,
+    min_match_length: int = 3,
+    max_chain_length: int = 64,
+    lazy_matching: bool = True,
+    entropy_coding: bool = False,
+    max_match_length: int = LZ77_MAX_MATCH_LENGTH,
+    max_lazy: int = LZ77_MAX_LAZY,
+) -> str:
+    """Compress the UTF-8 bytes of ``text`` using LZ77.
+
+    Matches are found through hash chains, so the cost per position is bounded
+    by ``max_chain_length`` rather than the window size. With ``lazy_matching``
+    a match shorter than ``max_lazy`` is deferred by one position when the next
+    position has a longer one. With ``entropy_coding`` the token stream is
+    Huffman-coded when that is smaller.
+    """
     if not text:
         return ""
+    data = text.encode()
+    matcher = _HashChainMatcher(
+        data, window_size, min_match_length, max_chain_length, max_match_length
+    )
     i = 0
-    result = bytearray()
-    while i < len(text):
-        max_match = (0, 0)  # (offset, length)
-        if i + min_match_length <= len(
-            text
-        ):  # Ensures there is enough data to form a match
-            for j in range(max(i - window_size, 0), i):
-                k = 0
-                while (
-                    i + k < len(text) and k < window_size and text[j + k] == text[i + k]
-                ):
-                    k += 1
-                if k > max_match[1] and k >= min_match_length:
-                    max_match = (i - j, k)
-
-        if max_match[1] >= min_match_length:
-            # Write a single flag byte plus encoded offset and length
-            result.append(255)  # Match flag
-            result.extend(encode_number(max_match[0]))  # offset
-            result.extend(encode_number(max_match[1]))  # length
-            i += max_match[1]
+    literal_start = 0
+    tokens = bytearray()
+    pending: Optional[tuple[int, int]] = None
+    while i < len(data):
+        offset, length = pending if pending is not None else matcher.longest_match(i)
+        pending = None
+        if length and lazy_matching and length < max_lazy and i + 1 < len(data):
+            next_match = matcher.longest_match(i + 1)
+            if next_match[1] > length:
+                # A longer match starts at the next position, so emit a literal now
+                offset, length = 0, 0
+                pending = next_match
+
+        # A match costs its length and offset numbers plus the next run's
+        # length, so short matches at far offsets are cheaper as literals
+        if length >= min_match_length and length > (offset.bit_length() + 6) // 7 + 1:
+            tokens.extend(encode_number(i - literal_start))
+            tokens += data[literal_start:i]
+            tokens.extend(encode_number(length))
+            tokens.extend(encode_number(offset))
+            i += length
+            literal_start = i
         else:
-            # Handle literals and escape the flag byte
-            if ord(text[i]) == 255:
-                result.append(255)  # Escape flag byte
-            result.append(ord(text[i]))
             i += 1
+    tokens.extend(encode_number(len(data) - literal_start))
+    tokens += data[literal_start:]
+    tokens.append(0)  # End of stream
+
+    flags = 0
+    if entropy_coding:
+        coded = HuffmanCoding().encode(tokens.decode("latin-1"))
+        if len(coded) < len(tokens):
+            tokens = bytearray(coded)
+            flags |= LZ77_FLAG_ENTROPY
 
     # Encode the result as Base64 to handle binary data
-    return base64.b64encode(result).decode("ascii")
+    header = LZ77_MAGIC + bytes([LZ77_FORMAT_VERSION, flags])
+    return base64.b64encode(header + tokens).decode("ascii")
+
+
+def _copy_match(
+    result: bytearray, offset: int, length: int, max_output: int = DECOMPRESS_MAX_OUTPUT
+) -> None:
+    """Append ``length`` bytes starting ``offset`` bytes back from the end."""
+    if not 0 < offset <= len(result):
+        raise ValueError(f"LZ77 match offset {offset} is out of range")
+    if len(result) + length > max_output:
+        raise ValueError("LZ77 output exceeds the size limit")
+    start = len(result) - offset
+    if length <= offset:
+        result += result[start : start + length]
+        return
+    # Overlapping match: each copy doubles the span available to copy from
+    remaining = length
+    while remaining:
+        chunk = result[start : start + min(remaining, len(result) - start)]
+        result += chunk
+        remaining -= len(chunk)
+
+
+def _lz77_decode_tokens(data: bytes, max_output: int = DECOMPRESS_MAX_OUTPUT) -> bytes:
+    result = bytearray()
+    i = 0
+    end = len(data)
+    while True:
+        # Most run lengths, match lengths and offsets fit in one byte, so skip
+        # the call for those
+        if i < end and data[i] < 128:
+            literal_length = data[i]
+            i += 1
+        else:
+            literal_length, i = decode_number(data, i)
+        if i + literal_length > end:
+            raise ValueError("LZ77 literal run is truncated")
+        result += data[i : i + literal_length]
+        i += literal_length
+        if i < end and data[i] < 128:
+            length = data[i]
+            i += 1
+        else:
+            length, i = decode_number(data, i)
+        if not length:
+            break
+        if i < end and data[i] < 128:
+            offset = data[i]
+            i += 1
+        else:
+            offset, i = decode_number(data, i)
+        start = len(result) - offset
+        if 0 < length <= offset and start >= 0 and len(result) + length <= max_output:
+            result += result[start : start + length]
+        else:
+            _copy_match(result, offset, length, max_output)
+    if i != end:
+        raise ValueError("Unexpected data after the end of the LZ77 stream")
+    return bytes(result)
 
 
-def lz77_decompress(compressed: str) -> str:
-    """Decompress data that was compressed with LZ77."""
+def lz77_decompress(compressed: str, max_output: int = DECOMPRESS_MAX_OUTPUT) -> str:
+    """Decompress data that was compressed with LZ77.
+
+    Streams without the ``LZ77_MAGIC`` prefix are read as the legacy format.
+    Output over ``max_output`` bytes raises ``ValueError``.
+    """
     if not compressed:
         return ""
     data = base64.b64decode(compressed)
-    result = []
+    if not data.startswith(LZ77_MAGIC):
+        return _lz77_decompress_legacy(data, max_output)
+    if len(data) < len(LZ77_MAGIC) + 2:
+        raise ValueError("Truncated LZ77 header")
+    version, flags = data[len(LZ77_MAGIC)], data[len(LZ77_MAGIC) + 1]
+    if version != LZ77_FORMAT_VERSION:
+        raise ValueError(f"Unsupported LZ77 format version: {version}")
+    tokens = data[len(LZ77_MAGIC) + 2 :]
+    if flags & LZ77_FLAG_ENTROPY:
+        tokens = HuffmanCoding().decode(tokens).encode("latin-1")
+    return _lz77_decode_tokens(tokens, max_output).decode()
+
+
+def _lz77_decompress_legacy(
+    data: bytes, max_output: int = DECOMPRESS_MAX_OUTPUT
+) -> str:
+    """Decode the legacy stream of literals, 255 flag bytes and varint matches.
+
+    Literal runs between flag bytes are copied in bulk and matches are copied
+    as slices; an overlapping match repeats its source by doubling the copied
+    span, so long runs take O(log length) copies. Offsets, lengths and
+    truncated numbers are validated up front and raise ``ValueError``.
+    """
+    result = bytearray()
     i = 0
-    while i < len(data):
-        if data[i] == 255:  # Match flag found
-            i += 1
-            if i < len(data) and data[i] == 255:  # Escaped flag byte
-                result.append(chr(255))
-                i += 1
-                continue
-
-            # Decode variable-length quantity encoded numbers
-            offset, length = 0, 0
-            while data[i] > 127:
-                offset = (offset << 7) | (data[i] & 0x7F)
-                i += 1
-            offset = (offset << 7) | data[i]
-            i += 1
-
-            while data[i] > 127:
-                length = (length << 7) | (data[i] & 0x7F)
-                i += 1
-            length = (length << 7) | data[i]
+    end = len(data)
+    while i < end:
+        flag = data.find(255, i)
+        if flag < 0:
+            result += data[i:]
+            break
+        result += data[i:flag]
+        i = flag + 1
+        if i < end and data[i] == 255:  # Escaped flag byte
+            result.append(255)
             i += 1
+            continue
 
-            start = len(result) - offset
-            result.extend(result[start : start + length])
+        # Most offsets and lengths fit in one byte, so skip the call for those
+        if i + 1 < end and data[i] < 128 and data[i + 1] < 128:
+            offset, length = data[i], data[i + 1]
+            i += 2
         else:
-            result.append(chr(data[i]))
-            i += 1
-    return "".join(result)
-
-
-def lzw_compress(input_data: str) -> str:
+            offset, i = decode_number(data, i)
+            length, i = decode_number(data, i)
+        if not length:
+            raise ValueError("LZ77 match has zero length")
+        _copy_match(result, offset, length, max_output)
+    return result.decode("latin-1")
+
+
+# LZW container: magic, format version and maximum code width, followed by
+# MSB-first codes that start at 9 bits and widen as the dictionary grows. Code
+# 256 clears the dictionary once it reaches 2 ** max_bits entries.
+LZW_MAGIC = b"LZW"
+LZW_FORMAT_VERSION = 1
+LZW_CLEAR_CODE = 256
+LZW_FIRST_CODE = 257
+LZW_MIN_BITS = 9
+
+
+def lzw_compress(input_data: str, max_bits: int = 16) -> str:
+    """Compress UTF-8 bytes with LZW using variable-width codes.
+
+    The dictionary is keyed on ``(prefix_code << 8) | byte`` integers, so each
+    step is one small-int lookup rather than hashing a growing string.
+    """
     if not input_data:
         return ""
-    dict_size = 256
-    dictionary = {chr(i): i for i in range(dict_size)}
-    w = ""
-    compressed = []
-    for c in input_data:
-        wc = w + c
-        if wc in dictionary:
-            w = wc
+    if not LZW_MIN_BITS <= max_bits <= 24:
+        raise ValueError("max_bits must be between 9 and 24")
+    data = input_data.encode()
+    max_code = 1 << max_bits
+    dictionary: dict[int, int] = {}
+    next_code = LZW_FIRST_CODE
+    output = bytearray(LZW_MAGIC)
+    output.append(LZW_FORMAT_VERSION)
+    output.append(max_bits)
+    bit_buffer = 0
+    bit_count = 0
+
+    w = data[0]
+    for byte in data[1:]:
+        key = (w << 8) | byte
+        code = dictionary.get(key)
+        if code is not None:
+            w = code
+            continue
+        # The widest code that can appear now is next_code - 1
+        width = (next_code - 1).bit_length()
+        bit_buffer = (bit_buffer << width) | w
+        bit_count += width
+        if next_code < max_code:
+            dictionary[key] = next_code
+            next_code += 1
         else:
-            compressed.append(dictionary[w])
-            dictionary[wc] = dict_size
-            dict_size += 1
-            w = c
-    if w:
-        compressed.append(dictionary[w])
-
-    # Encode numbers in the compressed list to handle dynamic dictionary sizes
-    bits = max(
-        dict_size.bit_length(), 8
-    )  # At least 8 bits to handle up to 256 initial dictionary values
-    compressed_bytes = bytearray()
-    for number in compressed:
-        compressed_bytes.extend(number.to_bytes((bits + 7) // 8, "big"))
-
-    return base64.b64encode(compressed_bytes).decode()
+            bit_buffer = (bit_buffer << width) | LZW_CLEAR_CODE
+            bit_count += width
+            dictionary.clear()
+            next_code = LZW_FIRST_CODE
+        while bit_count >= 8:
+            bit_count -= 8
+            output.append((bit_buffer >> bit_count) & 0xFF)
+        bit_buffer &= (1 << bit_count) - 1
+        w = byte
+
+    width = (next_code - 1).bit_length()
+    bit_buffer = (bit_buffer << width) | w
+    bit_count += width
+    # Pad the last byte with zeros; padding is always shorter than one code
+    padding = -bit_count % 8
+    bit_buffer <<= padding
+    bit_count += padding
+    output.extend(bit_buffer.to_bytes(bit_count // 8, "big"))
+
+    return base64.b64encode(output).decode()
 
 
 def lzw_decompress(compressed: str) -> str:
     if not compressed:
         return ""
     compressed_bytes = base64.b64decode(compressed)
-
+    if not compressed_bytes.startswith(LZW_MAGIC):
+        return _lzw_decompress_legacy(compressed_bytes)
+
+    header_size = len(LZW_MAGIC) + 2
+    if len(compressed_bytes) < header_size:
+        raise ValueError("LZW payload is truncated")
+    version, max_bits = compressed_bytes[len(LZW_MAGIC) : header_size]
+    if version != LZW_FORMAT_VERSION:
+        raise ValueError(f"Unsupported LZW format version: {version}")
+    if not LZW_MIN_BITS <= max_bits <= 24:
+        raise ValueError("max_bits must be between 9 and 24")
+    max_code = 1 << max_bits
+
+    entries = [bytes([i]) for i in range(256)] + [b""]
+    result = []
+    w = b""
+    bit_buffer = 0
+    bit_count = 0
+    for byte in compressed_bytes[header_size:]:
+        bit_buffer = (bit_buffer << 8) | byte
+        bit_count += 8
+        while True:
+            next_code = len(entries)
+            # One entry behind the compressor, so this matches its code width
+            width = min(next_code.bit_length(), max_bits)
+            if bit_count < width:
+                break
+            bit_count -= width
+            code = (bit_buffer >> bit_count) & ((1 << width) - 1)
+            bit_buffer &= (1 << bit_count) - 1
+
+            if code == LZW_CLEAR_CODE:
+                del entries[LZW_FIRST_CODE:]
+                w = b""
+                continue
+            if code < next_code:
+                entry = entries[code]
+            elif code == next_code and w:
+                # The code being defined by this very step (the "KwKwK" case)
+                entry = w + w[:1]
+            else:
+                raise ValueError("LZW payload contains an invalid code")
+            if w and next_code < max_code:
+                entries.append(w + entry[:1])
+            result.append(entry)
+            w = entry
+    return b"".join(result).decode()
+
+
+def _lzw_decompress_legacy(compressed_bytes: bytes) -> str:
+    """Decode the original format of fixed two-byte codes over code points."""
     dict_size = 256
     dictionary = {i: chr(i) for i in range(dict_size)}
-    bits = max(dict_size.bit_length(), 8)
-    byte_count = (bits + 7) // 8
+    byte_count = 2
 
-    # Unpack integers according to the bit size used during compression
-    compressed_integers = []
-    for i in range(0, len(compressed_bytes), byte_count):
-        number = int.from_bytes(compressed_bytes[i : i + byte_count], "big")
-        compressed_integers.append(number)
+    compressed_integers = [
+        int.from_bytes(compressed_bytes[i : i + byte_count], "big")
+        for i in range(0, len(compressed_bytes), byte_count)
+    ]
 
-    w = result = dictionary[compressed_integers[0]]
+    w = dictionary[compressed_integers[0]]
+    result = [w]
     for k in compressed_integers[1:]:
         if k in dictionary:
             entry = dictionary[k]
         else:
             entry = w + w[0]
-        result += entry
+        result.append(entry)
         dictionary[dict_size] = w + entry[0]
         dict_size += 1
         w = entry
-    return result
+    return "".join(result)
+
+
+# The bytes variants are the codecs proper; the str variants wrap their
+# output in base64 for JSON transport.
+def zstd_compress_bytes(
+    data: bytes,
+    level: int = 3,
+    threads: int = 0,
+    window_log: Optional[int] = None,
+    long_distance_matching: bool = False,
+) -> bytes:
+    key = ("zstd-compress", level, threads, window_log, long_distance_matching)
+    compressor = codec_context_pool.acquire(
+        key,
+        lambda: _zstd_compressor(level, threads, window_log, long_distance_matching),
+    )
+    compressed = compressor.compress(data)
+    codec_context_pool.release(key, compressor, compressor.memory_size())
+    return compressed
+
+
+def _zstd_compressor(
+    level: int, threads: int, window_log: Optional[int], long_distance_matching: bool
+) -> zstd.ZstdCompressor:
+    params = {"threads": threads, "enable_ldm": long_distance_matching}
+    if window_log is not None:
+        params["window_log"] = window_log
+    compression_params = zstd.ZstdCompressionParameters.from_level(level, **params)
+    return zstd.ZstdCompressor(compression_params=compression_params)
+
+
+def zstd_decompress_bytes(compressed: bytes) -> bytes:
+    decompressor = codec_context_pool.acquire("zstd-decompress", zstd.ZstdDecompressor)
+    data = decompressor.decompress(compressed)
+    codec_context_pool.release(
+        "zstd-decompress", decompressor, decompressor.memory_size()
+    )
+    return data
 
 
-def zstd_compress(data: str) -> str:
-    cctx = zstd.ZstdCompressor()
-    compressed_data = cctx.compress(data.encode())
-    return base64.b64encode(compressed_data).decode()
+DEFLATE_STRATEGIES = {
+    "default": zlib.Z_DEFAULT_STRATEGY,
+    "filtered": zlib.Z_FILTERED,
+    "huffman_only": zlib.Z_HUFFMAN_ONLY,
+    "rle": zlib.Z_RLE,
+    "fixed": zlib.Z_FIXED,
+}
+
+
+def deflate_compress_bytes(
+    data: bytes, level: int = 9, strategy: str = "default"
+) -> bytes:
+    compressor = zlib.compressobj(
+        level, zlib.DEFLATED, zlib.MAX_WBITS, 8, DEFLATE_STRATEGIES[strategy]
+    )
+    return compressor.compress(data) + compressor.flush()
+
+
+def deflate_decompress_bytes(compressed: bytes) -> bytes:
+    return zlib.decompress(compressed)
+
+
+def brotli_compress_bytes(data: bytes, quality: int = 11, lgwin: int = 22) -> bytes:
+    return brotli.compress(data, quality=quality, lgwin=lgwin)
+
+
+def brotli_decompress_bytes(compressed: bytes) -> bytes:
+    return brotli.decompress(compressed)
+
+
+def zstd_compress(data: str, **params) -> str:
+    return base64.b64encode(zstd_compress_bytes(data.encode(), **params)).decode()
 
 
 def zstd_decompress(compressed: str) -> str:
-    dctx = zstd.ZstdDecompressor()
-    compressed_data = base64.b64decode(compressed)
-    return dctx.decompress(compressed_data).decode()
+    return zstd_decompress_bytes(base64.b64decode(compressed)).decode()
 
 
-def deflate_compress(data: str) -> str:
-    compressed_data = zlib.compress(data.encode(), level=9)
-    return base64.b64encode(compressed_data).decode()
+def deflate_compress(data: str, **params) -> str:
+    return base64.b64encode(deflate_compress_bytes(data.encode(), **params)).decode()
 
 
 def deflate_decompress(compressed: str) -> str:
-    compressed_data = base64.b64decode(compressed)
-    return zlib.decompress(compressed_data).decode()
+    return deflate_decompress_bytes(base64.b64decode(compressed)).decode()
 
 
-def brotli_compress(data: str) -> str:
-    compressed_data = brotli.compress(data.encode())
-    return base64.b64encode(compressed_data).decode()
+def brotli_compress(data: str, **params) -> str:
+    return base64.b64encode(brotli_compress_bytes(data.encode(), **params)).decode()
 
 
 def brotli_decompress(compressed: str) -> str:
-    compressed_data = base64.b64decode(compressed)
-    return brotli.decompress(compressed_data).decode()
+    return brotli_decompress_bytes(base64.b64decode(compressed)).decode()
+
+
+# Named parameter sets for the one-shot codecs. The server default is chosen
+# by COMPRESSION_PROFILE, and requests can pick another or override single
+# parameters. "default" matches the parameters the codecs have always used.
+COMPRESSION_PROFILES: dict[str, dict[str, dict[str, Any]]] = {
+    "fast": {
+        "zstd": {"level": 1},
+        "deflate": {"level": 1},
+        "brotli": {"quality": 4},
+        "auto": {"target": "speed"},
+    },
+    "default": {
+        "zstd": {"level": 3},
+        "deflate": {"level": 9},
+        "brotli": {"quality": 11},
+        "auto": {"target": "balanced"},
+    },
+    "max": {
+        "zstd": {"level": 19, "window_log": 27, "long_distance_matching": True},
+        "deflate": {"level": 9},
+        "brotli": {"quality": 11, "lgwin": 24},
+        "auto": {"target": "ratio"},
+    },
+}
+
+
+# "auto" output starts with one byte naming the codec that was picked, so
+# decoding needs no other information
+AUTO_STORED = 0
+AUTO_ZSTD = 1
+AUTO_BROTLI = 2
+AUTO_SAMPLE_SIZE = 16 * 1024
+# Inputs shorter than this are stored, as no codec's framing pays for itself
+AUTO_MIN_SIZE = 64
+# Samples with more bits of entropy per byte are stored as incompressible
+AUTO_MAX_ENTROPY = 7.5
+# Codecs tried on a sample of the input for each target, fastest first
+AUTO_CANDIDATES: dict[str, list[tuple[int, Callable[[bytes], bytes]]]] = {
+    "speed": [(AUTO_ZSTD, functools.partial(zstd_compress_bytes, level=1))],
+    "balanced": [
+        (AUTO_ZSTD, functools.partial(zstd_compress_bytes, level=3)),
+        (AUTO_BROTLI, functools.partial(brotli_compress_bytes, quality=5)),
+    ],
+    "ratio": [
+        (AUTO_ZSTD, functools.partial(zstd_compress_bytes, level=19)),
+        (AUTO_BROTLI, functools.partial(brotli_compress_bytes, quality=11)),
+    ],
+}
+AUTO_DECOMPRESSORS: dict[int, Callable[[bytes], bytes]] = {
+    AUTO_STORED: bytes,
+    AUTO_ZSTD: zstd_decompress_bytes,
+    AUTO_BROTLI: brotli_decompress_bytes,
+}
+
+
+def byte_entropy(data: bytes) -> float:
+    """Shannon entropy of the byte distribution, in bits per byte."""
+    total = len(data)
+    return -sum(
+        count / total * math.log2(count / total) for count in Counter(data).values()
+    )
+
+
+def auto_compress_bytes(data: bytes, target: str = "balanced") -> bytes:
+    """Compress with the codec that suits the input best for ``target``.
+
+    Short and high-entropy inputs are stored. Otherwise, when the target has
+    several candidates, each is tried on a sample and the smallest wins.
+    """
+    sample = data[:AUTO_SAMPLE_SIZE]
+    if len(data) < AUTO_MIN_SIZE or byte_entropy(sample) > AUTO_MAX_ENTROPY:
+        return bytes([AUTO_STORED]) + data
+
+    candidates = AUTO_CANDIDATES[target]
+    if len(sample) == len(data):
+        # The sample is the whole input, so the trial outputs are final
+        trials = [(codec, compress(data)) for codec, compress in candidates]
+        codec, compressed = min(trials, key=lambda trial: len(trial[1]))
+    else:
+        codec, compress = min(
+            candidates, key=lambda candidate: len(candidate[1](sample))
+        )
+        compressed = compress(data)
+    if len(compressed) >= len(data):
+        codec, compressed = AUTO_STORED, data
+    return bytes([codec]) + compressed
+
+
+def auto_decompress_bytes(compressed: bytes) -> bytes:
+    if not compressed:
+        raise ValueError("auto payload is empty")
+    try:
+        decompress = AUTO_DECOMPRESSORS[compressed[0]]
+    except KeyError:
+        raise ValueError(f"Unknown auto codec: {compressed[0]}")
+    try:
+        return decompress(compressed[1:])
+    except (zstd.ZstdError, brotli.error) as e:
+        raise ValueError(f"Invalid auto payload: {str(e)}")
+
+
+def auto_compress(data: str, **params) -> str:
+    return base64.b64encode(auto_compress_bytes(data.encode(), **params)).decode()
+
+
+def auto_decompress(compressed: str) -> str:
+    return auto_decompress_bytes(base64.b64decode(compressed)).decode()
+
+
+# Streaming codecs take an iterable of byte chunks and yield output as it
+# becomes available, so memory stays bounded by the chunk size and the codec's
+# window rather than the size of the whole payload. Decompressors raise
+# ValueError for corrupt or truncated input and for data after the end.
+STREAM_OUTPUT_SIZE = 64 * 1024
+
+
+def zstd_compress_stream(
+    chunks: Iterable[bytes],
+    level: int = 3,
+    threads: int = 0,
+    window_log: Optional[int] = None,
+    long_distance_matching: bool = False,
+) -> Iterator[bytes]:
+    compressor = _zstd_compressor(
+        level, threads, window_log, long_distance_matching
+    ).compressobj()
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+ZSTD_FRAME_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class _ZstdFrameTracker:
+    """Follow the block headers of one zstd frame to find where it ends.
+
+    The zstd stream reader caps each read's output but reports neither a
+    truncated frame nor data after it, so the frame layout is followed here
+    instead: a frame header, blocks each with a 3-byte header giving the
+    size of its content, and an optional 4-byte checksum.
+    """
+
+    def __init__(self) -> None:
+        self.state = "magic"
+        self.needed = len(ZSTD_FRAME_MAGIC)
+        self.field = bytearray()
+        self.skip = 0
+        self.checksum = False
+        self.complete = False
+
+    def feed(self, chunk: bytes) -> None:
+        position = 0
+        while position < len(chunk):
+            if self.complete:
+                raise ValueError("Unexpected data after the end of the zstd frame")
+            if self.skip:
+                skipped = min(self.skip, len(chunk) - position)
+                self.skip -= skipped
+                position += skipped
+                if not self.skip and self.state == "checksum":
+                    self.complete = True
+                continue
+            taken = chunk[position : position + self.needed - len(self.field)]
+            self.field += taken
+            position += len(taken)
+            if len(self.field) == self.needed:
+                field = bytes(self.field)
+                self.field.clear()
+                self.next_field(field)
+
+    def next_field(self, field: bytes) -> None:
+        if self.state == "magic":
+            if field != ZSTD_FRAME_MAGIC:
+                raise ValueError("Invalid zstd stream: unknown frame magic")
+            self.state, self.needed = "descriptor", 1
+        elif self.state == "descriptor":
+            descriptor = field[0]
+            single_segment = descriptor >> 5 & 1
+            self.checksum = bool(descriptor >> 2 & 1)
+            content_size_bytes = (single_segment, 2, 4, 8)[descriptor >> 6]
+            dict_id_bytes = (0, 1, 2, 4)[descriptor & 3]
+            self.state = "block"
+            self.needed = 3
+            self.skip = (1 - single_segment) + dict_id_bytes + content_size_bytes
+        elif self.state == "block":
+            header = int.from_bytes(field, "little")
+            block_type, block_size = header >> 1 & 3, header >> 3
+            if block_type == 3:
+                raise ValueError("Invalid zstd stream: reserved block type")
+            self.skip = 1 if block_type == 1 else block_size
+            if header & 1:  # Last block
+                self.state = "checksum"
+                self.skip += 4 if self.checksum else 0
+                if not self.skip:
+                    self.complete = True
+
+
+class _ChunkSource:
+    """File-like reader over an iterable of chunks, for zstd stream readers."""
+
+    def __init__(self, chunks: Iterable[bytes], tracker: _ZstdFrameTracker) -> None:
+        self.chunks = iter(chunks)
+        self.tracker = tracker
+
+    def read(self, size: int = -1) -> bytes:
+        for chunk in self.chunks:
+            if chunk:
+                self.tracker.feed(chunk)
+                return chunk
+        return b""
+
+
+def zstd_decompress_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    tracker = _ZstdFrameTracker()
+    reader = zstd.ZstdDecompressor().stream_reader(
+        _ChunkSource(chunks, tracker), read_size=STREAM_OUTPUT_SIZE
+    )
+    try:
+        # Each read returns at most STREAM_OUTPUT_SIZE bytes, however far a
+        # small chunk expands
+        while decompressed := reader.read(STREAM_OUTPUT_SIZE):
+            yield decompressed
+    except zstd.ZstdError as e:
+        raise ValueError(f"Invalid zstd stream: {str(e)}")
+    if not tracker.complete:
+        raise ValueError("Truncated zstd stream")
+
+
+def deflate_compress_stream(
+    chunks: Iterable[bytes], level: int = 9, strategy: str = "default"
+) -> Iterator[bytes]:
+    compressor = zlib.compressobj(
+        level, zlib.DEFLATED, zlib.MAX_WBITS, 8, DEFLATE_STRATEGIES[strategy]
+    )
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def deflate_decompress_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    decompressor = zlib.decompressobj()
+    try:
+        for chunk in chunks:
+            if decompressor.eof and chunk:
+                raise ValueError("Unexpected data after the end of the deflate stream")
+            # Cap each call's output so a small, highly compressed chunk cannot
+            # expand into one huge buffer
+            while chunk and not decompressor.eof:
+                decompressed = decompressor.decompress(chunk, STREAM_OUTPUT_SIZE)
+                if decompressed:
+                    yield decompressed
+                chunk = decompressor.unconsumed_tail
+            if chunk or decompressor.unused_data:
+                raise ValueError("Unexpected data after the end of the deflate stream")
+        remaining = decompressor.flush()
+    except zlib.error as e:
+        raise ValueError(f"Invalid deflate stream: {str(e)}")
+    if remaining:
+        yield remaining
+    if not decompressor.eof:
+        raise ValueError("Truncated deflate stream")
+
+
+def brotli_compress_stream(
+    chunks: Iterable[bytes], quality: int = 11, lgwin: int = 22
+) -> Iterator[bytes]:
+    compressor = brotli.Compressor(quality=quality, lgwin=lgwin)
+    for chunk in chunks:
+        compressed = compressor.process(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.finish()
+
+
+def brotli_decompress_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    decompressor = brotli.Decompressor()
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if decompressor.is_finished():
+                raise ValueError("Unexpected data after the end of the brotli stream")
+            # Cap each call's output; the rest of the chunk's output comes from
+            # calls with no input, until one returns nothing
+            decompressed = decompressor.process(
+                chunk, output_buffer_limit=STREAM_OUTPUT_SIZE
+            )
+            while decompressed:
+                yield decompressed
+                if decompressor.is_finished():
+                    break
+                decompressed = decompressor.process(
+                    b"", output_buffer_limit=STREAM_OUTPUT_SIZE
+                )
+    except brotli.error as e:
+        raise ValueError(f"Invalid brotli stream: {str(e)}")
+    if not decompressor.is_finished():
+        raise ValueError("Truncated brotli stream")
@@ -0,0 +1,92 @@
+import threading
+from typing import Any, Callable, Hashable
+from flask import Flask
+
+
+class ContextPool:
+    """Reusable codec contexts, keyed by codec, parameter set and dictionary.
+
+    Creating a zstd context costs more than compressing a small payload, so
+    contexts are acquired for one call and released afterwards. A context is
+    used by one thread at a time. At most ``max_idle`` idle contexts are
+    kept per key, and the least recently added key is dropped once there are
+    more than ``max_keys``. Idle contexts also share a budget of
+    ``max_bytes``, counted from the size given on release: contexts of the
+    least recently added keys are dropped to make room, and a context larger
+    than the whole budget is not kept at all.
+    """
+
+    def __init__(
+        self, max_idle: int = 16, max_keys: int = 64, max_bytes: int = 64 * 1024**2
+    ) -> None:
+        self.max_idle = max_idle
+        self.max_keys = max_keys
+        self.max_bytes = max_bytes
+        # Idle contexts per key, each with its size in bytes
+        self.idle: dict[Hashable, list[tuple[Any, int]]] = {}
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app: Flask) -> None:
+        self.max_bytes = app.config["CODEC_CONTEXT_POOL_MAX_BYTES"]
+        self.clear()
+
+    def acquire(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Take an idle context for ``key``, or build one with ``factory``."""
+        with self.lock:
+            contexts = self.idle.get(key)
+            if contexts:
+                self.hits += 1
+                context, size = contexts.pop()
+                self.bytes -= size
+                return context
+            self.misses += 1
+        return factory()
+
+    def release(self, key: Hashable, context: Any, size: int = 0) -> None:
+        """Return a context after a successful call, with its memory use in bytes.
+
+        Contexts whose call raised are dropped instead, in case they were left
+        mid-frame.
+        """
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            contexts = self.idle.get(key)
+            if contexts is None:
+                if len(self.idle) >= self.max_keys:
+                    self.drop_key(next(iter(self.idle)))
+                contexts = self.idle[key] = []
+            if len(contexts) >= self.max_idle:
+                return
+            for old_key in list(self.idle):
+                if self.bytes + size <= self.max_bytes:
+                    break
+                old_contexts = self.idle[old_key]
+                while old_contexts and self.bytes + size > self.max_bytes:
+                    self.bytes -= old_contexts.pop(0)[1]
+            contexts.append((context, size))
+            self.bytes += size
+
+    def drop_key(self, key: Hashable) -> None:
+        self.bytes -= sum(size for _, size in self.idle.pop(key))
+
+    def clear(self) -> None:
+        with self.lock:
+            self.idle.clear()
+            self.bytes = 0
+
+    def metrics(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "keys": len(self.idle),
+                "idle": sum(len(contexts) for contexts in self.idle.values()),
+                "bytes": self.bytes,
+            }
+
+
+codec_context_pool = ContextPool()
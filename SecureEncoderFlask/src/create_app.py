@@ -4,9 +4,15 @@ from flask_cors import CORS
 import os
 import logging
 from logging.handlers import RotatingFileHandler
-from .md5_model import db
+from .md5_model import db, md5_filter, md5_index
+from .commands import register_commands
 from .file_routes import file_bp
 from .text_routes import text_bp
+from .stream_routes import stream_bp
+from .metrics_routes import metrics_bp
+from .key_pool import rsa_key_pool
+from .context_pool import codec_context_pool
+from .state_store import state_store
 from decouple import config
 
 
@@ -49,7 +55,12 @@ def create_app(test_config: Optional[dict[str, any]] = None) -> Flask:
 
     # Default configuration
     app.config.from_object(config("APP_SETTINGS"))
-    app.config.from_mapping(UPLOAD_FOLDER=os.path.join(app.root_path, "keys"))
+    app.config.from_mapping(
+        UPLOAD_FOLDER=os.path.join(app.root_path, "keys"),
+        DICTIONARY_FOLDER=os.path.join(app.root_path, "dictionaries"),
+        MD5_INDEX_PATH=os.path.join(app.root_path, "md5_index.bin"),
+        MD5_FILTER_PATH=os.path.join(app.root_path, "md5_filter.bin"),
+    )
 
     if test_config is not None:
         # Load the test config if passed in
@@ -58,9 +69,18 @@ def create_app(test_config: Optional[dict[str, any]] = None) -> Flask:
     # Initialize plugins
     db.init_app(app)
     CORS(app, resources={r"/api/*": {"origins": "*"}})
+    rsa_key_pool.init_app(app)
+    state_store.init_app(app)
+    codec_context_pool.init_app(app)
+    # The index and filter mirror one database, so drop a previous app's
+    md5_index.clear()
+    md5_filter.init_app(app)
 
     # Register blueprints
     app.register_blueprint(file_bp)
     app.register_blueprint(text_bp)
+    app.register_blueprint(stream_bp)
+    app.register_blueprint(metrics_bp)
+    register_commands(app)
 
     return app
@@ -0,0 +1,217 @@
+import base64
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Optional
+import zstandard as zstd
+from flask import Flask
+from .context_pool import codec_context_pool
+from .varint import encode_number, decode_number
+from .huffman import (
+    HuffmanCoding,
+    HuffmanDecodeTable,
+    HUFFMAN_MAGIC,
+    HUFFMAN_DICTIONARY_FORMAT_VERSION,
+)
+from .md5_model import MD5Hash
+
+DEFAULT_DICTIONARY_ID = 1
+ZSTD_DICTIONARY_SIZE = 16 * 1024
+
+
+class CompressionDictionary:
+    """Shared Huffman code table and zstd dictionary trained on sample texts.
+
+    The Huffman table covers every UTF-8 byte value, so any text can be coded
+    with it even when some bytes never appeared in the samples.
+    """
+
+    def __init__(
+        self,
+        dict_id: int,
+        huffman_code_lengths: list[int],
+        zstd_data: Optional[bytes] = None,
+    ) -> None:
+        self.dict_id = dict_id
+        self.huffman_code_lengths = huffman_code_lengths
+        self.zstd_data = zstd_data
+        self.huffman_codebook = HuffmanCoding().build_canonical_codes(
+            {chr(byte): length for byte, length in enumerate(huffman_code_lengths)}
+        )
+        # The decode table is built once and reused across requests
+        self.huffman_decode_table = HuffmanDecodeTable(self.huffman_codebook)
+        self.zstd_dict = (
+            zstd.ZstdCompressionDict(zstd_data, dict_type=zstd.DICT_TYPE_FULLDICT)
+            if zstd_data
+            else None
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "dict_id": self.dict_id,
+                "huffman_code_lengths": self.huffman_code_lengths,
+                "zstd": base64.b64encode(self.zstd_data).decode()
+                if self.zstd_data
+                else None,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> "CompressionDictionary":
+        fields = json.loads(data)
+        return cls(
+            fields["dict_id"],
+            fields["huffman_code_lengths"],
+            base64.b64decode(fields["zstd"]) if fields["zstd"] else None,
+        )
+
+
+def train_dictionary(
+    samples: list[str],
+    dict_id: int = DEFAULT_DICTIONARY_ID,
+    zstd_dict_size: int = ZSTD_DICTIONARY_SIZE,
+) -> CompressionDictionary:
+    """Train a Huffman code table and a zstd dictionary from sample texts."""
+    if not 0 < dict_id < 2**31:
+        raise ValueError("Dictionary id must be a positive 31-bit integer")
+    encoded_samples = [sample.encode() for sample in samples if sample]
+    # Start every byte at one so bytes missing from the samples still get a code
+    freq_table = Counter({chr(byte): 1 for byte in range(256)})
+    for sample in encoded_samples:
+        freq_table.update(sample.decode("latin-1"))
+    code_lengths = HuffmanCoding().build_bounded_code_lengths(freq_table)
+
+    zstd_data = None
+    try:
+        zstd_data = zstd.train_dictionary(
+            zstd_dict_size, encoded_samples, dict_id=dict_id
+        ).as_bytes()
+    except zstd.ZstdError as e:
+        logging.warning(f"Could not train zstd dictionary {dict_id}: {str(e)}")
+
+    return CompressionDictionary(
+        dict_id, [code_lengths[chr(byte)] for byte in range(256)], zstd_data
+    )
+
+
+class DictionaryStore:
+    """Trained dictionaries keyed by id, shared by every request."""
+
+    def __init__(self) -> None:
+        self.dictionaries: dict[int, CompressionDictionary] = {}
+        self.lock = threading.Lock()
+
+    def __contains__(self, dict_id: int) -> bool:
+        return dict_id in self.dictionaries
+
+    def add(self, dictionary: CompressionDictionary) -> None:
+        with self.lock:
+            self.dictionaries[dictionary.dict_id] = dictionary
+
+    def get(self, dict_id: int) -> CompressionDictionary:
+        try:
+            return self.dictionaries[dict_id]
+        except KeyError:
+            raise ValueError(f"Unknown dictionary id: {dict_id}")
+
+    def save(self, folder: str) -> None:
+        os.makedirs(folder, exist_ok=True)
+        for dict_id, dictionary in self.dictionaries.items():
+            with open(os.path.join(folder, f"{dict_id}.json"), "w") as f:
+                f.write(dictionary.to_json())
+
+    def load(self, folder: str) -> int:
+        if not os.path.isdir(folder):
+            return 0
+        loaded = 0
+        for filename in sorted(os.listdir(folder)):
+            if filename.endswith(".json"):
+                with open(os.path.join(folder, filename)) as f:
+                    self.add(CompressionDictionary.from_json(f.read()))
+                loaded += 1
+        return loaded
+
+
+dictionary_store = DictionaryStore()
+
+
+def init_dictionaries(app: Flask) -> None:
+    """Load the stored dictionaries, training a default one from MD5Hash texts if none exist."""
+    folder = app.config["DICTIONARY_FOLDER"]
+    if dictionary_store.load(folder):
+        return
+    samples = [
+        row.text
+        for row in MD5Hash.query.limit(app.config["DICTIONARY_TRAINING_SAMPLES"])
+    ]
+    if not samples:
+        return
+    dictionary_store.add(train_dictionary(samples, DEFAULT_DICTIONARY_ID))
+    dictionary_store.save(folder)
+
+
+def huffman_compress_with_dictionary(data: str, dict_id: int) -> str:
+    """Huffman-code UTF-8 bytes with a shared table, storing only the dictionary id."""
+    if not data:
+        return ""
+    dictionary = dictionary_store.get(dict_id)
+    payload, bit_count = HuffmanCoding().pack_codes(
+        data.encode().decode("latin-1"), dictionary.huffman_codebook
+    )
+    header = bytearray(HUFFMAN_MAGIC)
+    header.append(HUFFMAN_DICTIONARY_FORMAT_VERSION)
+    header.extend(encode_number(dict_id))
+    header.extend(encode_number(bit_count))
+    return base64.b64encode(bytes(header) + payload).decode("ascii")
+
+
+def huffman_decompress_with_dictionary(compressed: str) -> str:
+    if not compressed:
+        return ""
+    raw = base64.b64decode(compressed)
+    index = len(HUFFMAN_MAGIC)
+    if (
+        len(raw) <= index
+        or not raw.startswith(HUFFMAN_MAGIC)
+        or raw[index] != HUFFMAN_DICTIONARY_FORMAT_VERSION
+    ):
+        raise ValueError("Huffman payload was not compressed with a dictionary")
+    dict_id, index = decode_number(raw, index + 1)
+    bit_count, index = decode_number(raw, index)
+    payload = raw[index:]
+    if bit_count > len(payload) * 8:
+        raise ValueError("Huffman payload is shorter than its bit count")
+    table = dictionary_store.get(dict_id).huffman_decode_table
+    return table.decode(payload, bit_count).encode("latin-1").decode()
+
+
+def zstd_compress_with_dictionary(data: str, dict_id: int) -> str:
+    dictionary = dictionary_store.get(dict_id)
+    if dictionary.zstd_dict is None:
+        raise ValueError(f"Dictionary {dict_id} has no zstd dictionary")
+    # The key holds the dictionary object, so a retrained dictionary with the
+    # same id never gets a context built for the old one
+    key = ("zstd-compress", dictionary)
+    cctx = codec_context_pool.acquire(
+        key, lambda: zstd.ZstdCompressor(dict_data=dictionary.zstd_dict)
+    )
+    compressed = cctx.compress(data.encode())
+    codec_context_pool.release(key, cctx, cctx.memory_size())
+    return base64.b64encode(compressed).decode()
+
+
+def zstd_decompress_with_dictionary(compressed: str) -> str:
+    compressed_data = base64.b64decode(compressed)
+    # The frame header records which dictionary it was compressed with
+    dict_id = zstd.get_frame_parameters(compressed_data).dict_id
+    dictionary = dictionary_store.get(dict_id)
+    key = ("zstd-decompress", dictionary)
+    dctx = codec_context_pool.acquire(
+        key, lambda: zstd.ZstdDecompressor(dict_data=dictionary.zstd_dict)
+    )
+    decompressed = dctx.decompress(compressed_data)
+    codec_context_pool.release(key, dctx, dctx.memory_size())
+    return decompressed.decode()
@@ -0,0 +1,269 @@
+import math
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+from flask import Flask
+
+FILTER_MAGIC = b"BLOOM01\x00"
+# Magic, number of bits, number of hash functions, number of entries added
+_FILTER_HEADER = struct.Struct(">8sQIQ")
+
+
+class BloomFilter:
+    """Bit array answering "definitely not stored" or "maybe stored".
+
+    Entries are digests, which are already uniformly distributed, so the bit
+    positions come from double hashing over the two halves of the digest
+    instead of from further hash functions.
+    """
+
+    def __init__(
+        self, bits: int, hashes: int, data: Optional[bytearray] = None, count: int = 0
+    ) -> None:
+        self.bits = bits
+        self.hashes = hashes
+        self.data = data if data is not None else bytearray((bits + 7) // 8)
+        self.count = count
+
+    @classmethod
+    def for_capacity(
+        cls, capacity: int, false_positive_rate: float = 0.01
+    ) -> "BloomFilter":
+        capacity = max(capacity, 1)
+        bits = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        return cls(bits, hashes)
+
+    def positions(self, digest: bytes) -> list[int]:
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:16], "big") | 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def add(self, digest: bytes) -> None:
+        for position in self.positions(digest):
+            self.data[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(
+            self.data[position >> 3] >> (position & 7) & 1
+            for position in self.positions(digest)
+        )
+
+    @property
+    def expected_false_positive_rate(self) -> float:
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+    def save(self, path: str) -> None:
+        with open(path + ".tmp", "wb") as f:
+            f.write(
+                _FILTER_HEADER.pack(FILTER_MAGIC, self.bits, self.hashes, self.count)
+            )
+            f.write(self.data)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "BloomFilter":
+        with open(path, "rb") as f:
+            content = f.read()
+        if len(content) < _FILTER_HEADER.size:
+            raise ValueError(f"{path} is not a Bloom filter")
+        magic, bits, hashes, count = _FILTER_HEADER.unpack_from(content)
+        data = bytearray(content[_FILTER_HEADER.size :])
+        if magic != FILTER_MAGIC or not hashes or len(data) != (bits + 7) // 8:
+            raise ValueError(f"{path} is not a Bloom filter")
+        return cls(bits, hashes, data, count)
+
+
+class NegativeCache:
+    """Digests recently confirmed missing, each forgotten after ``ttl`` seconds.
+
+    At most ``max_size`` digests are kept, the oldest dropped first.
+    """
+
+    def __init__(self, max_size: int = 100_000, ttl: float = 60) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        # Digest to expiry time, soonest expiry first
+        self.entries: OrderedDict[bytes, float] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __contains__(self, digest: bytes) -> bool:
+        with self.lock:
+            expiry = self.entries.get(digest)
+            if expiry is None:
+                return False
+            if expiry > time.monotonic():
+                return True
+            del self.entries[digest]
+            return False
+
+    def add(self, digest: bytes) -> None:
+        with self.lock:
+            self.entries.pop(digest, None)
+            now = time.monotonic()
+            self.entries[digest] = now + self.ttl
+            while self.entries and (
+                len(self.entries) > self.max_size
+                or next(iter(self.entries.values())) <= now
+            ):
+                self.entries.popitem(last=False)
+
+    def discard(self, digest: bytes) -> None:
+        with self.lock:
+            self.entries.pop(digest, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class DigestFilter:
+    """Bloom filter and negative cache in front of a digest table.
+
+    ``might_contain`` is False for digests that were not stored when the
+    filter was built, so lookups can skip the digest index for them. Other
+    processes may have stored them since, so only the table can confirm a
+    miss. Confirmed misses go into the negative cache, and ``known_missing``
+    answers for them within its TTL. The filter is saved next to the digest
+    index and reloaded when another process rebuilds it; digests stored by
+    this process are added as they are inserted.
+    """
+
+    def __init__(
+        self,
+        false_positive_rate: float = 0.01,
+        negative_cache_size: int = 100_000,
+        negative_cache_ttl: float = 60,
+    ) -> None:
+        self.false_positive_rate = false_positive_rate
+        self.negatives = NegativeCache(negative_cache_size, negative_cache_ttl)
+        self.path: Optional[str] = None
+        self.bloom: Optional[BloomFilter] = None
+        self.lock = threading.Lock()
+        self.mtime: Optional[int] = None
+        self.checked_at = 0.0
+        self.rejects = 0
+        self.stale_rejects = 0
+        self.false_positives = 0
+        self.negative_cache_hits = 0
+
+    def init_app(self, app: Flask) -> None:
+        self.path = app.config["MD5_FILTER_PATH"]
+        self.false_positive_rate = app.config["MD5_FILTER_FALSE_POSITIVE_RATE"]
+        self.negatives = NegativeCache(
+            app.config["MD5_NEGATIVE_CACHE_SIZE"], app.config["MD5_NEGATIVE_CACHE_TTL"]
+        )
+        self.clear()
+
+    def might_contain(self, digest: bytes) -> bool:
+        """Whether the digest may be stored; True until a filter is built."""
+        bloom = self.bloom
+        if bloom is not None and digest not in bloom:
+            self.rejects += 1
+            return False
+        return True
+
+    def known_missing(self, digest: bytes) -> bool:
+        """Whether the table was found not to hold the digest within the TTL."""
+        if digest in self.negatives:
+            self.negative_cache_hits += 1
+            return True
+        return False
+
+    def record_miss(self, digest: bytes, passed: bool = True) -> None:
+        """Remember a digest the table does not hold.
+
+        ``passed`` tells whether the digest got past the filter, making the
+        miss a false positive.
+        """
+        if passed and self.bloom is not None:
+            self.false_positives += 1
+        self.negatives.add(digest)
+
+    def record_stale(self, digest: bytes) -> None:
+        """Add a digest the filter rejected but another process had stored."""
+        self.stale_rejects += 1
+        self.add(digest)
+
+    def add(self, digest: bytes) -> None:
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(digest)
+        self.negatives.discard(digest)
+
+    def rebuild(self, digests: Iterable[bytes], count: int) -> None:
+        """Build a filter over ``digests`` with room to double, and save it."""
+        bloom = BloomFilter.for_capacity(max(2 * count, 1024), self.false_positive_rate)
+        for digest in digests:
+            bloom.add(digest)
+        if self.path is not None:
+            bloom.save(self.path)
+        with self.lock:
+            self.bloom = bloom
+            self.mtime = self.stored_mtime()
+        self.negatives.clear()
+
+    def load(self) -> None:
+        bloom = BloomFilter.load(self.path)
+        with self.lock:
+            self.bloom = bloom
+            self.mtime = self.stored_mtime()
+        self.negatives.clear()
+
+    def stored_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+
+    def changed(self, interval: float = 1.0) -> bool:
+        """Whether the saved filter was rebuilt elsewhere, checked once per interval."""
+        now = time.monotonic()
+        with self.lock:
+            if self.bloom is None or now - self.checked_at < interval:
+                return False
+            self.checked_at = now
+            mtime = self.stored_mtime()
+            if mtime is None or mtime == self.mtime:
+                return False
+            self.mtime = mtime
+            return True
+
+    def clear(self) -> None:
+        with self.lock:
+            self.bloom = None
+            self.mtime = None
+            self.checked_at = 0.0
+            self.rejects = 0
+            self.stale_rejects = 0
+            self.false_positives = 0
+            self.negative_cache_hits = 0
+        self.negatives.clear()
+
+    def metrics(self) -> dict[str, Any]:
+        bloom = self.bloom
+        negatives = self.rejects - self.stale_rejects + self.false_positives
+        return {
+            "loaded": bloom is not None,
+            "entries": bloom.count if bloom else 0,
+            "bits": bloom.bits if bloom else 0,
+            "hashes": bloom.hashes if bloom else 0,
+            "expected_false_positive_rate": (
+                bloom.expected_false_positive_rate if bloom else 0.0
+            ),
+            "false_positive_rate": (
+                self.false_positives / negatives if negatives else 0.0
+            ),
+            "rejects": self.rejects,
+            "stale_rejects": self.stale_rejects,
+            "false_positives": self.false_positives,
+            "negative_cache_hits": self.negative_cache_hits,
+            "negative_cache_size": len(self.negatives),
+        }
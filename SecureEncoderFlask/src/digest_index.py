@@ -0,0 +1,144 @@
+import mmap
+import os
+import shutil
+import struct
+import threading
+from typing import Iterable, Iterator, Optional
+
+INDEX_MAGIC = b"DIGIDX1\x00"
+_INDEX_HEADER = struct.Struct(">8sQ")
+# Each record is a digest followed by the offset and length of its text in the
+# text section after the records; records are sorted by digest
+_INDEX_RECORD = struct.Struct(">16sQI")
+
+
+class DigestIndex:
+    """Sorted, memory-mapped digest -> text lookup index.
+
+    The index file holds fixed-size records sorted by digest, followed by the
+    texts. Lookups are an interpolation search over the mapped records; as
+    digests are uniformly distributed, a lookup touches a handful of records.
+    The file is read through mmap, so worker processes share the page cache
+    instead of each holding a copy.
+
+    The file is rebuilt as a whole and swapped in atomically. Entries added
+    since the last build are kept in memory by ``add``, up to ``max_recent``
+    of them, oldest dropped first, until a loaded index contains them.
+    """
+
+    def __init__(self, max_recent: int = 100_000) -> None:
+        self.max_recent = max_recent
+        self.path: Optional[str] = None
+        # The map and its record count, swapped together so lookups without
+        # the lock never pair one index with another's count
+        self.mapped: tuple[Optional[mmap.mmap], int] = (None, 0)
+        self.recent: dict[bytes, str] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def build(path: str, rows: Iterable[tuple[bytes, str]]) -> int:
+        """Write an index of ``rows``, which must be sorted by digest."""
+        count = 0
+        offset = 0
+        with open(path + ".tmp", "wb") as records, open(
+            path + ".text.tmp", "w+b"
+        ) as texts:
+            records.write(_INDEX_HEADER.pack(INDEX_MAGIC, 0))
+            for digest, text in rows:
+                encoded = text.encode()
+                records.write(_INDEX_RECORD.pack(digest, offset, len(encoded)))
+                texts.write(encoded)
+                offset += len(encoded)
+                count += 1
+            texts.seek(0)
+            shutil.copyfileobj(texts, records)
+            records.seek(0)
+            records.write(_INDEX_HEADER.pack(INDEX_MAGIC, count))
+        os.remove(path + ".text.tmp")
+        os.replace(path + ".tmp", path)
+        return count
+
+    def load(self, path: str) -> None:
+        """Map the index at ``path``, replacing any index mapped before."""
+        with open(path, "rb") as f:
+            index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _INDEX_HEADER.unpack_from(index)
+        if magic != INDEX_MAGIC:
+            index.close()
+            raise ValueError(f"{path} is not a digest index")
+        with self.lock:
+            # Lookups still using the old map keep it alive until they finish
+            self.path = path
+            self.mapped = (index, count)
+            self.recent = {
+                digest: text
+                for digest, text in self.recent.items()
+                if self.find(index, count, digest) is None
+            }
+
+    def add(self, digest: bytes, text: str) -> None:
+        with self.lock:
+            self.recent[digest] = text
+            if len(self.recent) > self.max_recent:
+                del self.recent[next(iter(self.recent))]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.path = None
+            self.mapped = (None, 0)
+            self.recent = {}
+
+    def get(self, digest: bytes) -> Optional[str]:
+        text = self.recent.get(digest)
+        if text is not None:
+            return text
+        index, count = self.mapped
+        if not count:
+            return None
+        position = self.find(index, count, digest)
+        if position is None:
+            return None
+        _, offset, length = _INDEX_RECORD.unpack_from(
+            index, _INDEX_HEADER.size + position * _INDEX_RECORD.size
+        )
+        start = _INDEX_HEADER.size + count * _INDEX_RECORD.size + offset
+        return index[start : start + length].decode()
+
+    def digests(self) -> Iterator[bytes]:
+        """Yield every digest, the mapped ones in order, then the recent ones."""
+        index, count = self.mapped
+        for position in range(count):
+            start = _INDEX_HEADER.size + position * _INDEX_RECORD.size
+            yield index[start : start + 16]
+        yield from list(self.recent)
+
+    @staticmethod
+    def find(index: mmap.mmap, count: int, digest: bytes) -> Optional[int]:
+        base = _INDEX_HEADER.size
+        size = _INDEX_RECORD.size
+        key = int.from_bytes(digest[:8], "big")
+        low, high = 0, count - 1
+        while low <= high:
+            low_key = int.from_bytes(
+                index[base + low * size : base + low * size + 8], "big"
+            )
+            high_key = int.from_bytes(
+                index[base + high * size : base + high * size + 8], "big"
+            )
+            if not low_key <= key <= high_key:
+                return None
+            if high_key == low_key:
+                middle = low
+            else:
+                middle = low + (key - low_key) * (high - low) // (high_key - low_key)
+            found = index[base + middle * size : base + middle * size + 16]
+            if found == digest:
+                return middle
+            if found < digest:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None
+
+    def __len__(self) -> int:
+        return self.mapped[1] + len(self.recent)
@@ -1,6 +1,7 @@
 import base64
 import binascii
 import urllib.parse
+from typing import Iterable, Iterator
 
 
 def encode_base64(input_text: str) -> str:
@@ -61,3 +62,48 @@ def encode_url(input_text: str) -> str:
 def decode_url(encoded_text: str) -> str:
     """Decode a URL-encoded string."""
     return urllib.parse.unquote(encoded_text)
+
+
+def whole_blocks(chunks: Iterable[bytes], block_size: int) -> Iterator[bytes]:
+    """Regroup chunks into multiples of ``block_size``; only the last may be short."""
+    rest = b""
+    for chunk in chunks:
+        data = rest + chunk
+        end = len(data) - len(data) % block_size
+        rest = data[end:]
+        if end:
+            yield data[:end]
+    if rest:
+        yield rest
+
+
+# Streaming encoders work on raw byte chunks for the stream pipeline. Base64
+# codes 3 bytes as 4 characters and hex 1 byte as 2, so input is regrouped on
+# those boundaries and every group is coded on its own.
+def encode_base64_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Encode a byte stream as Base64, padding only the final group."""
+    for block in whole_blocks(chunks, 3):
+        yield base64.b64encode(block)
+
+
+def decode_base64_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decode a Base64 byte stream, raising ValueError for invalid input."""
+    padded = False
+    for block in whole_blocks(chunks, 4):
+        if padded:
+            raise ValueError("Unexpected data after Base64 padding")
+        yield base64.b64decode(block, validate=True)
+        padded = block.endswith(b"=")
+
+
+def encode_hex_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Encode a byte stream as Hex."""
+    for chunk in chunks:
+        if chunk:
+            yield binascii.hexlify(chunk)
+
+
+def decode_hex_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decode a Hex byte stream, raising ValueError for invalid input."""
+    for block in whole_blocks(chunks, 2):
+        yield binascii.unhexlify(block)
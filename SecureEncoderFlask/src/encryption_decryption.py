@@ -1,9 +1,71 @@
-from typing import Union
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives import hashes, serialization
+import functools
+import itertools
 import os
+import struct
+import threading
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.backends import default_backend
+from .key_pool import rsa_key_pool
+
+
+# Parsed key material keyed by (absolute path, kind), stored with the file
+# signature it was read from so replaced files are picked up
+_key_cache: dict[tuple[str, str], tuple[tuple[int, int, int], Any]] = {}
+_key_cache_lock = threading.Lock()
+
+
+def _file_signature(key_file: str) -> tuple[int, int, int]:
+    stat = os.stat(key_file)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def load_cached_key(key_file: str, kind: str, loader: Callable[[bytes], Any]) -> Any:
+    """Return the parsed key in ``key_file``, reading it only when the file changed."""
+    cache_key = (os.path.abspath(key_file), kind)
+    signature = _file_signature(key_file)
+    cached = _key_cache.get(cache_key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with open(key_file, "rb") as kf:
+        key = loader(kf.read())
+    with _key_cache_lock:
+        _key_cache[cache_key] = (signature, key)
+    return key
+
+
+def invalidate_key_cache(key_file: Optional[str] = None) -> None:
+    """Drop cached key material for ``key_file``, or for every file when omitted."""
+    # AESGCM objects are keyed by raw key bytes rather than by file, so drop
+    # them all; rebuilding one is cheap
+    get_aesgcm.cache_clear()
+    with _key_cache_lock:
+        if key_file is None:
+            _key_cache.clear()
+            return
+        path = os.path.abspath(key_file)
+        for cache_key in [
+            cache_key for cache_key in _key_cache if cache_key[0] == path
+        ]:
+            del _key_cache[cache_key]
+
+
+@functools.lru_cache(maxsize=32)
+def get_aesgcm(key: bytes) -> AESGCM:
+    """Return a reusable AESGCM object for ``key``."""
+    return AESGCM(key)
+
+
+def _load_private_key(data: bytes) -> rsa.RSAPrivateKey:
+    return serialization.load_pem_private_key(
+        data, password=None, backend=default_backend()
+    )
+
+
+def _load_public_key(data: bytes) -> rsa.RSAPublicKey:
+    return serialization.load_pem_public_key(data, backend=default_backend())
 
 
 def ensure_aes_key(key_file: str) -> bytes:
@@ -14,47 +76,133 @@ def ensure_aes_key(key_file: str) -> bytes:
             kf.write(key)
         print(f"New AES key generated and saved to {key_file}")
     else:
-        with open(key_file, "rb") as kf:
-            key = kf.read()
+        key = load_cached_key(key_file, "aes", bytes)
     return key
 
 
 # AES-GCM provides confidentiality along with built-in message integrity and authenticity checks, using a single algorithm.
-def aes_encrypt(plaintext: str, key: bytes) -> str:
-    """Encrypt a string using AES-GCM encryption with the provided key."""
+def aes_encrypt_bytes(plaintext: bytes, key: bytes) -> bytes:
+    """Encrypt bytes using AES-GCM, returning nonce + ciphertext."""
     # Generate a random nonce
     nonce = os.urandom(12)
-    # Create an AESGCM object
-    aesgcm = AESGCM(key)
-    # Encrypt the plaintext
-    ciphertext = aesgcm.encrypt(nonce, plaintext.encode(), None)
-    # Return nonce + Ciphertext for decryption
-    return (nonce + ciphertext).hex()
+    # Reuse the AESGCM object for this key
+    return nonce + get_aesgcm(key).encrypt(nonce, plaintext, None)
 
 
-def aes_decrypt(ciphertext_hex: str, key: bytes) -> str:
-    """Decrypt a string using AES-GCM decryption with the provided key."""
-    ciphertext = bytes.fromhex(ciphertext_hex)
+def aes_decrypt_bytes(ciphertext: bytes, key: bytes) -> bytes:
+    """Decrypt nonce + ciphertext produced by ``aes_encrypt_bytes``."""
     # Extract nonce from the beginning of the ciphertext
     nonce = ciphertext[:12]
     actual_ciphertext = ciphertext[12:]
-    # Create an AESGCM object
-    aesgcm = AESGCM(key)
-    # Decrypt the ciphertext
     try:
-        decrypted = aesgcm.decrypt(nonce, actual_ciphertext, None)
-        return decrypted.decode()
+        return get_aesgcm(key).decrypt(nonce, actual_ciphertext, None)
     except Exception as e:
         raise ValueError("Decryption failed or wrong key used: " + str(e))
 
 
-def generate_rsa_keys() -> tuple[rsa.RSAPrivateKey, rsa.RSAPublicKey]:
-    """Generate RSA private and public keys."""
-    private_key = rsa.generate_private_key(
-        public_exponent=65537, key_size=2048, backend=default_backend()
+def aes_encrypt(plaintext: str, key: bytes) -> str:
+    """Encrypt a string using AES-GCM encryption with the provided key."""
+    return aes_encrypt_bytes(plaintext.encode(), key).hex()
+
+
+def aes_decrypt(ciphertext_hex: str, key: bytes) -> str:
+    """Decrypt a string using AES-GCM decryption with the provided key."""
+    return aes_decrypt_bytes(bytes.fromhex(ciphertext_hex), key).decode()
+
+
+# Streaming AES-GCM (STREAM construction): the header holds a format version,
+# the plaintext chunk size and a random 7-byte nonce prefix. Each chunk is
+# sealed with nonce = prefix | 4-byte chunk counter | final-chunk flag and the
+# header as associated data, so reordering, truncation and header edits fail.
+AES_STREAM_VERSION = 1
+AES_STREAM_CHUNK_SIZE = 64 * 1024
+# Decryption buffers a whole chunk, so the size read from an untrusted header is capped
+AES_STREAM_MAX_CHUNK_SIZE = 16 * 1024 * 1024
+AES_GCM_TAG_SIZE = 16
+_AES_STREAM_HEADER = struct.Struct(">BI7s")
+
+
+def _stream_blocks(chunks: Iterable[bytes], size: int) -> Iterator[tuple[bytes, bool]]:
+    """Re-chunk ``chunks`` into ``size``-byte blocks, flagging the final one."""
+    if size < 1:
+        raise ValueError("Stream chunk size must be positive")
+    buffer = bytearray()
+    pending: Optional[bytes] = None
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= size:
+            if pending is not None:
+                yield pending, False
+            pending = bytes(buffer[:size])
+            del buffer[:size]
+    if buffer:
+        if pending is not None:
+            yield pending, False
+        pending = bytes(buffer)
+    yield (pending if pending is not None else b""), True
+
+
+def _stream_nonce(prefix: bytes, counter: int, final: bool) -> bytes:
+    if counter >= 2**32:
+        raise ValueError("Stream is too long for its chunk size")
+    return prefix + struct.pack(">I?", counter, final)
+
+
+def aes_encrypt_stream(
+    chunks: Iterable[bytes], key: bytes, chunk_size: int = AES_STREAM_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Encrypt a stream of byte chunks with AES-GCM using constant memory."""
+    if not 0 < chunk_size <= AES_STREAM_MAX_CHUNK_SIZE:
+        raise ValueError(
+            f"Stream chunk size must be between 1 and {AES_STREAM_MAX_CHUNK_SIZE} bytes"
+        )
+    aesgcm = get_aesgcm(key)
+    header = _AES_STREAM_HEADER.pack(AES_STREAM_VERSION, chunk_size, os.urandom(7))
+    prefix = header[-7:]
+    yield header
+    for counter, (block, final) in enumerate(_stream_blocks(chunks, chunk_size)):
+        yield aesgcm.encrypt(_stream_nonce(prefix, counter, final), block, header)
+
+
+def aes_decrypt_stream(
+    chunks: Iterable[bytes],
+    key: bytes,
+    max_chunk_size: int = AES_STREAM_MAX_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Decrypt a stream produced by ``aes_encrypt_stream`` chunk by chunk.
+
+    Headers declaring chunks larger than ``max_chunk_size`` are rejected before
+    anything is buffered.
+    """
+    aesgcm = get_aesgcm(key)
+    source = iter(chunks)
+    buffer = b""
+    while len(buffer) < _AES_STREAM_HEADER.size:
+        chunk = next(source, None)
+        if chunk is None:
+            raise ValueError("Decryption failed or wrong key used: stream too short")
+        buffer += chunk
+    header, rest = buffer[: _AES_STREAM_HEADER.size], buffer[_AES_STREAM_HEADER.size :]
+    version, chunk_size, prefix = _AES_STREAM_HEADER.unpack(header)
+    if version != AES_STREAM_VERSION:
+        raise ValueError(f"Unsupported AES stream version: {version}")
+    if not 0 < chunk_size <= max_chunk_size:
+        raise ValueError(f"AES stream chunk size {chunk_size} is out of range")
+    segments = _stream_blocks(
+        itertools.chain([rest], source), chunk_size + AES_GCM_TAG_SIZE
     )
-    public_key = private_key.public_key()
-    return private_key, public_key
+    for counter, (segment, final) in enumerate(segments):
+        try:
+            yield aesgcm.decrypt(_stream_nonce(prefix, counter, final), segment, header)
+        except Exception as e:
+            raise ValueError("Decryption failed or wrong key used: " + str(e))
+
+
+def generate_rsa_keys(
+    key_size: int = 2048,
+) -> tuple[rsa.RSAPrivateKey, rsa.RSAPublicKey]:
+    """Generate RSA private and public keys, taking a pre-generated pair when available."""
+    return rsa_key_pool.take(key_size)
 
 
 def save_rsa_key(
@@ -81,49 +229,60 @@ def save_rsa_key(
             )
 
 
-def ensure_rsa_public_key(public_key_file: str) -> rsa.RSAPublicKey:
+def ensure_rsa_public_key(
+    public_key_file: str, key_size: int = 2048
+) -> rsa.RSAPublicKey:
     """Ensure the RSA public key is available and return it."""
     if not os.path.exists(public_key_file):
         # If the public key is missing, generate both keys to ensure matching pairs
         private_key_file = public_key_file.replace("public", "private")
         if not os.path.exists(private_key_file):
-            private_key, public_key = generate_rsa_keys()
+            private_key, public_key = generate_rsa_keys(key_size)
             save_rsa_key(private_key, private_key_file, is_private=True)
             save_rsa_key(public_key, public_key_file, is_private=False)
         else:
             # Load the existing private key and derive the public key
-            with open(private_key_file, "rb") as kf:
-                private_key = serialization.load_pem_private_key(
-                    kf.read(), password=None, backend=default_backend()
-                )
+            private_key = load_cached_key(
+                private_key_file, "rsa_private", _load_private_key
+            )
             public_key = private_key.public_key()
             save_rsa_key(public_key, public_key_file, is_private=False)
     else:
         # Load the existing public key
-        with open(public_key_file, "rb") as kf:
-            public_key = serialization.load_pem_public_key(
-                kf.read(), backend=default_backend()
-            )
+        public_key = load_cached_key(public_key_file, "rsa_public", _load_public_key)
     return public_key
 
 
-def ensure_rsa_private_key(private_key_file: str) -> rsa.RSAPrivateKey:
+def ensure_rsa_private_key(
+    private_key_file: str, key_size: int = 2048
+) -> rsa.RSAPrivateKey:
     """Ensure the RSA private key is available and return it."""
     if not os.path.exists(private_key_file):
         # If the private key is missing, generate both keys to ensure matching pairs
         public_key_file = private_key_file.replace("private", "public")
-        private_key, public_key = generate_rsa_keys()
+        private_key, public_key = generate_rsa_keys(key_size)
         save_rsa_key(private_key, private_key_file, is_private=True)
         save_rsa_key(public_key, public_key_file, is_private=False)
     else:
         # Load the existing private key
-        with open(private_key_file, "rb") as kf:
-            private_key = serialization.load_pem_private_key(
-                kf.read(), password=None, backend=default_backend()
-            )
+        private_key = load_cached_key(
+            private_key_file, "rsa_private", _load_private_key
+        )
     return private_key
 
 
+def rotate_rsa_keys(
+    private_key_file: str, public_key_file: str, key_size: int = 2048
+) -> rsa.RSAPublicKey:
+    """Replace the stored RSA key pair with a new one and return its public key."""
+    private_key, public_key = generate_rsa_keys(key_size)
+    save_rsa_key(private_key, private_key_file, is_private=True)
+    save_rsa_key(public_key, public_key_file, is_private=False)
+    invalidate_key_cache(private_key_file)
+    invalidate_key_cache(public_key_file)
+    return public_key
+
+
 def rsa_encrypt(plaintext: str, public_key: rsa.RSAPublicKey) -> str:
     """Encrypt a string using RSA public key."""
     ciphertext = public_key.encrypt(
@@ -149,3 +308,110 @@ def rsa_decrypt(ciphertext_hex: str, private_key: rsa.RSAPrivateKey) -> str:
         ),
     )
     return plaintext.decode()
+
+
+# Hybrid envelope: a random AES-256-GCM key encrypts the message and is wrapped
+# with RSA-OAEP. Layout: version (1) | wrapped key length (2) | wrapped key |
+# nonce (12) | AES-GCM ciphertext. Everything before the nonce is authenticated
+# as associated data.
+RSA_ENVELOPE_VERSION = 1
+_RSA_ENVELOPE_PREFIX = struct.Struct(">BH")
+
+
+def _oaep_padding() -> padding.OAEP:
+    return padding.OAEP(
+        mgf=padding.MGF1(algorithm=hashes.SHA256()),
+        algorithm=hashes.SHA256(),
+        label=None,
+    )
+
+
+def _seal_envelope(plaintext: str, session_key: bytes, wrapped_key: bytes) -> str:
+    header = _RSA_ENVELOPE_PREFIX.pack(RSA_ENVELOPE_VERSION, len(wrapped_key))
+    header += wrapped_key
+    nonce = os.urandom(12)
+    ciphertext = get_aesgcm(session_key).encrypt(nonce, plaintext.encode(), header)
+    return (header + nonce + ciphertext).hex()
+
+
+def _parse_envelope(envelope: bytes) -> tuple[bytes, bytes, bytes, bytes]:
+    """Split an envelope into (header, wrapped key, nonce, ciphertext)."""
+    if len(envelope) < _RSA_ENVELOPE_PREFIX.size:
+        raise ValueError("Decryption failed: envelope is too short")
+    version, wrapped_length = _RSA_ENVELOPE_PREFIX.unpack_from(envelope)
+    if version != RSA_ENVELOPE_VERSION:
+        raise ValueError(f"Unsupported RSA envelope version: {version}")
+    header_end = _RSA_ENVELOPE_PREFIX.size + wrapped_length
+    if len(envelope) < header_end + 12 + AES_GCM_TAG_SIZE:
+        raise ValueError("Decryption failed: envelope is too short")
+    return (
+        envelope[:header_end],
+        envelope[_RSA_ENVELOPE_PREFIX.size : header_end],
+        envelope[header_end : header_end + 12],
+        envelope[header_end + 12 :],
+    )
+
+
+def _open_envelope(
+    envelope: bytes, private_key: rsa.RSAPrivateKey, session_keys: dict[bytes, bytes]
+) -> str:
+    header, wrapped_key, nonce, ciphertext = _parse_envelope(envelope)
+    session_key = session_keys.get(wrapped_key)
+    if session_key is None:
+        session_key = private_key.decrypt(wrapped_key, _oaep_padding())
+        session_keys[wrapped_key] = session_key
+    try:
+        plaintext = get_aesgcm(session_key).decrypt(nonce, ciphertext, header)
+    except Exception as e:
+        raise ValueError("Decryption failed or wrong key used: " + str(e))
+    return plaintext.decode()
+
+
+def rsa_envelope_encrypt(plaintext: str, public_key: rsa.RSAPublicKey) -> str:
+    """Encrypt a string of any length with a fresh AES key wrapped by RSA."""
+    return rsa_envelope_encrypt_batch([plaintext], public_key)[0]
+
+
+def rsa_envelope_encrypt_batch(
+    plaintexts: list[str], public_key: rsa.RSAPublicKey
+) -> list[str]:
+    """Encrypt several strings under one wrapped session key.
+
+    Every envelope stays self-contained, but they share the wrapped key so
+    ``rsa_envelope_decrypt_batch`` needs a single RSA private operation.
+    """
+    session_key = AESGCM.generate_key(bit_length=256)
+    wrapped_key = public_key.encrypt(session_key, _oaep_padding())
+    return [
+        _seal_envelope(plaintext, session_key, wrapped_key) for plaintext in plaintexts
+    ]
+
+
+def rsa_envelope_decrypt(
+    ciphertext_hex: str,
+    private_key: rsa.RSAPrivateKey,
+    session_keys: Optional[dict[bytes, bytes]] = None,
+) -> str:
+    """Decrypt an envelope, or a legacy ciphertext produced by ``rsa_encrypt``.
+
+    ``session_keys`` maps wrapped keys to unwrapped ones; passing the same dict
+    for several envelopes unwraps each distinct session key only once.
+    """
+    ciphertext = bytes.fromhex(ciphertext_hex)
+    if len(ciphertext) == private_key.key_size // 8:
+        # Raw RSA-OAEP ciphertexts are exactly one modulus long; envelopes are longer
+        return rsa_decrypt(ciphertext_hex, private_key)
+    return _open_envelope(
+        ciphertext, private_key, session_keys if session_keys is not None else {}
+    )
+
+
+def rsa_envelope_decrypt_batch(
+    ciphertexts_hex: list[str], private_key: rsa.RSAPrivateKey
+) -> list[str]:
+    """Decrypt envelopes, unwrapping each distinct session key only once."""
+    session_keys: dict[bytes, bytes] = {}
+    return [
+        rsa_envelope_decrypt(ciphertext_hex, private_key, session_keys)
+        for ciphertext_hex in ciphertexts_hex
+    ]
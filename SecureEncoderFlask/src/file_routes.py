@@ -4,6 +4,7 @@ from werkzeug.utils import secure_filename
 from marshmallow import ValidationError
 from .log_execution import log_execution
 from .schemas import UploadKeySchema
+from .encryption_decryption import invalidate_key_cache, rotate_rsa_keys
 
 file_bp = Blueprint("file_bp", __name__)
 
@@ -28,7 +29,9 @@ def upload_key():
         file.filename, set(current_app.config["ALLOWED_EXTENSIONS"])
     ):
         filename = secure_filename(file.filename)
-        file.save(os.path.join(current_app.config["UPLOAD_FOLDER"], filename))
+        file_path = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
+        file.save(file_path)
+        invalidate_key_cache(file_path)
         return jsonify(
             {"message": "File uploaded successfully", "filename": filename}
         ), 201
@@ -70,6 +73,24 @@ def delete_key(filename: str) -> jsonify:
     )
     if os.path.exists(file_path):
         os.remove(file_path)
+        invalidate_key_cache(file_path)
         return jsonify({"message": "File deleted successfully"}), 204
     else:
         return jsonify({"error": "File not found"}), 404
+
+
+@file_bp.route("/api/rotate_rsa_keys", methods=["POST"])
+@log_execution
+def rotate_rsa_key_pair() -> tuple[jsonify, int]:
+    upload_folder = current_app.config["UPLOAD_FOLDER"]
+    rotate_rsa_keys(
+        os.path.join(upload_folder, "rsa_private_key.pem"),
+        os.path.join(upload_folder, "rsa_public_key.pem"),
+        current_app.config["RSA_KEY_SIZE"],
+    )
+    return jsonify(
+        {
+            "message": "RSA keys rotated successfully",
+            "files": ["rsa_private_key.pem", "rsa_public_key.pem"],
+        }
+    ), 201
@@ -1,8 +1,18 @@
 import base64
+import functools
 import json
 from collections import Counter
 import heapq
 from typing import Optional, Union
+from .varint import encode_number, decode_number
+
+# Binary container: magic, format version, code lengths per symbol, bit count, payload
+HUFFMAN_MAGIC = b"HUF"
+HUFFMAN_FORMAT_VERSION = 1
+# Payloads coded with a shared table from a trained dictionary instead of a header
+HUFFMAN_DICTIONARY_FORMAT_VERSION = 2
+# Longest code the compressor emits; lengths are stored in one header byte
+MAX_CODE_LENGTH = 24
 
 
 def huffman_compress(data: str) -> str:
@@ -15,8 +25,173 @@ def huffman_decompress(data: str) -> str:
     return huffman_algorithm.decompress(data)
 
 
+class HuffmanDecodeTable:
+    """Decode Huffman codes through a k-bit primary lookup table.
+
+    The next ``k`` payload bits index a table giving the symbol and code length
+    directly, so codes up to ``PRIMARY_BITS`` long cost one lookup. Longer codes
+    fall back to a lookup per code length. Any prefix code works, so tables
+    also serve the non-canonical codes of legacy payloads. The table only
+    depends on the codebook and is built once.
+
+    Large payloads also use a ``MULTI_BITS`` window table whose entries hold
+    every symbol that fits in the window, so short codes decode several at a
+    time.
+    """
+
+    PRIMARY_BITS = 16
+    MULTI_BITS = 11
+
+    def __init__(self, codebook: dict[str, str]) -> None:
+        # In sorted order, a code that prefixes others comes right before one
+        ordered = sorted(codebook.values())
+        if not ordered[0] or any(
+            code.startswith(previous) for previous, code in zip(ordered, ordered[1:])
+        ):
+            raise ValueError("Huffman decode tables need prefix-free codes")
+        by_length: dict[int, list[tuple[int, str]]] = {}
+        for char, code in codebook.items():
+            by_length.setdefault(len(code), []).append((int(code, 2), char))
+        self.max_code_length = max(by_length)
+        self.primary_bits = min(self.PRIMARY_BITS, self.max_code_length)
+        # Codes longer than the primary table, by length, shortest first
+        self.long_codes: list[tuple[int, dict[int, str]]] = [
+            (length, dict(by_length[length]))
+            for length in sorted(by_length)
+            if length > self.primary_bits
+        ]
+
+        # A zero length marks bits that start a long or an invalid code
+        k = self.primary_bits
+        self.primary: list[tuple[Optional[str], int]] = [(None, 0)] * (1 << k)
+        for length, codes in by_length.items():
+            if length > k:
+                continue
+            span = 1 << (k - length)
+            for code, char in codes:
+                start = code << (k - length)
+                self.primary[start : start + span] = [(char, length)] * span
+        self.multi: Optional[list[tuple[str, int]]] = None
+
+    def build_multi_table(self) -> list[tuple[str, int]]:
+        """Map each ``MULTI_BITS`` window to the symbols it holds and their bits.
+
+        Windows are built from narrow to wide: a window is its first symbol
+        followed by the entry for the bits after that symbol.
+        """
+        k = self.primary_bits
+        primary = self.primary
+        windows: list[list[tuple[str, int]]] = [[("", 0)]]
+        for width in range(1, self.MULTI_BITS + 1):
+            table = []
+            for bits in range(1 << width):
+                if width >= k:
+                    char, length = primary[bits >> (width - k)]
+                else:
+                    char, length = primary[bits << (k - width)]
+                if not length or length > width:
+                    table.append(("", 0))
+                else:
+                    rest = width - length
+                    chars, used = windows[rest][bits & ((1 << rest) - 1)]
+                    table.append((char + chars, length + used))
+            windows.append(table)
+        return windows[self.MULTI_BITS]
+
+    def decode_long(self, bits: int, bit_length: int) -> tuple[str, int]:
+        """Decode a code longer than the primary table from the top of ``bits``."""
+        for length, codes in self.long_codes:
+            char = codes.get((bits >> (bit_length - length)) & ((1 << length) - 1))
+            if char is not None:
+                return char, length
+        raise ValueError("Huffman payload contains an invalid code")
+
+    def decode(self, payload: bytes, bit_count: int) -> str:
+        k = self.primary_bits
+        mask = (1 << k) - 1
+        primary = self.primary
+        max_code_length = self.max_code_length
+        decoded_data = []
+        append = decoded_data.append
+        bits = 0
+        bit_length = 0
+
+        # Whole 8-byte chunks hold only data bits, so every code that starts in
+        # them is complete once max_code_length bits are buffered
+        position = 0
+        chunk_end = bit_count // 8 - 7
+        # The window table costs about 2 ** (MULTI_BITS + 1) steps to build
+        if bit_count >= 64 << self.MULTI_BITS:
+            if self.multi is None:
+                self.multi = self.build_multi_table()
+            multi = self.multi
+            m = self.MULTI_BITS
+            multi_mask = (1 << m) - 1
+            guard = max(m, max_code_length)
+            for position in range(0, chunk_end, 8):
+                bits = ((bits & ((1 << bit_length) - 1)) << 64) | int.from_bytes(
+                    payload[position : position + 8], "big"
+                )
+                bit_length += 64
+                while bit_length >= guard:
+                    chars, used = multi[(bits >> (bit_length - m)) & multi_mask]
+                    if not used:
+                        chars, used = primary[(bits >> (bit_length - k)) & mask]
+                        if not used:
+                            chars, used = self.decode_long(bits, bit_length)
+                    append(chars)
+                    bit_length -= used
+                position += 8
+        else:
+            for position in range(0, chunk_end, 8):
+                bits = ((bits & ((1 << bit_length) - 1)) << 64) | int.from_bytes(
+                    payload[position : position + 8], "big"
+                )
+                bit_length += 64
+                while bit_length >= max_code_length:
+                    char, length = primary[(bits >> (bit_length - k)) & mask]
+                    if not length:
+                        char, length = self.decode_long(bits, bit_length)
+                    append(char)
+                    bit_length -= length
+                position += 8
+
+        # The tail may end inside a byte, so check each code against the bit count
+        remaining = bit_count - 8 * position + bit_length
+        while remaining > 0:
+            if bit_length < max_code_length:
+                chunk = payload[position : position + 8]
+                position += 8
+                bits = ((bits & ((1 << bit_length) - 1)) << (8 * len(chunk))) | (
+                    int.from_bytes(chunk, "big")
+                )
+                bit_length += 8 * len(chunk)
+                if bit_length < max_code_length:
+                    # Past the end of the payload: pad with zeros
+                    bits <<= max_code_length - bit_length
+                    bit_length = max_code_length
+            char, length = primary[(bits >> (bit_length - k)) & mask]
+            if not length:
+                char, length = self.decode_long(bits, bit_length)
+            if length > remaining:
+                raise ValueError("Huffman payload ends with an incomplete code")
+            append(char)
+            bit_length -= length
+            remaining -= length
+        return "".join(decoded_data)
+
+
+@functools.lru_cache(maxsize=32)
+def get_decode_table(code_lengths: tuple[tuple[str, int], ...]) -> HuffmanDecodeTable:
+    """Return a shared decode table for the canonical codes of ``code_lengths``."""
+    codebook = HuffmanCoding().build_canonical_codes(dict(code_lengths))
+    return HuffmanDecodeTable(codebook)
+
+
 class HuffmanCoding:
     class Node:
+        __slots__ = ("char", "freq", "left", "right")
+
         def __init__(self, char: Optional[str] = None, freq: int = 0) -> None:
             self.char = char
             self.freq = freq
@@ -51,80 +226,249 @@ class HuffmanCoding:
     ) -> dict[str, str]:
         if codebook is None:
             codebook = {}
-        if node.char is not None:
-            codebook[node.char] = prefix
-        else:
-            self.build_codes(node.left, prefix + "0", codebook)
-            self.build_codes(node.right, prefix + "1", codebook)
+        # Walk with an explicit stack so skewed trees cannot hit the recursion limit
+        stack = [(node, prefix)]
+        while stack:
+            node, prefix = stack.pop()
+            if node.char is not None:
+                codebook[node.char] = prefix
+            else:
+                stack.append((node.right, prefix + "1"))
+                stack.append((node.left, prefix + "0"))
         return codebook
 
     def serialize_tree(self, node: Node) -> dict[str, Union[str, dict]]:
-        if node.char is not None:
-            return {"char": node.char}
-        return {
-            "left": self.serialize_tree(node.left),
-            "right": self.serialize_tree(node.right),
-        }
+        root: dict[str, Union[str, dict]] = {}
+        stack = [(node, root)]
+        while stack:
+            node, serialized = stack.pop()
+            if node.char is not None:
+                serialized["char"] = node.char
+            else:
+                serialized["left"], serialized["right"] = {}, {}
+                stack.append((node.right, serialized["right"]))
+                stack.append((node.left, serialized["left"]))
+        return root
 
     def deserialize_tree(self, data: dict[str, Union[str, dict]]) -> Node:
-        if "char" in data:
-            return self.Node(char=data["char"])
-        node = self.Node()
-        node.left = self.deserialize_tree(data["left"])
-        node.right = self.deserialize_tree(data["right"])
-        return node
+        root = self.Node()
+        stack = [(data, root)]
+        while stack:
+            data, node = stack.pop()
+            if "char" in data:
+                node.char = data["char"]
+            else:
+                node.left, node.right = self.Node(), self.Node()
+                stack.append((data["right"], node.right))
+                stack.append((data["left"], node.left))
+        return root
 
-    def compress(self, data: str) -> str:
-        if not data:
-            return ""
-        if len(data) == 1:
-            return data
+    def build_code_lengths(self, node: Node) -> dict[str, int]:
+        if node.char is not None:
+            # A single-symbol alphabet still needs one bit per symbol
+            return {node.char: 1}
+        code_lengths: dict[str, int] = {}
+        stack = [(node, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if node.char is not None:
+                code_lengths[node.char] = depth
+            else:
+                stack.append((node.left, depth + 1))
+                stack.append((node.right, depth + 1))
+        return code_lengths
 
-        freq_table = self.build_frequency_table(data)
-        self.build_huffman_tree(freq_table)
-        codebook = self.build_codes(self.huffman_tree)
-        encoded_data = "".join(codebook[char] for char in data)
+    def build_limited_code_lengths(
+        self, freq_table: Counter, max_length: int = MAX_CODE_LENGTH
+    ) -> dict[str, int]:
+        """Compute optimal code lengths no longer than ``max_length`` (package-merge).
 
-        base64_encoded_data = base64.b64encode(encoded_data.encode()).decode("ascii")
+        Each level merges the symbols with the pairwise packages of the level
+        below. Only whether each merged item is a package is kept, because the
+        items chosen at every level always form a prefix of that level's list:
+        a chosen prefix of ``count`` items adds one bit to its leaves and
+        chooses the first ``2 * packages`` items of the level below.
+        """
+        symbols = sorted(freq_table, key=lambda char: (freq_table[char], ord(char)))
+        if len(symbols) == 1:
+            return {symbols[0]: 1}
+        if len(symbols) > 1 << max_length:
+            raise ValueError(f"Too many symbols for {max_length}-bit Huffman codes")
 
-        serialized_tree = self.serialize_tree(self.huffman_tree)
+        leaves = [(freq_table[char], False) for char in symbols]
+        levels = [bytearray(len(leaves))]
+        previous = leaves
+        for _ in range(max_length - 1):
+            packages = [
+                (previous[i][0] + previous[i + 1][0], True)
+                for i in range(0, len(previous) - 1, 2)
+            ]
+            # Both inputs are already sorted, so sorted() finds the two runs and
+            # merges them in linear time; leaves sort ahead of packages of equal
+            # weight
+            previous = sorted(leaves + packages)
+            levels.append(bytearray([item[1] for item in previous]))
 
-        combined_data = {
-            "compressed_data": base64_encoded_data,
-            "serialized_tree": serialized_tree,
-        }
+        lengths = [0] * len(symbols)
+        count = 2 * len(symbols) - 2
+        for is_package in reversed(levels):
+            packages_chosen = sum(is_package[:count])
+            for i in range(count - packages_chosen):
+                lengths[i] += 1
+            count = 2 * packages_chosen
+        return dict(zip(symbols, lengths))
 
-        combined_json = json.dumps(combined_data)
-        combined_base64 = base64.b64encode(combined_json.encode()).decode("ascii")
+    def build_bounded_code_lengths(
+        self, freq_table: Counter, max_length: int = MAX_CODE_LENGTH
+    ) -> dict[str, int]:
+        """Compute Huffman code lengths, using package-merge only when they are too long.
 
-        return combined_base64
+        The tree is built over ``(frequency, node)`` tuples with a parent array,
+        so no node objects are created. Lengths over ``max_length`` are rare and
+        fall back to ``build_limited_code_lengths``.
+        """
+        symbols = list(freq_table)
+        if len(symbols) <= 1:
+            return {char: 1 for char in symbols}
+        heap = [(freq_table[char], node) for node, char in enumerate(symbols)]
+        heapq.heapify(heap)
+        parent = [0] * (2 * len(symbols) - 1)
+        next_node = len(symbols)
+        while len(heap) > 1:
+            left_freq, left = heapq.heappop(heap)
+            right_freq, right = heapq.heappop(heap)
+            parent[left] = parent[right] = next_node
+            heapq.heappush(heap, (left_freq + right_freq, next_node))
+            next_node += 1
+        # Parents are numbered after their children, so walk down from the root
+        depth = [0] * next_node
+        for node in range(next_node - 2, -1, -1):
+            depth[node] = depth[parent[node]] + 1
+        lengths = depth[: len(symbols)]
+        if max(lengths) > max_length:
+            return self.build_limited_code_lengths(freq_table, max_length)
+        return dict(zip(symbols, lengths))
+
+    def build_canonical_codes(self, code_lengths: dict[str, int]) -> dict[str, str]:
+        codebook: dict[str, str] = {}
+        code = 0
+        previous_length = 0
+        for char, length in sorted(
+            code_lengths.items(), key=lambda item: (item[1], ord(item[0]))
+        ):
+            code <<= length - previous_length
+            codebook[char] = format(code, f"0{length}b")
+            code += 1
+            previous_length = length
+        return codebook
+
+    def pack_codes(self, data: str, codebook: dict[str, str]) -> tuple[bytes, int]:
+        codes = {char: (int(code, 2), len(code)) for char, code in codebook.items()}
+        payload = bytearray()
+        # Codes are shifted into an integer and flushed 64 bits at a time, so
+        # the buffer never holds more than one word plus one code
+        bits = 0
+        bit_length = 0
+        for code, length in map(codes.__getitem__, data):
+            bits = (bits << length) | code
+            bit_length += length
+            if bit_length >= 64:
+                bit_length -= 64
+                payload += (bits >> bit_length).to_bytes(8, "big")
+                bits &= (1 << bit_length) - 1
+        bit_count = 8 * len(payload) + bit_length
+        # Pad the final byte with zeros; the stored bit count marks where data ends
+        padding = -bit_length % 8
+        payload += (bits << padding).to_bytes((bit_length + padding) // 8, "big")
+        return bytes(payload), bit_count
+
+    def compress(self, data: str) -> str:
+        if not data:
+            return ""
+        if len(data) == 1:
+            return data
+        return base64.b64encode(self.encode(data)).decode("ascii")
 
     def decompress(self, combined_base64: str) -> str:
         if not combined_base64:
             return ""
         if len(combined_base64) == 1:
             return combined_base64
-        combined_json = base64.b64decode(combined_base64.encode("ascii")).decode()
-        combined_data = json.loads(combined_json)
+        raw = base64.b64decode(combined_base64.encode("ascii"))
+        if not raw.startswith(HUFFMAN_MAGIC):
+            return self.decompress_legacy(raw)
+        return self.decode(raw)
 
-        base64_encoded_data = combined_data["compressed_data"]
-        serialized_tree = combined_data["serialized_tree"]
+    def encode(self, data: str) -> bytes:
+        """Code ``data`` into the binary container, without the base64 wrapper."""
+        freq_table = self.build_frequency_table(data)
+        code_lengths = self.build_bounded_code_lengths(freq_table)
+        codebook = self.build_canonical_codes(code_lengths)
 
-        encoded_string = base64.b64decode(base64_encoded_data.encode("ascii")).decode()
+        payload, bit_count = self.pack_codes(data, codebook)
 
-        self.huffman_tree = self.deserialize_tree(serialized_tree)
+        header = bytearray(HUFFMAN_MAGIC)
+        header.append(HUFFMAN_FORMAT_VERSION)
+        header.extend(encode_number(len(code_lengths)))
+        for char, length in sorted(code_lengths.items(), key=lambda item: ord(item[0])):
+            header.extend(encode_number(ord(char)))
+            header.append(length)
+        header.extend(encode_number(bit_count))
+        return bytes(header) + payload
 
-        decoded_data = []
-        current_node = self.huffman_tree
+    def decode(self, raw: bytes) -> str:
+        """Decode a binary container written by ``encode``."""
+        if not raw.startswith(HUFFMAN_MAGIC) or len(raw) <= len(HUFFMAN_MAGIC):
+            raise ValueError("Not a Huffman container")
+        index = len(HUFFMAN_MAGIC)
+        version = raw[index]
+        if version == HUFFMAN_DICTIONARY_FORMAT_VERSION:
+            raise ValueError("Huffman payload was compressed with a dictionary")
+        if version != HUFFMAN_FORMAT_VERSION:
+            raise ValueError(f"Unsupported Huffman format version: {version}")
+        index += 1
+        symbol_count, index = decode_number(raw, index)
+        code_lengths: dict[str, int] = {}
+        for _ in range(symbol_count):
+            code_point, index = decode_number(raw, index)
+            if index >= len(raw):
+                raise ValueError("Truncated Huffman header")
+            if not 1 <= raw[index] <= MAX_CODE_LENGTH:
+                raise ValueError("Invalid Huffman code length")
+            code_lengths[chr(code_point)] = raw[index]
+            index += 1
+        # Lengths that overfill the code space cannot form a prefix code
+        if sum(1 << (MAX_CODE_LENGTH - length) for length in code_lengths.values()) > (
+            1 << MAX_CODE_LENGTH
+        ):
+            raise ValueError("Huffman code lengths do not form a prefix code")
+        bit_count, index = decode_number(raw, index)
 
-        for bit in encoded_string:
-            if bit == "0":
-                current_node = current_node.left
-            else:
-                current_node = current_node.right
+        payload = raw[index:]
+        if bit_count > len(payload) * 8:
+            raise ValueError("Huffman payload is shorter than its bit count")
+        if not code_lengths:
+            return ""
+        return get_decode_table(tuple(code_lengths.items())).decode(payload, bit_count)
 
-            if current_node.char is not None:
-                decoded_data.append(current_node.char)
-                current_node = self.huffman_tree
+    def decompress_legacy(self, combined_json: bytes) -> str:
+        combined_data = json.loads(combined_json.decode())
+        base64_encoded_data = combined_data["compressed_data"]
+        serialized_tree = combined_data["serialized_tree"]
 
-        return "".join(decoded_data)
+        encoded_string = base64.b64decode(base64_encoded_data.encode("ascii")).decode()
+
+        self.huffman_tree = self.deserialize_tree(serialized_tree)
+        if self.huffman_tree.char is not None:
+            # Legacy single-symbol trees have an empty code and no payload bits
+            return ""
+        if not encoded_string:
+            return ""
+        # Legacy payloads hold the code bits as a '0'/'1' string
+        bit_count = len(encoded_string)
+        padding = -bit_count % 8
+        payload = int(encoded_string + "0" * padding, 2).to_bytes(
+            (bit_count + padding) // 8, "big"
+        )
+        codebook = self.build_codes(self.huffman_tree)
+        return HuffmanDecodeTable(codebook).decode(payload, bit_count)
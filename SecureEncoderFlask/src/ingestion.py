@@ -0,0 +1,171 @@
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
+from sqlalchemy.exc import SQLAlchemyError
+from .md5_model import (
+    BULK_INSERT_BATCH_SIZE,
+    check_hash_algorithms,
+    db,
+    hash_texts,
+    insert_hash_rows,
+    storable_texts,
+)
+
+# Texts of one chunk and their digests per algorithm
+HashedChunk = tuple[list[str], dict[str, list[bytes]]]
+# Called after every stored chunk with the loader
+ProgressCallback = Callable[["WordlistLoader"], None]
+
+
+def hash_chunk(lines: list[bytes], algorithms: tuple[str, ...]) -> HashedChunk:
+    """Decode, deduplicate and hash one chunk of wordlist lines."""
+    texts = storable_texts(
+        line.decode("utf-8", errors="replace").rstrip("\r\n") for line in lines
+    )
+    return texts, hash_texts(texts, algorithms)
+
+
+def read_chunks(
+    path: str, chunk_size: int, offset: int = 0
+) -> Iterator[tuple[int, list[bytes]]]:
+    """Yield chunks of lines from byte ``offset``, each with the offset after it."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while lines := list(itertools.islice(f, chunk_size)):
+            offset += sum(len(line) for line in lines)
+            yield offset, lines
+
+
+class WordlistLoader:
+    """Load a wordlist into the hash tables, hashing on a process pool.
+
+    The file is read in chunks of ``batch_size`` lines, which worker
+    processes decode and hash while this process stores the finished chunks
+    in order, one transaction per chunk. After each transaction the byte
+    offset reached is written to ``checkpoint_path``, so an interrupted load
+    started again with the same file and algorithms resumes after the last
+    stored chunk. The checkpoint is removed once the load completes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        algorithms: Iterable[str],
+        batch_size: int = BULK_INSERT_BATCH_SIZE,
+        workers: int = os.cpu_count() or 1,
+        checkpoint_path: Optional[str] = None,
+    ) -> None:
+        self.path = path
+        self.algorithms = check_hash_algorithms(algorithms)
+        self.batch_size = batch_size
+        self.workers = workers
+        self.checkpoint_path = checkpoint_path
+        self.offset = 0
+        self.lines = 0
+        self.inserted = dict.fromkeys(self.algorithms, 0)
+        self.resumed_lines = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+        self.progress: Optional[ProgressCallback] = None
+
+    def checkpoint_key(self) -> dict[str, Any]:
+        # A checkpoint only applies to the same, unchanged file
+        stat = os.stat(self.path)
+        return {
+            "path": os.path.abspath(self.path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "algorithms": list(self.algorithms),
+        }
+
+    def load_checkpoint(self) -> None:
+        if self.checkpoint_path is None:
+            return
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("key") != self.checkpoint_key():
+            return
+        self.offset = state["offset"]
+        self.lines = state["lines"]
+        self.inserted = state["inserted"]
+        self.resumed_lines = self.lines
+
+    def save_checkpoint(self) -> None:
+        if self.checkpoint_path is None:
+            return
+        state = {
+            "key": self.checkpoint_key(),
+            "offset": self.offset,
+            "lines": self.lines,
+            "inserted": self.inserted,
+        }
+        with open(self.checkpoint_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(self.checkpoint_path + ".tmp", self.checkpoint_path)
+
+    def run(self, progress: Optional[ProgressCallback] = None) -> dict[str, int]:
+        """Load the rest of the file, returning the rows inserted per algorithm."""
+        self.load_checkpoint()
+        self.progress = progress
+        self.started = time.perf_counter()
+        executor = None
+        if self.workers > 1:
+            # Spawned rather than forked, as the app may already run threads
+            executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        # Two chunks per worker keep the pool busy while the writer stores one,
+        # without reading far ahead of it
+        pending: deque[tuple[int, int, Union[Future, HashedChunk]]] = deque()
+        try:
+            for end, lines in read_chunks(self.path, self.batch_size, self.offset):
+                if executor is None:
+                    chunk = hash_chunk(lines, self.algorithms)
+                else:
+                    chunk = executor.submit(hash_chunk, lines, self.algorithms)
+                pending.append((end, len(lines), chunk))
+                while len(pending) > 2 * self.workers:
+                    self.store(*pending.popleft())
+            while pending:
+                self.store(*pending.popleft())
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        if self.checkpoint_path is not None and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return self.inserted
+
+    def store(
+        self, end: int, line_count: int, chunk: Union[Future, HashedChunk]
+    ) -> None:
+        texts, digests = chunk.result() if isinstance(chunk, Future) else chunk
+        try:
+            for algorithm, column in digests.items():
+                self.inserted[algorithm] += insert_hash_rows(algorithm, texts, column)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise e
+        # A crash before the checkpoint is saved stores this chunk again on
+        # resume, which skips the rows already there
+        self.offset = end
+        self.lines += line_count
+        self.save_checkpoint()
+        self.elapsed = time.perf_counter() - self.started
+        if self.progress is not None:
+            self.progress(self)
+
+    @property
+    def lines_per_second(self) -> float:
+        """Lines stored per second by this run, not counting resumed ones."""
+        if not self.elapsed:
+            return 0.0
+        return (self.lines - self.resumed_lines) / self.elapsed
@@ -0,0 +1,210 @@
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.backends import default_backend
+from flask import Flask
+
+RSAKeyPair = tuple[rsa.RSAPrivateKey, rsa.RSAPublicKey]
+
+
+def create_rsa_key_pair(key_size: int = 2048) -> RSAKeyPair:
+    """Generate an RSA private key and its public key."""
+    private_key = rsa.generate_private_key(
+        public_exponent=65537, key_size=key_size, backend=default_backend()
+    )
+    return private_key, private_key.public_key()
+
+
+def generate_private_key_der(key_size: int) -> tuple[bytes, float]:
+    """Generate a private key in a worker process, returning its DER and timing."""
+    start = time.perf_counter()
+    private_key, _ = create_rsa_key_pair(key_size)
+    elapsed = time.perf_counter() - start
+    der = private_key.private_bytes(
+        serialization.Encoding.DER,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    return der, elapsed
+
+
+def load_key_pair_der(der: bytes) -> RSAKeyPair:
+    # The key was generated by our own worker, so the slow consistency
+    # check OpenSSL runs on untrusted keys can be skipped
+    private_key = serialization.load_der_private_key(
+        der, password=None, unsafe_skip_rsa_key_validation=True
+    )
+    return private_key, private_key.public_key()
+
+
+class RSAKeyPool:
+    """Pre-generated RSA key pairs, refilled by a background thread.
+
+    ``take`` hands out a pooled pair immediately and wakes the refill thread.
+    The refill thread only waits on a worker process that generates the keys,
+    so generation does not hold the GIL of the serving process. When the pool
+    for a key size is empty, or the pool is not running, the pair is generated
+    synchronously and counted as a miss.
+    """
+
+    def __init__(
+        self, pool_size: int = 4, key_sizes: tuple[int, ...] = (2048,)
+    ) -> None:
+        self.pool_size = pool_size
+        self.key_sizes = key_sizes
+        self.pools: dict[int, queue.Queue] = {}
+        self.refill_needed = threading.Event()
+        self.stopping = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.lock = threading.Lock()
+        self.stats: dict[int, dict[str, float]] = {}
+
+    def init_app(self, app: Flask) -> None:
+        pool_size = app.config["RSA_KEY_POOL_SIZE"]
+        if pool_size <= 0 or app.config["TESTING"] or self.running:
+            return
+        key_sizes = tuple(app.config["RSA_KEY_POOL_SIZES"])
+        if app.config["RSA_KEY_SIZE"] not in key_sizes:
+            key_sizes += (app.config["RSA_KEY_SIZE"],)
+        self.configure(pool_size, key_sizes)
+        self.start()
+
+    def configure(self, pool_size: int, key_sizes: tuple[int, ...]) -> None:
+        self.pool_size = pool_size
+        self.key_sizes = key_sizes
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        for key_size in self.key_sizes:
+            self.pools.setdefault(key_size, queue.Queue())
+        self.stopping.clear()
+        self.executor = self.start_executor()
+        self.refill_needed.set()
+        self.thread = threading.Thread(
+            target=self.refill_loop, name="rsa-key-pool", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopping.set()
+        self.refill_needed.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.thread = None
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+        self.executor = None
+
+    @staticmethod
+    def start_executor() -> Optional[ProcessPoolExecutor]:
+        """Start the generation worker, or return None where fork is unavailable.
+
+        Spawned workers would re-import the main module and build a second
+        app, so the worker is forked, and forked here, before the refill
+        thread exists.
+        """
+        if "fork" not in multiprocessing.get_all_start_methods():
+            return None
+        executor = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("fork")
+        )
+        executor.submit(int).result()
+        return executor
+
+    def refill_loop(self) -> None:
+        while not self.stopping.is_set():
+            self.refill_needed.wait()
+            self.refill_needed.clear()
+            for key_size in self.key_sizes:
+                while (
+                    not self.stopping.is_set()
+                    and self.pools[key_size].qsize() < self.pool_size
+                ):
+                    try:
+                        self.pools[key_size].put(self.generate_in_worker(key_size))
+                    except RuntimeError:
+                        # The executor is shut down at interpreter exit
+                        # before this daemon thread stops
+                        return
+                    except Exception as e:
+                        logging.error(f"RSA key pool generation failed: {str(e)}")
+                        break
+
+    def generate_in_worker(self, key_size: int) -> RSAKeyPair:
+        if self.executor is None:
+            return self.generate(key_size)
+        der, elapsed = self.executor.submit(generate_private_key_der, key_size).result()
+        self.record_generation(key_size, elapsed)
+        return load_key_pair_der(der)
+
+    def generate(self, key_size: int) -> RSAKeyPair:
+        start = time.perf_counter()
+        key_pair = create_rsa_key_pair(key_size)
+        self.record_generation(key_size, time.perf_counter() - start)
+        return key_pair
+
+    def record_generation(self, key_size: int, elapsed: float) -> None:
+        with self.lock:
+            stats = self.stats_for(key_size)
+            stats["generated"] += 1
+            stats["generation_seconds"] += elapsed
+
+    def stats_for(self, key_size: int) -> dict[str, float]:
+        return self.stats.setdefault(
+            key_size,
+            {"generated": 0, "hits": 0, "misses": 0, "generation_seconds": 0.0},
+        )
+
+    def take(self, key_size: int = 2048) -> RSAKeyPair:
+        """Return a key pair, from the pool when one is ready."""
+        pool = self.pools.get(key_size)
+        if pool is not None and self.running:
+            try:
+                key_pair = pool.get_nowait()
+                with self.lock:
+                    self.stats_for(key_size)["hits"] += 1
+                self.refill_needed.set()
+                return key_pair
+            except queue.Empty:
+                self.refill_needed.set()
+        with self.lock:
+            self.stats_for(key_size)["misses"] += 1
+        return self.generate(key_size)
+
+    def metrics(self) -> dict[str, Any]:
+        with self.lock:
+            key_sizes = {}
+            for key_size in sorted(set(self.pools) | set(self.stats)):
+                stats = self.stats_for(key_size)
+                pool = self.pools.get(key_size)
+                key_sizes[str(key_size)] = {
+                    "depth": pool.qsize() if pool is not None else 0,
+                    "generated": int(stats["generated"]),
+                    "hits": int(stats["hits"]),
+                    "misses": int(stats["misses"]),
+                    "average_generation_ms": round(
+                        1000 * stats["generation_seconds"] / stats["generated"], 2
+                    )
+                    if stats["generated"]
+                    else None,
+                }
+            return {
+                "running": self.running,
+                "pool_size": self.pool_size,
+                "key_sizes": key_sizes,
+            }
+
+
+rsa_key_pool = RSAKeyPool()
@@ -1,11 +1,18 @@
 import hashlib
+import itertools
+import logging
+import os
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-import functools
+from sqlalchemy import Table, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import DeclarativeMeta
-from typing import cast
+from typing import Any, Callable, Iterable, cast
 from faker import Faker
 from sqlalchemy.exc import SQLAlchemyError
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema, auto_field
+from .digest_filter import DigestFilter
+from .digest_index import DigestIndex
 
 db = SQLAlchemy()
 BaseModel = cast(DeclarativeMeta, db.Model)
@@ -36,40 +43,272 @@ class MD5HashSchema(SQLAlchemyAutoSchema):
 
 md5_hash_schema = MD5HashSchema()
 
+# Algorithms with reverse lookup. md5 keeps its hex table, index and filter;
+# the others share the digest table, keyed by algorithm and raw digest.
+HASH_ALGORITHMS: dict[str, Callable[[bytes], Any]] = {
+    "md5": hashlib.md5,
+    "sha1": hashlib.sha1,
+    "sha256": hashlib.sha256,
+    "sha512": hashlib.sha512,
+    "blake2b": hashlib.blake2b,
+    "blake2s": hashlib.blake2s,
+}
+DIGEST_ALGORITHMS = tuple(name for name in HASH_ALGORITHMS if name != "md5")
+
+
+class Digest(BaseModel):
+    __tablename__ = "digest"
+    __table_args__ = (db.UniqueConstraint("algorithm", "digest"),)
+    id = db.Column(db.Integer, primary_key=True)
+    algorithm = db.Column(db.String(16), nullable=False)
+    digest = db.Column(db.LargeBinary(64), nullable=False)
+    text = db.Column(db.String(255), nullable=False)
+
+    def __init__(self, algorithm: str, digest: bytes, text: str) -> None:
+        self.algorithm = algorithm
+        self.digest = digest
+        self.text = text
+
+
+BULK_INSERT_BATCH_SIZE = 10_000
+# Lookups try the negative cache, the filter and the index before the table.
+# Only the table is complete: rows inserted by other processes since the index
+# and filter were built are missing from both until they are rebuilt.
+md5_index = DigestIndex()
+md5_filter = DigestFilter()
+
 
 def md5_encode(text: str) -> str:
     hash_object = hashlib.md5(text.encode())
     hash_hex = hash_object.hexdigest()
-    existing_hash = MD5Hash.query.filter_by(md5_hash=hash_hex).first()
-    if not existing_hash:
-        new_hash = MD5Hash(text=text, md5_hash=hash_hex)
-        db.session.add(new_hash)
+    digest = hash_object.digest()
+    refresh_md5_index()
+    if md5_index.get(digest) is not None:
+        return hash_hex
+    try:
+        insert_ignoring_duplicates([{"text": text, "md5_hash": hash_hex}])
         db.session.commit()
-        return md5_hash_schema.dump(new_hash)["md5_hash"]
-    return md5_hash_schema.dump(existing_hash)["md5_hash"]
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        raise e
+    md5_index.add(digest, text)
+    md5_filter.add(digest)
+    return hash_hex
 
 
-@functools.lru_cache(maxsize=128)
 def md5_decode(hash_hex: str) -> str:
+    try:
+        digest = bytes.fromhex(hash_hex)
+    except ValueError:
+        digest = b""
+    passed = False
+    if len(digest) == 16:
+        refresh_md5_index()
+        if md5_filter.known_missing(digest):
+            return "No match found"
+        # A filter miss only skips the index; the table is still checked
+        passed = md5_filter.might_contain(digest)
+        text = md5_index.get(digest) if passed else None
+        if text is not None:
+            return text
     match = MD5Hash.query.filter_by(md5_hash=hash_hex).first()
     if match:
+        if len(digest) == 16 and not passed:
+            md5_filter.record_stale(digest)
         return md5_hash_schema.dump(match)["text"]
+    if len(digest) == 16:
+        md5_filter.record_miss(digest, passed)
     return "No match found"
 
 
-def populate_db(faker: Faker, num_entries: int = 1000) -> None:
-    db.session.autocommit = (
-        False  # Assuming your SQL Alchemy settings allow control over autocommit
+def build_md5_index(path: str) -> int:
+    """Rebuild the index and filter files from MD5Hash and load them."""
+    rows = db.session.execute(
+        db.select(MD5Hash.md5_hash, MD5Hash.text)
+        .order_by(MD5Hash.md5_hash)
+        .execution_options(yield_per=BULK_INSERT_BATCH_SIZE)
     )
+    # Lowercase hex sorts in the same order as the digests it encodes
+    count = DigestIndex.build(path, ((bytes.fromhex(h), text) for h, text in rows))
+    md5_index.load(path)
+    md5_filter.rebuild(md5_index.digests(), len(md5_index))
+    return count
+
+
+def init_md5_index(app: Flask) -> None:
+    """Load the stored index and filter, building them first if needed."""
+    path = app.config["MD5_INDEX_PATH"]
+    if os.path.exists(path) and os.path.exists(md5_filter.path):
+        try:
+            md5_index.load(path)
+            md5_filter.load()
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"Rebuilding unreadable MD5 index: {str(e)}")
+    build_md5_index(path)
+
+
+def refresh_md5_index() -> None:
+    """Load the index and filter again once another process has rebuilt them."""
+    if md5_index.path is None or not md5_filter.changed():
+        return
+    try:
+        md5_index.load(md5_index.path)
+        md5_filter.load()
+    except (OSError, ValueError) as e:
+        logging.warning(f"Keeping the loaded MD5 index: {str(e)}")
+        return
+    # Hashes this process stored after the rebuild read the table
+    for digest in md5_index.recent:
+        md5_filter.add(digest)
+
+
+def hash_texts(texts: list[str], algorithms: Iterable[str]) -> dict[str, list[bytes]]:
+    """Hash every text with every algorithm, encoding each text once."""
+    encoded = [text.encode() for text in texts]
+    return {
+        algorithm: [HASH_ALGORITHMS[algorithm](data).digest() for data in encoded]
+        for algorithm in algorithms
+    }
+
+
+def insert_hash_rows(algorithm: str, texts: list[str], digests: list[bytes]) -> int:
+    if algorithm == "md5":
+        rows = [
+            {"text": text, "md5_hash": digest.hex()}
+            for text, digest in zip(texts, digests)
+        ]
+        return insert_ignoring_duplicates(rows)
+    rows = [
+        {"algorithm": algorithm, "digest": digest, "text": text}
+        for text, digest in zip(texts, digests)
+    ]
+    return insert_ignoring_duplicates(rows, Digest.__table__, ("algorithm", "digest"))
+
+
+def digest_encode_batch(algorithm: str, texts: list[str]) -> list[str]:
+    """Store and return the hashes of texts, for the digest table algorithms."""
+    digests = hash_texts(texts, [algorithm])[algorithm]
+    unique = dict(zip(digests, texts))
     try:
-        for i in range(num_entries):
-            sentence = faker.sentence()
-            md5_encode(sentence)
-            if i % 100 == 0:
-                db.session.flush()  # Flush the changes without committing them
-        db.session.commit()  # Commit at the end of the operation
+        insert_hash_rows(algorithm, list(unique.values()), list(unique))
+        db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         raise e
-    finally:
-        db.session.autocommit = True  # Restore autocommit settings
+    return [digest.hex() for digest in digests]
+
+
+def digest_decode_batch(algorithm: str, hashes: list[str]) -> list[str]:
+    """Look up the texts of hex hashes with one query."""
+    digests = []
+    for hash_hex in hashes:
+        try:
+            digests.append(bytes.fromhex(hash_hex))
+        except ValueError:
+            digests.append(b"")
+    rows = db.session.execute(
+        db.select(Digest.digest, Digest.text).where(
+            Digest.algorithm == algorithm, Digest.digest.in_(set(digests))
+        )
+    )
+    texts = {digest: text for digest, text in rows}
+    return [texts.get(digest, "No match found") for digest in digests]
+
+
+def digest_encode(algorithm: str, text: str) -> str:
+    return digest_encode_batch(algorithm, [text])[0]
+
+
+def digest_decode(algorithm: str, hash_hex: str) -> str:
+    return digest_decode_batch(algorithm, [hash_hex])[0]
+
+
+def insert_ignoring_duplicates(
+    rows: list[dict[str, Any]],
+    table: Table = MD5Hash.__table__,
+    keys: tuple[str, ...] = ("md5_hash",),
+) -> int:
+    """Insert rows in one executemany, skipping rows that would break uniqueness.
+
+    ``keys`` are the columns identifying a row where the database has no
+    ON CONFLICT clause.
+    """
+    if not rows:
+        return 0
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        statement = sqlite.insert(table).on_conflict_do_nothing()
+    elif dialect == "postgresql":
+        statement = postgresql.insert(table).on_conflict_do_nothing()
+    else:
+        # Without ON CONFLICT, drop the rows whose keys are already stored
+        columns = [table.c[key] for key in keys]
+        values = [tuple(row[key] for key in keys) for row in rows]
+        existing = set(
+            db.session.execute(
+                db.select(*columns).where(tuple_(*columns).in_(values))
+            ).tuples()
+        )
+        rows = [row for row, value in zip(rows, values) if value not in existing]
+        if not rows:
+            return 0
+        statement = table.insert()
+    return db.session.execute(statement, rows).rowcount
+
+
+def check_hash_algorithms(algorithms: Iterable[str]) -> tuple[str, ...]:
+    """Drop repeated names, raising ValueError for unknown ones."""
+    algorithms = tuple(dict.fromkeys(algorithms))
+    unknown = [
+        algorithm for algorithm in algorithms if algorithm not in HASH_ALGORITHMS
+    ]
+    if unknown:
+        raise ValueError(f"Unknown hash algorithms: {', '.join(unknown)}")
+    return algorithms
+
+
+def storable_texts(texts: Iterable[str]) -> list[str]:
+    """Deduplicate texts, dropping empty ones and ones too long for the columns."""
+    max_length = MD5Hash.__table__.c.text.type.length
+    return list(
+        dict.fromkeys(text for text in texts if text and len(text) <= max_length)
+    )
+
+
+def ingest_texts(
+    texts: Iterable[str],
+    algorithms: Iterable[str] = ("md5",),
+    batch_size: int = BULK_INSERT_BATCH_SIZE,
+) -> dict[str, int]:
+    """Hash and store texts for several algorithms in one pass.
+
+    Texts are read once and stored in batches, one transaction per batch for
+    all algorithms. Texts are deduplicated within each batch, texts too long
+    for the columns are skipped, and hashes already stored are left alone.
+    Returns the number of rows inserted per algorithm.
+    """
+    algorithms = check_hash_algorithms(algorithms)
+    inserted = dict.fromkeys(algorithms, 0)
+    texts = iter(texts)
+    while batch := list(itertools.islice(texts, batch_size)):
+        batch = storable_texts(batch)
+        try:
+            for algorithm, digests in hash_texts(batch, algorithms).items():
+                inserted[algorithm] += insert_hash_rows(algorithm, batch, digests)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise e
+    return inserted
+
+
+def bulk_insert_hashes(
+    texts: Iterable[str], batch_size: int = BULK_INSERT_BATCH_SIZE
+) -> int:
+    """Hash and store texts in batches, returning the number of rows inserted."""
+    return ingest_texts(texts, ("md5",), batch_size)["md5"]
+
+
+def populate_db(faker: Faker, num_entries: int = 1000) -> int:
+    return bulk_insert_hashes(faker.sentence() for _ in range(num_entries))
@@ -0,0 +1,21 @@
+from flask import Blueprint, jsonify
+from .context_pool import codec_context_pool
+from .key_pool import rsa_key_pool
+from .md5_model import md5_filter
+from .state_store import state_store
+from .log_execution import log_execution
+
+metrics_bp = Blueprint("metrics_bp", __name__)
+
+
+@metrics_bp.route("/api/metrics", methods=["GET"])
+@log_execution
+def metrics() -> tuple[jsonify, int]:
+    return jsonify(
+        {
+            "rsa_key_pool": rsa_key_pool.metrics(),
+            "codec_context_pool": codec_context_pool.metrics(),
+            "state_store": state_store.metrics(),
+            "md5_filter": md5_filter.metrics(),
+        }
+    ), 200
@@ -0,0 +1,530 @@
+import base64
+import binascii
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional
+from flask import current_app
+from .encoder_decoder import (
+    encode_base64,
+    decode_base64,
+    encode_hex,
+    decode_hex,
+    encode_utf8,
+    decode_utf8,
+    encode_latin1,
+    decode_latin1,
+    encode_ascii,
+    decode_ascii,
+    encode_url,
+    decode_url,
+    encode_base64_stream,
+    decode_base64_stream,
+    encode_hex_stream,
+    decode_hex_stream,
+)
+from .encryption_decryption import (
+    ensure_aes_key,
+    aes_encrypt,
+    aes_decrypt,
+    aes_encrypt_bytes,
+    aes_decrypt_bytes,
+    aes_encrypt_stream,
+    aes_decrypt_stream,
+    AES_STREAM_MAX_CHUNK_SIZE,
+    ensure_rsa_public_key,
+    ensure_rsa_private_key,
+    rsa_envelope_encrypt,
+    rsa_envelope_encrypt_batch,
+    rsa_envelope_decrypt,
+)
+from .md5_model import (
+    DIGEST_ALGORITHMS,
+    md5_encode,
+    md5_decode,
+    digest_encode,
+    digest_decode,
+    digest_encode_batch,
+    digest_decode_batch,
+)
+from .compression_decompression import (
+    lz77_compress,
+    lz77_decompress,
+    lzw_compress,
+    lzw_decompress,
+    zstd_compress,
+    zstd_decompress,
+    deflate_compress,
+    deflate_decompress,
+    brotli_compress,
+    brotli_decompress,
+    auto_compress,
+    auto_decompress,
+    auto_compress_bytes,
+    auto_decompress_bytes,
+    zstd_compress_bytes,
+    zstd_decompress_bytes,
+    deflate_compress_bytes,
+    deflate_decompress_bytes,
+    brotli_compress_bytes,
+    brotli_decompress_bytes,
+    zstd_compress_stream,
+    zstd_decompress_stream,
+    deflate_compress_stream,
+    deflate_decompress_stream,
+    brotli_compress_stream,
+    brotli_decompress_stream,
+    COMPRESSION_PROFILES,
+)
+from .huffman import huffman_compress, huffman_decompress
+from .dictionaries import (
+    dictionary_store,
+    huffman_compress_with_dictionary,
+    huffman_decompress_with_dictionary,
+    zstd_compress_with_dictionary,
+    zstd_decompress_with_dictionary,
+)
+
+Operation = Callable[[str], str]
+BytesOperation = Callable[[bytes], bytes]
+StreamOperation = Callable[[Iterable[bytes]], Iterator[bytes]]
+BatchOperation = Callable[[list[str]], list[dict[str, str]]]
+
+
+def key_path(filename: str) -> str:
+    return os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
+
+
+def aes_encrypt_with_stored_key(text: str) -> str:
+    return aes_encrypt(text, ensure_aes_key(key_path("aes_key.pem")))
+
+
+def aes_decrypt_with_stored_key(text: str) -> str:
+    return aes_decrypt(text, ensure_aes_key(key_path("aes_key.pem")))
+
+
+def aes_encrypt_bytes_with_stored_key(data: bytes) -> bytes:
+    return aes_encrypt_bytes(data, ensure_aes_key(key_path("aes_key.pem")))
+
+
+def aes_decrypt_bytes_with_stored_key(data: bytes) -> bytes:
+    return aes_decrypt_bytes(data, ensure_aes_key(key_path("aes_key.pem")))
+
+
+def aes_encrypt_stream_with_stored_key(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    return aes_encrypt_stream(chunks, ensure_aes_key(key_path("aes_key.pem")))
+
+
+def aes_decrypt_stream_with_stored_key(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    # Chunk sizes are read from the stream header, so bound them by the
+    # largest body the server accepts
+    return aes_decrypt_stream(
+        chunks,
+        ensure_aes_key(key_path("aes_key.pem")),
+        current_app.config["MAX_CONTENT_LENGTH"] or AES_STREAM_MAX_CHUNK_SIZE,
+    )
+
+
+def rsa_encrypt_with_stored_key(text: str) -> str:
+    return rsa_envelope_encrypt(
+        text,
+        ensure_rsa_public_key(
+            key_path("rsa_public_key.pem"), current_app.config["RSA_KEY_SIZE"]
+        ),
+    )
+
+
+def rsa_decrypt_with_stored_key(text: str) -> str:
+    return rsa_envelope_decrypt(
+        text,
+        ensure_rsa_private_key(
+            key_path("rsa_private_key.pem"), current_app.config["RSA_KEY_SIZE"]
+        ),
+    )
+
+
+def rsa_encrypt_batch_with_stored_key(texts: list[str]) -> list[dict[str, str]]:
+    public_key = ensure_rsa_public_key(
+        key_path("rsa_public_key.pem"), current_app.config["RSA_KEY_SIZE"]
+    )
+    return [
+        {"result": result} for result in rsa_envelope_encrypt_batch(texts, public_key)
+    ]
+
+
+def rsa_decrypt_batch_with_stored_key(texts: list[str]) -> list[dict[str, str]]:
+    private_key = ensure_rsa_private_key(
+        key_path("rsa_private_key.pem"), current_app.config["RSA_KEY_SIZE"]
+    )
+    # Envelopes from one encrypted batch share a session key, so it is
+    # unwrapped once for all of them
+    session_keys: dict[bytes, bytes] = {}
+    results = []
+    for text in texts:
+        try:
+            results.append(
+                {"result": rsa_envelope_decrypt(text, private_key, session_keys)}
+            )
+        except Exception:
+            results.append({"error": "An error occurred while processing the text"})
+    return results
+
+
+def batch_results(
+    function: Callable[[str, list[str]], list[str]], algorithm: str, texts: list[str]
+) -> list[dict[str, str]]:
+    # Hash batches are stored or looked up with one statement
+    return [{"result": result} for result in function(algorithm, texts)]
+
+
+OPERATIONS: dict[str, dict[str, Operation]] = {
+    "encode": {
+        "base64": encode_base64,
+        "hex": encode_hex,
+        "utf8": encode_utf8,
+        "latin1": encode_latin1,
+        "ascii": encode_ascii,
+        "url": encode_url,
+        "aes": aes_encrypt_with_stored_key,
+        "rsa": rsa_encrypt_with_stored_key,
+        "md5": md5_encode,
+        "huffman": huffman_compress,
+        "lz77": lz77_compress,
+        "lzw": lzw_compress,
+        "zstd": zstd_compress,
+        "deflate": deflate_compress,
+        "brotli": brotli_compress,
+        "auto": auto_compress,
+        **{
+            algorithm: functools.partial(digest_encode, algorithm)
+            for algorithm in DIGEST_ALGORITHMS
+        },
+    },
+    "decode": {
+        "base64": decode_base64,
+        "hex": decode_hex,
+        "utf8": decode_utf8,
+        "latin1": decode_latin1,
+        "ascii": decode_ascii,
+        "url": decode_url,
+        "aes": aes_decrypt_with_stored_key,
+        "rsa": rsa_decrypt_with_stored_key,
+        "md5": md5_decode,
+        "huffman": huffman_decompress,
+        "lz77": lz77_decompress,
+        "lzw": lzw_decompress,
+        "zstd": zstd_decompress,
+        "deflate": deflate_decompress,
+        "brotli": brotli_decompress,
+        "auto": auto_decompress,
+        **{
+            algorithm: functools.partial(digest_decode, algorithm)
+            for algorithm in DIGEST_ALGORITHMS
+        },
+    },
+}
+
+# Dictionary-tagged payloads record their id, so decoding needs no argument
+DICTIONARY_OPERATIONS: dict[str, dict[str, Callable[[str, int], str]]] = {
+    "encode": {
+        "huffman": huffman_compress_with_dictionary,
+        "zstd": zstd_compress_with_dictionary,
+    },
+    "decode": {
+        "huffman": lambda text, _: huffman_decompress_with_dictionary(text),
+        "zstd": lambda text, _: zstd_decompress_with_dictionary(text),
+    },
+}
+
+
+# Binary codecs take and return raw bytes, for clients that skip the base64
+# or hex wrapping of the text operations
+BYTES_OPERATIONS: dict[str, dict[str, BytesOperation]] = {
+    "encode": {
+        "aes": aes_encrypt_bytes_with_stored_key,
+        "zstd": zstd_compress_bytes,
+        "deflate": deflate_compress_bytes,
+        "brotli": brotli_compress_bytes,
+        "auto": auto_compress_bytes,
+    },
+    "decode": {
+        "aes": aes_decrypt_bytes_with_stored_key,
+        "zstd": zstd_decompress_bytes,
+        "deflate": deflate_decompress_bytes,
+        "brotli": brotli_decompress_bytes,
+        "auto": auto_decompress_bytes,
+    },
+}
+
+
+# Streaming codecs work on raw byte chunks instead of base64 text
+STREAM_OPERATIONS: dict[str, dict[str, StreamOperation]] = {
+    "encode": {
+        "aes": aes_encrypt_stream_with_stored_key,
+        "zstd": zstd_compress_stream,
+        "deflate": deflate_compress_stream,
+        "brotli": brotli_compress_stream,
+    },
+    "decode": {
+        "aes": aes_decrypt_stream_with_stored_key,
+        "zstd": zstd_decompress_stream,
+        "deflate": deflate_decompress_stream,
+        "brotli": brotli_decompress_stream,
+    },
+}
+
+
+# Operations that are cheaper per item when a batch's items are handled
+# together; each takes the texts of one group and returns a result per text
+BATCH_OPERATIONS: dict[str, dict[str, BatchOperation]] = {
+    "encode": {
+        "rsa": rsa_encrypt_batch_with_stored_key,
+        **{
+            algorithm: functools.partial(batch_results, digest_encode_batch, algorithm)
+            for algorithm in DIGEST_ALGORITHMS
+        },
+    },
+    "decode": {
+        "rsa": rsa_decrypt_batch_with_stored_key,
+        **{
+            algorithm: functools.partial(batch_results, digest_decode_batch, algorithm)
+            for algorithm in DIGEST_ALGORITHMS
+        },
+    },
+}
+
+
+# Parameters each compressor accepts through ``compression_options``; the
+# streaming compressors take the same ones, except that "auto" has no stream
+COMPRESSION_PARAMETERS: dict[str, set[str]] = {
+    "zstd": {"level", "threads", "window_log", "long_distance_matching"},
+    "deflate": {"level", "strategy"},
+    "brotli": {"quality", "lgwin"},
+    "auto": {"target"},
+}
+
+
+def compression_options(
+    action: str,
+    operation: str,
+    dict_id: Optional[int] = None,
+    params: Optional[dict[str, Any]] = None,
+) -> dict[str, Any]:
+    """Merge request parameters over the configured profile.
+
+    Raises ValueError for parameters the codec does not take or that are over
+    the server limits. Operations without parameters get an empty dict.
+    """
+    params = dict(params or {})
+    if (
+        action != "encode"
+        or dict_id is not None
+        or operation not in COMPRESSION_PARAMETERS
+    ):
+        if params:
+            raise ValueError(
+                "Compression parameters only apply to zstd, deflate, brotli and "
+                "auto encoding without a dictionary"
+            )
+        return {}
+
+    profile = params.pop("profile", current_app.config["COMPRESSION_PROFILE"])
+    unsupported = set(params) - COMPRESSION_PARAMETERS[operation]
+    if unsupported:
+        raise ValueError(
+            f"Unsupported {operation} parameters: {', '.join(sorted(unsupported))}"
+        )
+    options = {**COMPRESSION_PROFILES[profile][operation], **params}
+
+    if operation == "zstd":
+        if options["level"] > current_app.config["COMPRESSION_MAX_ZSTD_LEVEL"]:
+            raise ValueError("zstd level is above the server limit")
+        if options.get("threads", 0) > current_app.config["COMPRESSION_MAX_THREADS"]:
+            raise ValueError("zstd threads are above the server limit")
+    elif operation == "deflate" and not 0 <= options["level"] <= 9:
+        raise ValueError("deflate level must be between 0 and 9")
+    return options
+
+
+def get_operation(
+    action: str,
+    operation: str,
+    dict_id: Optional[int] = None,
+    options: Optional[dict[str, Any]] = None,
+) -> Operation:
+    """Look up an operation, raising KeyError for unknown actions or operations.
+
+    ``options`` are passed to the operation as keyword arguments, see
+    ``compression_options``.
+    """
+    if dict_id is None:
+        operation_func = OPERATIONS[action][operation]
+        if options:
+            return lambda text: operation_func(text, **options)
+        return operation_func
+    dictionary_operation = DICTIONARY_OPERATIONS[action][operation]
+    return lambda text: dictionary_operation(text, dict_id)
+
+
+# Batches smaller than this run inline even when parallel processing is requested
+BATCH_PARALLEL_MIN_ITEMS = 64
+_batch_executors: dict[int, ThreadPoolExecutor] = {}
+_batch_executors_lock = threading.Lock()
+
+
+def get_batch_executor(workers: int) -> ThreadPoolExecutor:
+    """Return the shared executor for a worker count, creating it on first use."""
+    with _batch_executors_lock:
+        executor = _batch_executors.get(workers)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="batch"
+            )
+            _batch_executors[workers] = executor
+        return executor
+
+
+# Text encodings usable as pipeline stages, as (encode, decode) byte functions
+PIPELINE_ENCODINGS: dict[str, tuple[BytesOperation, BytesOperation]] = {
+    "base64": (base64.b64encode, functools.partial(base64.b64decode, validate=True)),
+    "hex": (binascii.hexlify, binascii.unhexlify),
+}
+
+
+def get_pipeline(action: str, stages: list[str]) -> list[BytesOperation]:
+    """Resolve pipeline stages, raising KeyError for unknown actions or stages.
+
+    Encoding applies the stages in order; decoding applies their inverses in
+    reverse order, so the same stage list describes both directions.
+    """
+    if action == "decode":
+        stages = stages[::-1]
+    pipeline = []
+    for stage in stages:
+        if stage in PIPELINE_ENCODINGS:
+            pipeline.append(PIPELINE_ENCODINGS[stage][action == "decode"])
+            continue
+        bytes_func = BYTES_OPERATIONS[action][stage]
+        options = compression_options(action, stage)
+        pipeline.append(functools.partial(bytes_func, **options))
+    return pipeline
+
+
+def run_pipeline(data: bytes, pipeline: list[BytesOperation]) -> bytes:
+    for bytes_func in pipeline:
+        data = bytes_func(data)
+    return data
+
+
+# Streaming forms of the pipeline encodings, as (encode, decode) functions
+PIPELINE_STREAM_ENCODINGS: dict[str, tuple[StreamOperation, StreamOperation]] = {
+    "base64": (encode_base64_stream, decode_base64_stream),
+    "hex": (encode_hex_stream, decode_hex_stream),
+}
+
+
+def get_stream_pipeline(action: str, stages: list[str]) -> StreamOperation:
+    """Compose streaming stages like ``get_pipeline`` composes byte stages."""
+    if action == "decode":
+        stages = stages[::-1]
+    stream_funcs = []
+    for stage in stages:
+        if stage in PIPELINE_STREAM_ENCODINGS:
+            stream_funcs.append(PIPELINE_STREAM_ENCODINGS[stage][action == "decode"])
+            continue
+        stream_func = STREAM_OPERATIONS[action][stage]
+        options = compression_options(action, stage)
+        stream_funcs.append(functools.partial(stream_func, **options))
+
+    def stream_pipeline(chunks: Iterable[bytes]) -> Iterator[bytes]:
+        for stream_func in stream_funcs:
+            chunks = stream_func(chunks)
+        return chunks
+
+    return stream_pipeline
+
+
+def process_item(item: dict[str, Any]) -> dict[str, str]:
+    """Run one batch item, reporting failures in the result instead of raising."""
+    dict_id = item.get("dict_id")
+    if dict_id is not None and dict_id not in dictionary_store:
+        return {"error": "Unknown dictionary id"}
+    try:
+        options = compression_options(
+            item["action"], item["operation"], dict_id, item.get("params")
+        )
+        operation_func = get_operation(
+            item["action"], item["operation"], dict_id, options
+        )
+    except KeyError:
+        return {"error": "Invalid operation or action provided"}
+    except ValueError as e:
+        return {"error": str(e)}
+    try:
+        return {"result": operation_func(item["text"])}
+    except Exception:
+        return {"error": "An error occurred while processing the text"}
+
+
+def run_items(
+    items: list[dict[str, Any]], parallel: bool = False
+) -> list[dict[str, str]]:
+    """Process items one by one, optionally fanning chunks out to worker threads."""
+    if not parallel or len(items) < BATCH_PARALLEL_MIN_ITEMS:
+        return [process_item(item) for item in items]
+
+    app = current_app._get_current_object()
+    workers = app.config["BATCH_WORKERS"]
+    chunk_size = -(-len(items) // workers)
+
+    def run_chunk(chunk: list[dict[str, Any]]) -> list[dict[str, str]]:
+        with app.app_context():
+            return [process_item(item) for item in chunk]
+
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+    return [
+        result
+        for chunk_results in get_batch_executor(workers).map(run_chunk, chunks)
+        for result in chunk_results
+    ]
+
+
+def run_batch(
+    items: list[dict[str, Any]], parallel: bool = False
+) -> list[dict[str, str]]:
+    """Process batch items in order.
+
+    Items with a ``BATCH_OPERATIONS`` entry are grouped by action and
+    operation and handled together; the rest go through ``run_items``. A
+    group whose call raises is run again item by item, so only the items
+    that fail report an error.
+    """
+    results: list[Optional[dict[str, str]]] = [None] * len(items)
+    groups: dict[tuple[str, str], list[int]] = {}
+    single: list[int] = []
+    for index, item in enumerate(items):
+        action, operation = item["action"], item["operation"]
+        if (
+            item.get("dict_id") is None
+            and not item.get("params")
+            and operation in BATCH_OPERATIONS.get(action, {})
+        ):
+            groups.setdefault((action, operation), []).append(index)
+        else:
+            single.append(index)
+
+    for (action, operation), indexes in groups.items():
+        try:
+            group_results = BATCH_OPERATIONS[action][operation](
+                [items[index]["text"] for index in indexes]
+            )
+        except Exception:
+            group_results = run_items([items[index] for index in indexes], parallel)
+        for index, result in zip(indexes, group_results):
+            results[index] = result
+
+    single_results = run_items([items[index] for index in single], parallel)
+    for index, result in zip(single, single_results):
+        results[index] = result
+    return results
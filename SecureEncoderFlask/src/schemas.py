@@ -1,35 +1,97 @@
-from marshmallow import Schema, fields, validate
+from marshmallow import Schema, fields, validate, validates_schema, ValidationError
+from .compression_decompression import (
+    AUTO_CANDIDATES,
+    COMPRESSION_PROFILES,
+    DEFLATE_STRATEGIES,
+)
+
+OPERATION_NAMES = [
+    "base64",
+    "hex",
+    "utf8",
+    "latin1",
+    "ascii",
+    "url",
+    "aes",
+    "rsa",
+    "md5",
+    "sha1",
+    "sha256",
+    "sha512",
+    "blake2b",
+    "blake2s",
+    "huffman",
+    "lz77",
+    "lzw",
+    "zstd",
+    "deflate",
+    "brotli",
+    "auto",
+]
+ACTION_NAMES = ["encode", "decode"]
+PIPELINE_STAGE_NAMES = ["base64", "hex", "aes", "zstd", "deflate", "brotli", "auto"]
+PIPELINE_MAX_STAGES = 8
 
 
 class SaveTextSchema(Schema):
     new_text = fields.String(required=True)
 
 
+class CompressionParamsSchema(Schema):
+    """Compression parameters; which apply depends on the codec."""
+
+    profile = fields.String(validate=validate.OneOf(list(COMPRESSION_PROFILES)))
+    # zstd levels go up to 22, zlib levels up to 9
+    level = fields.Integer(validate=validate.Range(min=-7, max=22))
+    threads = fields.Integer(validate=validate.Range(min=0))
+    window_log = fields.Integer(validate=validate.Range(min=10, max=27))
+    long_distance_matching = fields.Boolean()
+    strategy = fields.String(validate=validate.OneOf(list(DEFLATE_STRATEGIES)))
+    quality = fields.Integer(validate=validate.Range(min=0, max=11))
+    lgwin = fields.Integer(validate=validate.Range(min=10, max=24))
+    target = fields.String(validate=validate.OneOf(list(AUTO_CANDIDATES)))
+
+
 class ProcessTextSchema(Schema):
     text = fields.String(required=True, validate=validate.Length(min=1))
+    operation = fields.String(required=True, validate=validate.OneOf(OPERATION_NAMES))
+    action = fields.String(required=True, validate=validate.OneOf(ACTION_NAMES))
+    dict_id = fields.Integer(load_default=None, validate=validate.Range(min=1))
+    params = fields.Nested(CompressionParamsSchema, load_default=None)
+
+
+class ProcessBatchSchema(Schema):
+    """Either a list of items, or one operation applied to a list of texts."""
+
+    items = fields.List(fields.Nested(ProcessTextSchema), load_default=None)
+    texts = fields.List(
+        fields.String(validate=validate.Length(min=1)), load_default=None
+    )
     operation = fields.String(
+        load_default=None, validate=validate.OneOf(OPERATION_NAMES)
+    )
+    action = fields.String(load_default=None, validate=validate.OneOf(ACTION_NAMES))
+    dict_id = fields.Integer(load_default=None, validate=validate.Range(min=1))
+    parallel = fields.Boolean(load_default=False)
+
+    @validates_schema
+    def validate_batch(self, data: dict, **kwargs) -> None:
+        if (data["items"] is None) == (data["texts"] is None):
+            raise ValidationError("Provide exactly one of items or texts")
+        if data["texts"] is not None and (
+            data["operation"] is None or data["action"] is None
+        ):
+            raise ValidationError("operation and action are required with texts")
+
+
+class ProcessPipelineSchema(Schema):
+    text = fields.String(required=True, validate=validate.Length(min=1))
+    stages = fields.List(
+        fields.String(validate=validate.OneOf(PIPELINE_STAGE_NAMES)),
         required=True,
-        validate=validate.OneOf(
-            [
-                "base64",
-                "hex",
-                "utf8",
-                "latin1",
-                "ascii",
-                "url",
-                "aes",
-                "rsa",
-                "md5",
-                "huffman",
-                "lz77",
-                "lzw",
-                "zstd",
-                "deflate",
-                "brotli",
-            ]
-        ),
+        validate=validate.Length(min=1, max=PIPELINE_MAX_STAGES),
     )
-    action = fields.String(required=True, validate=validate.OneOf(["encode", "decode"]))
+    action = fields.String(required=True, validate=validate.OneOf(ACTION_NAMES))
 
 
 class UploadKeySchema(Schema):
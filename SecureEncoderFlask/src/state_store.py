@@ -0,0 +1,81 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from flask import Flask, session
+
+# (last use, values, size of the values)
+StateEntry = tuple[float, dict[str, str], int]
+
+
+class StateStore:
+    """Per-client text state kept on the server instead of in cookies.
+
+    The signed session cookie only carries a random state id. Entries expire
+    after ``ttl`` seconds without use, and the least recently used ones are
+    evicted once the stored values exceed ``max_size`` characters. A client
+    whose state alone is over the cap is not stored at all.
+    """
+
+    def __init__(self, max_size: int = 64 * 1024 * 1024, ttl: float = 3600) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        # Keyed by state id, least recently used first
+        self.entries: OrderedDict[str, StateEntry] = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        self.max_size = app.config["STATE_STORE_MAX_SIZE"]
+        self.ttl = app.config["STATE_STORE_TTL"]
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        state_id = session.get("state_id")
+        if state_id is None:
+            return default
+        with self.lock:
+            self.evict(time.monotonic())
+            entry = self.entries.get(state_id)
+            if entry is None:
+                return default
+            self.entries[state_id] = (time.monotonic(), entry[1], entry[2])
+            self.entries.move_to_end(state_id)
+            return entry[1].get(key, default)
+
+    def update(self, **values: str) -> None:
+        state_id = session.get("state_id")
+        if state_id is None:
+            state_id = session["state_id"] = secrets.token_urlsafe(16)
+        with self.lock:
+            entry = self.entries.pop(state_id, None)
+            state = dict(entry[1]) if entry else {}
+            if entry:
+                self.size -= entry[2]
+            state.update(values)
+            size = sum(len(value) for value in state.values())
+            if size <= self.max_size:
+                self.entries[state_id] = (time.monotonic(), state, size)
+                self.size += size
+            self.evict(time.monotonic())
+
+    def evict(self, now: float) -> None:
+        # Entries are kept in order of last use, so expired ones come first
+        while self.entries:
+            state_id, (last_use, _, size) = next(iter(self.entries.items()))
+            if now - last_use <= self.ttl and self.size <= self.max_size:
+                break
+            del self.entries[state_id]
+            self.size -= size
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def metrics(self) -> dict[str, Any]:
+        with self.lock:
+            return {"sessions": len(self.entries), "size": self.size}
+
+
+state_store = StateStore()
@@ -0,0 +1,119 @@
+import itertools
+from typing import Iterator
+from flask import (
+    Blueprint,
+    Response,
+    request,
+    jsonify,
+    stream_with_context,
+)
+from marshmallow import ValidationError
+from .operations import (
+    BYTES_OPERATIONS,
+    STREAM_OPERATIONS,
+    compression_options,
+    get_stream_pipeline,
+)
+from .schemas import CompressionParamsSchema, PIPELINE_MAX_STAGES
+from .log_execution import log_execution
+
+stream_bp = Blueprint("stream_bp", __name__)
+
+STREAM_READ_SIZE = 64 * 1024
+
+
+def read_request_stream() -> Iterator[bytes]:
+    """Yield the raw request body in fixed-size reads."""
+    return iter(lambda: request.stream.read(STREAM_READ_SIZE), b"")
+
+
+def start_stream(stream: Iterator[bytes]) -> Iterator[bytes]:
+    """Produce the first chunk now, so input that fails at once can still get a 400."""
+    first = next(stream, b"")
+    return itertools.chain((first,), stream)
+
+
+@stream_bp.route("/api/bytes/<string:operation>/<string:action>", methods=["POST"])
+@log_execution
+def process_bytes(operation: str, action: str) -> Response:
+    """Apply an operation to the raw request body and return raw bytes."""
+    try:
+        bytes_func = BYTES_OPERATIONS[action][operation]
+    except KeyError:
+        return jsonify({"error": "Invalid operation or action provided"}), 400
+    # Compressors use the server's default compression profile
+    options = compression_options(action, operation)
+    try:
+        result = bytes_func(request.get_data(), **options)
+    except Exception:
+        return jsonify({"error": "An error occurred while processing the data"}), 400
+    return Response(result, mimetype="application/octet-stream")
+
+
+@stream_bp.route("/api/stream/aes/<string:action>", methods=["POST"])
+@log_execution
+def stream_aes(action: str) -> Response:
+    """Encrypt or decrypt the raw request body as an AES-GCM stream.
+
+    The header and first chunk are checked before the response starts, so a
+    short, tampered or wrong-key body gets a 400. Later chunks can only fail
+    by ending the body early, and clients must treat a truncated body as a
+    failed decryption.
+    """
+    if action not in ("encode", "decode"):
+        return jsonify({"error": "Invalid action provided"}), 400
+    stream = STREAM_OPERATIONS[action]["aes"](read_request_stream())
+    try:
+        stream = start_stream(stream)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return Response(stream_with_context(stream), mimetype="application/octet-stream")
+
+
+@stream_bp.route("/api/stream/<string:operation>/<string:action>", methods=["POST"])
+@log_execution
+def stream_compression(operation: str, action: str) -> Response:
+    """Compress or decompress the raw request body as a stream.
+
+    Compression parameters, e.g. ``?profile=fast`` or ``?level=19``, come
+    from the query string and are merged over the configured profile.
+    """
+    try:
+        stream_func = STREAM_OPERATIONS[action][operation]
+    except KeyError:
+        return jsonify({"error": "Invalid operation or action provided"}), 400
+    try:
+        params = CompressionParamsSchema().load(request.args)
+    except ValidationError as err:
+        return jsonify(err.messages), 400
+    try:
+        options = compression_options(action, operation, params=params)
+        stream = start_stream(stream_func(read_request_stream(), **options))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # Errors after the first chunk can only abort the response, so clients
+    # must treat a body that ends early as a failure
+    return Response(stream_with_context(stream), mimetype="application/octet-stream")
+
+
+@stream_bp.route("/api/stream/pipeline/<string:action>", methods=["POST"])
+@log_execution
+def stream_pipeline(action: str) -> Response:
+    """Stream the request body through comma-separated ``stages``, e.g. zstd,aes.
+
+    Every stage but auto streams (base64, hex, aes, zstd, deflate, brotli);
+    decoding takes the same stage list and undoes it in reverse order.
+    Compressors use the server's default compression profile.
+    """
+    stages = request.args.get("stages", "").split(",")
+    if not 0 < len(stages) <= PIPELINE_MAX_STAGES:
+        return jsonify({"error": "Invalid pipeline stages provided"}), 400
+    try:
+        stream_func = get_stream_pipeline(action, stages)
+    except KeyError:
+        return jsonify({"error": "Invalid pipeline stages or action provided"}), 400
+    try:
+        stream = start_stream(stream_func(read_request_stream()))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return Response(stream_with_context(stream), mimetype="application/octet-stream")
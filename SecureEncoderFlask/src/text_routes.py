@@ -1,50 +1,36 @@
-import os
-from flask import Blueprint, request, jsonify, session, current_app
+from flask import Blueprint, Response, request, jsonify, current_app
 from marshmallow import ValidationError
-from .schemas import SaveTextSchema, ProcessTextSchema
-
-from .encoder_decoder import (
-    encode_base64,
-    decode_base64,
-    encode_hex,
-    decode_hex,
-    encode_utf8,
-    decode_utf8,
-    encode_latin1,
-    decode_latin1,
-    encode_ascii,
-    decode_ascii,
-    encode_url,
-    decode_url,
+from .schemas import (
+    SaveTextSchema,
+    ProcessTextSchema,
+    ProcessBatchSchema,
+    ProcessPipelineSchema,
 )
-from .encryption_decryption import (
-    ensure_aes_key,
-    aes_encrypt,
-    aes_decrypt,
-    ensure_rsa_public_key,
-    ensure_rsa_private_key,
-    rsa_encrypt,
-    rsa_decrypt,
-)
-from .md5_model import md5_encode, md5_decode
-from .compression_decompression import (
-    lz77_compress,
-    lz77_decompress,
-    lzw_compress,
-    lzw_decompress,
-    zstd_compress,
-    zstd_decompress,
-    deflate_compress,
-    deflate_decompress,
-    brotli_compress,
-    brotli_decompress,
+
+from .dictionaries import dictionary_store
+from .state_store import state_store
+from .operations import (
+    BYTES_OPERATIONS,
+    PIPELINE_ENCODINGS,
+    compression_options,
+    get_operation,
+    get_pipeline,
+    run_batch,
+    run_pipeline,
 )
-from .huffman import huffman_compress, huffman_decompress
 from .log_execution import log_execution
 
 text_bp = Blueprint("text_bp", __name__)
 
 
+def wants_bytes() -> bool:
+    """Whether the client prefers a raw application/octet-stream response."""
+    best = request.accept_mimetypes.best_match(
+        ["application/json", "application/octet-stream"]
+    )
+    return best == "application/octet-stream"
+
+
 @text_bp.route("/api/save_text", methods=["PATCH"])
 @log_execution
 def save_text() -> tuple[jsonify, int]:
@@ -53,14 +39,14 @@ def save_text() -> tuple[jsonify, int]:
     except ValidationError as err:
         return jsonify(err.messages), 400
 
-    current_text = session.get("text", None)
+    current_text = state_store.get("text")
     new_text = data.get("new_text", None)
     force_update = request.args.get("force_update", "false") == "true"
 
     if current_text is None and new_text is None:
         return jsonify({"message": "No text provided"}), 204
     elif current_text is None and new_text is not None:
-        session["text"] = new_text
+        state_store.update(text=new_text)
         return jsonify({"message": "Text created successfully", "text": new_text}), 201
     elif current_text is not None and new_text is None:
         return jsonify(
@@ -70,7 +56,7 @@ def save_text() -> tuple[jsonify, int]:
             }
         ), 304
     elif force_update:
-        session["text"] = new_text
+        state_store.update(text=new_text)
         return jsonify(
             {"message": "Text updated successfully", "new_text": new_text}
         ), 200
@@ -88,76 +74,94 @@ def process_text() -> jsonify:
     except ValidationError as err:
         return jsonify(err.messages), 400
 
-    session["text"] = data["text"]
-    session["operation"] = data["operation"]
-    session["action"] = data["action"]
-
-    operations = {
-        "encode": {
-            "base64": encode_base64,
-            "hex": encode_hex,
-            "utf8": encode_utf8,
-            "latin1": encode_latin1,
-            "ascii": encode_ascii,
-            "url": encode_url,
-            "aes": lambda x: aes_encrypt(
-                x,
-                ensure_aes_key(
-                    os.path.join(current_app.config["UPLOAD_FOLDER"], "aes_key.pem")
-                ),
-            ),
-            "rsa": lambda x: rsa_encrypt(
-                x,
-                ensure_rsa_public_key(
-                    os.path.join(
-                        current_app.config["UPLOAD_FOLDER"], "rsa_public_key.pem"
-                    )
-                ),
-            ),
-            "md5": md5_encode,
-            "huffman": huffman_compress,
-            "lz77": lz77_compress,
-            "lzw": lzw_compress,
-            "zstd": zstd_compress,
-            "deflate": deflate_compress,
-            "brotli": brotli_compress,
-        },
-        "decode": {
-            "base64": decode_base64,
-            "hex": decode_hex,
-            "utf8": decode_utf8,
-            "latin1": decode_latin1,
-            "ascii": decode_ascii,
-            "url": decode_url,
-            "aes": lambda x: aes_decrypt(
-                x,
-                ensure_aes_key(
-                    os.path.join(current_app.config["UPLOAD_FOLDER"], "aes_key.pem")
-                ),
-            ),
-            "rsa": lambda x: rsa_decrypt(
-                x,
-                ensure_rsa_private_key(
-                    os.path.join(
-                        current_app.config["UPLOAD_FOLDER"], "rsa_private_key.pem"
-                    )
-                ),
-            ),
-            "md5": md5_decode,
-            "huffman": huffman_decompress,
-            "lz77": lz77_decompress,
-            "lzw": lzw_decompress,
-            "zstd": zstd_decompress,
-            "deflate": deflate_decompress,
-            "brotli": brotli_decompress,
-        },
-    }
+    state_store.update(
+        text=data["text"], operation=data["operation"], action=data["action"]
+    )
+
+    dict_id = data["dict_id"]
+    if dict_id is not None and dict_id not in dictionary_store:
+        return jsonify({"error": "Unknown dictionary id"}), 400
 
     try:
-        operation_func = operations[session["action"]][session["operation"]]
-        result = operation_func(session["text"])
-        return jsonify({"result": result}), 200
+        options = compression_options(
+            data["action"], data["operation"], dict_id, data["params"]
+        )
+        operation_func = get_operation(
+            data["action"], data["operation"], dict_id, options
+        )
     except KeyError:
         return jsonify({"error": "Invalid operation or action provided"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        if not wants_bytes():
+            return jsonify({"result": operation_func(data["text"])}), 200
+        # Encoders with a binary form skip the base64 or hex wrapping; other
+        # results are sent as UTF-8
+        bytes_func = BYTES_OPERATIONS["encode"].get(data["operation"])
+        if data["action"] == "encode" and dict_id is None and bytes_func:
+            result = bytes_func(data["text"].encode(), **options)
+        else:
+            result = operation_func(data["text"]).encode()
+        return Response(result, mimetype="application/octet-stream"), 200
+    except Exception:
+        return jsonify({"error": "An error occurred while processing the text"}), 500
+
+
+@text_bp.route("/api/process_batch", methods=["POST"])
+@log_execution
+def process_batch() -> tuple[jsonify, int]:
+    try:
+        data = ProcessBatchSchema().load(request.get_json())
+    except ValidationError as err:
+        return jsonify(err.messages), 400
+
+    items = data["items"]
+    if items is None:
+        items = [
+            {
+                "text": text,
+                "operation": data["operation"],
+                "action": data["action"],
+                "dict_id": data["dict_id"],
+            }
+            for text in data["texts"]
+        ]
+    max_items = current_app.config["BATCH_MAX_ITEMS"]
+    if len(items) > max_items:
+        return jsonify({"error": f"Batches are limited to {max_items} items"}), 400
+
+    return jsonify({"results": run_batch(items, data["parallel"])}), 200
+
+
+@text_bp.route("/api/process_pipeline", methods=["POST"])
+@log_execution
+def process_pipeline() -> tuple[jsonify, int]:
+    """Run several operations over bytes in one request, e.g. zstd, aes, base64.
+
+    Decoding takes the same stage list and undoes it in reverse order.
+    """
+    try:
+        data = ProcessPipelineSchema().load(request.get_json())
+    except ValidationError as err:
+        return jsonify(err.messages), 400
+
+    raw = wants_bytes()
+    if (
+        data["action"] == "encode"
+        and not raw
+        and data["stages"][-1] not in PIPELINE_ENCODINGS
+    ):
+        return jsonify(
+            {"error": "JSON results need a final base64 or hex stage"}
+        ), 400
+
+    try:
+        pipeline = get_pipeline(data["action"], data["stages"])
+        result = run_pipeline(data["text"].encode(), pipeline)
+        if raw:
+            return Response(result, mimetype="application/octet-stream"), 200
+        return jsonify({"result": result.decode()}), 200
     except Exception:
         return jsonify({"error": "An error occurred while processing the text"}), 500
@@ -0,0 +1,25 @@
+def encode_number(n: int) -> list:
+    """Encode a number using a simpler variable-length encoding.
+
+    The most significant 7-bit group comes first and every group except the
+    last has its high bit set, which is the order ``lz77_decompress`` reads.
+    """
+    encoded: list = [n & 0x7F]
+    n >>= 7
+    while n:
+        encoded.insert(0, (n & 0x7F) | 0x80)
+        n >>= 7
+    return encoded
+
+
+def decode_number(data: bytes, index: int) -> tuple[int, int]:
+    """Decode a number written by ``encode_number`` and return it with the next index."""
+    number = 0
+    try:
+        while data[index] > 127:
+            number = (number << 7) | (data[index] & 0x7F)
+            index += 1
+        number = (number << 7) | data[index]
+    except IndexError:
+        raise ValueError("Truncated variable-length number")
+    return number, index + 1
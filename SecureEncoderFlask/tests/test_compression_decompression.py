@@ -1,5 +1,11 @@
+import base64
+import os
+import tracemalloc
 import pytest
 from src.compression_decompression import (
+    encode_number,
+    LZ77_MAGIC,
+    LZ77_FLAG_ENTROPY,
     lz77_compress,
     lz77_decompress,
     lzw_compress,
@@ -10,10 +16,33 @@ from src.compression_decompression import (
     deflate_decompress,
     brotli_compress,
     brotli_decompress,
+    AUTO_STORED,
+    auto_compress,
+    auto_decompress,
+    auto_compress_bytes,
+    auto_decompress_bytes,
+    zstd_compress_bytes,
+    zstd_decompress_bytes,
+    deflate_compress_bytes,
+    deflate_decompress_bytes,
+    brotli_compress_bytes,
+    brotli_decompress_bytes,
+    zstd_compress_stream,
+    zstd_decompress_stream,
+    deflate_compress_stream,
+    deflate_decompress_stream,
+    brotli_compress_stream,
+    brotli_decompress_stream,
+    STREAM_OUTPUT_SIZE,
 )
 
 TEST_TEXT = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed non risus. Suspendisse lectus tortor, dignissim sit amet, adipiscing nec, ultricies sed, dolor. Cras elementum ultrices diam. Maecenas ligula massa, varius a, semper congue, euismod non, mi. Proin porttitor, orci nec nonummy molestie, enim est eleifend mi, non fermentum diam nisl sit amet erat. Duis semper. Duis arcu massa, scelerisque vitae, consequat in, pretium a, enim. Pellentesque congue. Ut in risus volutpat libero pharetra tempor. Cras vestibulum bibendum augue. Praesent egestas leo in pede. Praesent blandit odio eu enim. Pellentesque sed dui ut augue blandit sodales. Vestibulum ante ipsum primis in faucibus orci luctus et ultrices posuere cubilia Curae; Aliquam nibh. Mauris ac mauris sed pede pellentesque fermentum. Maecenas adipiscing ante non diam sodales hendrerit."
 SPECIAL_TEST_TEXT = "~!#$%^&*()_+"
+STREAM_CODECS = [
+    (zstd_compress_stream, zstd_decompress_stream),
+    (deflate_compress_stream, deflate_decompress_stream),
+    (brotli_compress_stream, brotli_decompress_stream),
+]
 
 
 def test_lz77_compression_cycle() -> None:
@@ -23,6 +52,122 @@ def test_lz77_compression_cycle() -> None:
     assert decompressed == TEST_TEXT, "LZ77 decompression does not match the original"
 
 
+@pytest.mark.parametrize("window_size", [100, 32 * 1024, 1024 * 1024])
+def test_lz77_large_window_cycle(window_size: int) -> None:
+    """Test LZ77 round trips with windows large enough for multi-byte offsets."""
+    text = TEST_TEXT * 40 + "a" * 500 + SPECIAL_TEST_TEXT
+    compressed = lz77_compress(text, window_size=window_size)
+    assert (
+        lz77_decompress(compressed) == text
+    ), f"LZ77 decompression failed with window size {window_size}"
+
+
+def test_lz77_lazy_matching_cycle() -> None:
+    """Test that disabling lazy matching still produces decodable output."""
+    text = "abcabcdabcde" * 50 + "\xff" * 20
+    for lazy_matching in (True, False):
+        compressed = lz77_compress(text, window_size=4096, lazy_matching=lazy_matching)
+        assert lz77_decompress(compressed) == text
+
+
+def test_lz77_long_overlapping_run() -> None:
+    """Test that long run-length matches decode through overlapping copies."""
+    text = "ab" + "x" * 100_000 + "ab"
+    compressed = lz77_compress(text, window_size=1024 * 1024)
+    assert len(compressed) < 100
+    assert lz77_decompress(compressed) == text
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        # A single-byte literal repeated 2 ** 40 times
+        LZ77_MAGIC + bytes([1, 0, 1, 65, *encode_number(1 << 40), 1, 0]),
+        bytes([65, 255, 1, *encode_number(1 << 40)]),
+        # Matches that each double the output
+        LZ77_MAGIC
+        + bytes([1, 0, 1, 65])
+        + b"".join(bytes([0, *encode_number(1 << i) * 2]) for i in range(40))
+        + b"\x00\x00",
+    ],
+)
+def test_lz77_rejects_decompression_bombs(payload: bytes) -> None:
+    """Test that matches cannot expand the output past the size limit."""
+    with pytest.raises(ValueError):
+        lz77_decompress(base64.b64encode(payload).decode())
+
+
+def test_lz77_max_output() -> None:
+    compressed = lz77_compress("x" * 10_000)
+    assert lz77_decompress(compressed, max_output=10_000) == "x" * 10_000
+    with pytest.raises(ValueError):
+        lz77_decompress(compressed, max_output=9_999)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        bytes([65, 255, 5, 3]),  # offset beyond the output so far
+        bytes([65, 255, 1, 0]),  # zero-length match
+        bytes([65, 255, 0x81]),  # truncated offset
+        bytes([65, 255, 1]),  # missing length
+        LZ77_MAGIC + bytes([2, 0, 0, 0]),  # unknown format version
+        LZ77_MAGIC + bytes([1, 0, 5, 65, 0]),  # literal run past the end
+        LZ77_MAGIC + bytes([1, 0, 1, 65, 3, 2]),  # offset beyond the output so far
+        LZ77_MAGIC + bytes([1, 0, 1, 65, 0, 66]),  # data after the end marker
+        LZ77_MAGIC + bytes([1, 0, 1, 65]),  # missing end marker
+    ],
+)
+def test_lz77_rejects_corrupted_input(payload: bytes) -> None:
+    """Test that corrupted LZ77 data raises a ValueError."""
+    with pytest.raises(ValueError):
+        lz77_decompress(base64.b64encode(payload).decode())
+
+
+@pytest.mark.parametrize(
+    "text", ["日本語のテキスト" * 20, "Ελληνικά κείμενα " * 20, "emoji 😀🎉 " * 30]
+)
+def test_lz77_unicode_cycle(text: str) -> None:
+    """Test that LZ77 round trips text outside Latin-1."""
+    compressed = lz77_compress(text)
+    assert base64.b64decode(compressed).startswith(LZ77_MAGIC)
+    assert lz77_decompress(compressed) == text
+
+
+def test_lz77_entropy_coding_cycle() -> None:
+    """Test that the entropy stage is used when smaller and still round trips."""
+    text = TEST_TEXT * 3 + "ünïcödé" * 10
+    # A small window leaves enough literals for the entropy stage to pay off
+    plain = lz77_compress(text, window_size=100)
+    coded = lz77_compress(text, window_size=100, entropy_coding=True)
+    assert base64.b64decode(coded)[len(LZ77_MAGIC) + 1] & LZ77_FLAG_ENTROPY
+    assert len(coded) < len(plain)
+    assert lz77_decompress(coded) == text
+
+
+def test_lz77_legacy_payload() -> None:
+    """Test that payloads in the legacy flag-byte format still decompress."""
+    legacy = bytes([97, 98, 99, 255, 3, 6, 255, 255])  # "abc" + match + escaped 255
+    assert lz77_decompress(base64.b64encode(legacy).decode()) == "abcabcabc\xff"
+
+
+def test_lz77_default_window_and_long_matches() -> None:
+    """Test that the default window reaches far back and matches outgrow it."""
+    text = TEST_TEXT + "q" * 5000 + TEST_TEXT
+    compressed = base64.b64decode(lz77_compress(text))
+    assert len(compressed) < len(TEST_TEXT) + 100
+    short_window = base64.b64decode(lz77_compress(text, window_size=100))
+    assert len(compressed) < len(short_window)
+    assert lz77_decompress(lz77_compress(text, max_match_length=50)) == text
+
+
+def test_encode_number_order() -> None:
+    """Test that continuation bytes precede the terminating byte."""
+    assert encode_number(100) == [100]
+    assert encode_number(200) == [0x81, 0x48]
+    assert encode_number(1 << 20) == [0xC0, 0x80, 0x00]
+
+
 def test_lzw_compression_cycle() -> None:
     """Test LZW compression and decompression."""
     compressed = lzw_compress(TEST_TEXT)
@@ -30,6 +175,35 @@ def test_lzw_compression_cycle() -> None:
     assert decompressed == TEST_TEXT, "LZW decompression does not match the original"
 
 
+@pytest.mark.parametrize("max_bits", [9, 12, 16])
+def test_lzw_dictionary_reset_cycle(max_bits: int) -> None:
+    """Test LZW round trips across code widening and dictionary resets."""
+    text = (TEST_TEXT + "ünïcødé ✓ 日本語 ") * 30
+    compressed = lzw_compress(text, max_bits=max_bits)
+    assert lzw_decompress(compressed) == text
+
+
+def test_lzw_variable_width_is_smaller() -> None:
+    """Test that codes are packed below the old fixed two-byte width."""
+    text = TEST_TEXT * 10
+    assert len(base64.b64decode(lzw_compress(text))) < len(text)
+
+
+@pytest.mark.parametrize("max_bits", [0, 1, 8, 25, 255])
+def test_lzw_rejects_hostile_max_bits(max_bits: int) -> None:
+    """Test that a header's code width is checked before decoding."""
+    payload = base64.b64encode(b"LZW\x01" + bytes([max_bits]) + b"\xff" * 64)
+    with pytest.raises(ValueError):
+        lzw_decompress(payload.decode())
+
+
+def test_lzw_legacy_payload() -> None:
+    """Test that payloads with fixed two-byte codes still decode."""
+    codes = [84, 79, 66, 69, 79, 82, 78, 79, 84, 256, 258, 260, 265, 259, 261, 263]
+    legacy = base64.b64encode(b"".join(c.to_bytes(2, "big") for c in codes)).decode()
+    assert lzw_decompress(legacy) == "TOBEORNOTTOBEORTOBEORNOT"
+
+
 def test_zstd_compression_cycle() -> None:
     """Test Zstandard compression and decompression."""
     compressed = zstd_compress(TEST_TEXT)
@@ -53,6 +227,76 @@ def test_brotli_compression_cycle() -> None:
     assert decompressed == TEST_TEXT, "Brotli decompression does not match the original"
 
 
+@pytest.mark.parametrize(
+    "compress, decompress",
+    [
+        (zstd_compress_bytes, zstd_decompress_bytes),
+        (deflate_compress_bytes, deflate_decompress_bytes),
+        (brotli_compress_bytes, brotli_decompress_bytes),
+    ],
+)
+def test_bytes_compression_cycle(compress, decompress) -> None:
+    """Test the binary codecs on data that is not valid UTF-8."""
+    data = os.urandom(1000) + b"\xff" * 1000
+    assert decompress(compress(data)) == data
+    assert base64.b64encode(compress(TEST_TEXT.encode())).decode() in (
+        zstd_compress(TEST_TEXT),
+        deflate_compress(TEST_TEXT),
+        brotli_compress(TEST_TEXT),
+    )
+
+
+@pytest.mark.parametrize(
+    "compress, decompress, params",
+    [
+        (zstd_compress, zstd_decompress, {"level": 1}),
+        (
+            zstd_compress,
+            zstd_decompress,
+            {"level": 19, "window_log": 20, "long_distance_matching": True},
+        ),
+        (zstd_compress, zstd_decompress, {"threads": 2}),
+        (deflate_compress, deflate_decompress, {"level": 1, "strategy": "rle"}),
+        (deflate_compress, deflate_decompress, {"strategy": "huffman_only"}),
+        (brotli_compress, brotli_decompress, {"quality": 4, "lgwin": 16}),
+    ],
+)
+def test_compression_parameters_cycle(compress, decompress, params: dict) -> None:
+    """Test that tuned compression parameters still round-trip."""
+    assert decompress(compress(TEST_TEXT * 20, **params)) == TEST_TEXT * 20
+
+
+@pytest.mark.parametrize("target", ["speed", "balanced", "ratio"])
+@pytest.mark.parametrize(
+    "data",
+    [b"", b"short", os.urandom(5000), TEST_TEXT.encode(), TEST_TEXT.encode() * 100],
+)
+def test_auto_compression_cycle(target: str, data: bytes) -> None:
+    """Test that auto round-trips and never grows data by more than its header."""
+    compressed = auto_compress_bytes(data, target)
+    assert len(compressed) <= len(data) + 1
+    assert auto_decompress_bytes(compressed) == data
+
+
+def test_auto_compression_picks_codecs() -> None:
+    """Test that short and random inputs are stored and text is compressed."""
+    assert auto_compress_bytes(b"short")[0] == AUTO_STORED
+    assert auto_compress_bytes(os.urandom(50_000))[0] == AUTO_STORED
+    compressed = auto_compress_bytes(TEST_TEXT.encode() * 100)
+    assert compressed[0] != AUTO_STORED
+    assert len(compressed) < len(TEST_TEXT)
+    assert auto_decompress(auto_compress(TEST_TEXT)) == TEST_TEXT
+
+
+@pytest.mark.parametrize(
+    "payload", [b"", b"\x7fdata", b"\x01not zstd", b"\x02not brotli"]
+)
+def test_auto_decompression_rejects_bad_input(payload: bytes) -> None:
+    """Test that bad headers and corrupt codec data raise a ValueError."""
+    with pytest.raises(ValueError):
+        auto_decompress_bytes(payload)
+
+
 # Additional tests for edge cases
 @pytest.mark.parametrize("text", ["", "a", TEST_TEXT, SPECIAL_TEST_TEXT])
 def test_compression_with_varied_text(text: str) -> None:
@@ -68,3 +312,70 @@ def test_compression_with_varied_text(text: str) -> None:
         encoded = compress(text)
         decoded = decompress(encoded)
         assert decoded == text, f"{compress.__name__} failed with text: {text}"
+
+
+@pytest.mark.parametrize("compress, decompress", STREAM_CODECS)
+@pytest.mark.parametrize("data", [b"", b"a", os.urandom(50_000) + b"z" * 500_000])
+def test_stream_compression_cycle(compress, decompress, data: bytes) -> None:
+    """Test streaming codecs with uneven input and output chunking."""
+    chunks = [data[i : i + 7777] for i in range(0, len(data), 7777)]
+    compressed = b"".join(compress(chunks))
+    pieces = [compressed[i : i + 1000] for i in range(0, len(compressed), 1000)]
+    assert b"".join(decompress(pieces)) == data
+
+
+@pytest.mark.parametrize("compress, decompress", STREAM_CODECS)
+def test_stream_decompression_rejects_bad_input(compress, decompress) -> None:
+    """Test that truncated, padded and garbage streams raise a ValueError."""
+    compressed = b"".join(compress([TEST_TEXT.encode()]))
+    for payload in (compressed[:-4], compressed + b"x", b"garbage", b""):
+        with pytest.raises(ValueError):
+            b"".join(decompress([payload]))
+
+
+@pytest.mark.parametrize("compress, decompress", STREAM_CODECS)
+def test_stream_decompression_rejects_trailing_chunk(compress, decompress) -> None:
+    compressed = b"".join(compress([TEST_TEXT.encode()]))
+    with pytest.raises(ValueError):
+        b"".join(decompress([compressed, b"x"]))
+
+
+@pytest.mark.parametrize(
+    "compress, decompress",
+    [
+        (zstd_compress_stream, zstd_decompress_stream),
+        (deflate_compress_stream, deflate_decompress_stream),
+        (
+            lambda chunks: brotli_compress_stream(chunks, quality=5),
+            brotli_decompress_stream,
+        ),
+    ],
+)
+def test_stream_decompression_bomb_output_is_chunked(compress, decompress) -> None:
+    """Test that a small body expanding to 64 MiB comes out in small chunks."""
+    bomb = b"".join(compress(bytes(1024 * 1024) for _ in range(64)))
+    assert len(bomb) * 1000 < 64 * 1024 * 1024
+    sizes = [len(piece) for piece in decompress([bomb])]
+    assert sum(sizes) == 64 * 1024 * 1024
+    assert max(sizes) <= 2 * STREAM_OUTPUT_SIZE
+
+
+@pytest.mark.parametrize("compress, decompress", STREAM_CODECS[:2])
+def test_stream_compression_memory_is_bounded(compress, decompress) -> None:
+    """Test that streaming 16 MiB holds only a few chunks in memory at once."""
+    chunk = os.urandom(1024) * 64
+
+    def chunks():
+        for _ in range(256):
+            yield chunk
+
+    tracemalloc.start()
+    try:
+        compressed_size = sum(len(piece) for piece in compress(chunks()))
+        decompressed_size = sum(len(piece) for piece in decompress(compress(chunks())))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert compressed_size < 16 * 1024 * 1024
+    assert decompressed_size == 16 * 1024 * 1024
+    assert peak < 4 * 1024 * 1024
@@ -0,0 +1,95 @@
+from flask import Flask
+import pytest
+import zstandard
+from src.create_app import create_app
+from src.compression_decompression import (
+    zstd_compress,
+    zstd_decompress,
+    zstd_decompress_bytes,
+)
+from src.context_pool import ContextPool, codec_context_pool
+
+
+@pytest.fixture
+def app(tmp_path) -> Flask:
+    return create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "UPLOAD_FOLDER": str(tmp_path),
+        }
+    )
+
+
+def test_pool_reuses_contexts() -> None:
+    """Test that returned contexts are handed out again and counted as hits."""
+    pool = ContextPool()
+    first = pool.acquire("key", object)
+    pool.release("key", first)
+    assert pool.acquire("key", object) is first
+    pool.release("key", first)
+    pool.release("other", pool.acquire("other", object))
+    assert pool.metrics() == {
+        "hits": 1,
+        "misses": 2,
+        "keys": 2,
+        "idle": 2,
+        "bytes": 0,
+    }
+
+
+def test_zstd_drops_contexts_that_failed() -> None:
+    """Test that a decompressor that raised is not returned to the pool."""
+    codec_context_pool.clear()
+    with pytest.raises(zstandard.ZstdError):
+        zstd_decompress_bytes(b"not a zstd frame")
+    assert codec_context_pool.metrics()["idle"] == 0
+
+
+def test_pool_bounds_idle_contexts_and_keys() -> None:
+    """Test the per-key idle limit and eviction of old keys."""
+    pool = ContextPool(max_idle=1, max_keys=2)
+    contexts = [pool.acquire("a", object), pool.acquire("a", object)]
+    for context in contexts:
+        pool.release("a", context)
+    assert pool.metrics()["idle"] == 1
+    for key in ("b", "c"):
+        pool.release(key, pool.acquire(key, object))
+    assert set(pool.idle) == {"b", "c"}
+
+
+def test_pool_bounds_idle_bytes() -> None:
+    """Test that old contexts make way for new ones within the byte budget."""
+    pool = ContextPool(max_bytes=100)
+    pool.release("a", object(), 60)
+    pool.release("b", object(), 30)
+    pool.release("c", object(), 50)
+    assert pool.metrics()["bytes"] == 80
+    assert [len(contexts) for contexts in pool.idle.values()] == [0, 1, 1]
+    pool.release("d", object(), 101)
+    assert "d" not in pool.idle
+    pool.acquire("c", object)
+    assert pool.metrics()["bytes"] == 30
+
+
+def test_zstd_pool_counts_context_memory(app) -> None:
+    """Test that large zstd contexts are not kept past the configured budget."""
+    codec_context_pool.clear()
+    zstd_compress("pooled text" * 1000, level=5)
+    assert 0 < codec_context_pool.metrics()["bytes"] <= 64 * 1024 * 1024
+    codec_context_pool.max_bytes = 1024
+    codec_context_pool.clear()
+    zstd_compress("pooled text" * 1000, level=5)
+    assert codec_context_pool.metrics()["idle"] == 0
+    codec_context_pool.init_app(app)
+
+
+def test_zstd_uses_shared_pool(app) -> None:
+    """Test that zstd calls go through the shared pool and show in the metrics."""
+    codec_context_pool.clear()
+    hits = codec_context_pool.hits
+    for _ in range(3):
+        assert zstd_decompress(zstd_compress("pooled text", level=5)) == "pooled text"
+    assert codec_context_pool.hits - hits == 4
+    metrics = app.test_client().get("/api/metrics").get_json()["codec_context_pool"]
+    assert metrics["idle"] == 2
@@ -0,0 +1,113 @@
+import base64
+from flask import Flask
+import pytest
+from src.create_app import create_app
+from src.dictionaries import (
+    DictionaryStore,
+    dictionary_store,
+    train_dictionary,
+    huffman_compress_with_dictionary,
+    huffman_decompress_with_dictionary,
+    zstd_compress_with_dictionary,
+    zstd_decompress_with_dictionary,
+)
+from src.huffman import huffman_compress
+
+SAMPLES = [
+    f"Sample sentence number {i} about secure encoding and compression."
+    for i in range(200)
+]
+TEST_DICT_ID = 42
+
+
+@pytest.fixture(autouse=True)
+def trained_dictionary() -> None:
+    dictionary_store.add(train_dictionary(SAMPLES, TEST_DICT_ID))
+
+
+@pytest.fixture
+def app() -> Flask:
+    return create_app(
+        {"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"}
+    )
+
+
+@pytest.mark.parametrize(
+    "text", ["", "Sample sentence about encoding.", "Unseen bytes: ✓ 日本語 ~!#$%"]
+)
+def test_huffman_dictionary_cycle(text: str) -> None:
+    """Test Huffman compression with a shared table, including untrained bytes."""
+    compressed = huffman_compress_with_dictionary(text, TEST_DICT_ID)
+    assert huffman_decompress_with_dictionary(compressed) == text
+
+
+def test_huffman_dictionary_smaller_than_per_call_header() -> None:
+    """Test that dictionary payloads skip the per-call code length header."""
+    text = "Sample sentence number 7 about secure encoding."
+    assert len(huffman_compress_with_dictionary(text, TEST_DICT_ID)) < len(
+        huffman_compress(text)
+    )
+
+
+def test_zstd_dictionary_cycle() -> None:
+    """Test zstd compression with a trained dictionary."""
+    text = "Sample sentence number 7 about secure encoding and compression."
+    compressed = zstd_compress_with_dictionary(text, TEST_DICT_ID)
+    assert zstd_decompress_with_dictionary(compressed) == text
+
+
+def test_unknown_dictionary() -> None:
+    """Test that an unknown dictionary id raises a ValueError."""
+    with pytest.raises(ValueError):
+        zstd_compress_with_dictionary("text", 999)
+
+
+@pytest.mark.parametrize("payload", [b"H", b"HUF", b"HUF\x01", b"HUF\x02\x81"])
+def test_huffman_dictionary_rejects_short_payloads(payload: bytes) -> None:
+    """Test that truncated or non-dictionary payloads raise a ValueError."""
+    with pytest.raises(ValueError):
+        huffman_decompress_with_dictionary(base64.b64encode(payload).decode())
+
+
+def test_dictionary_store_save_and_load(tmp_path) -> None:
+    """Test that stored dictionaries load back with the same tables."""
+    store = DictionaryStore()
+    store.add(train_dictionary(SAMPLES, 7))
+    store.save(str(tmp_path))
+    loaded = DictionaryStore()
+    assert loaded.load(str(tmp_path)) == 1
+    assert loaded.get(7).huffman_codebook == store.get(7).huffman_codebook
+    assert loaded.get(7).zstd_data == store.get(7).zstd_data
+
+
+def test_process_text_with_dictionary(app) -> None:
+    """Test dictionary-tagged operations through the process_text endpoint."""
+    client = app.test_client()
+    text = "Sample sentence number 3 about secure encoding."
+    for operation in ("huffman", "zstd"):
+        response = client.post(
+            "/api/process_text",
+            json={
+                "text": text,
+                "operation": operation,
+                "action": "encode",
+                "dict_id": TEST_DICT_ID,
+            },
+        )
+        assert response.status_code == 200
+        response = client.post(
+            "/api/process_text",
+            json={
+                "text": response.get_json()["result"],
+                "operation": operation,
+                "action": "decode",
+                "dict_id": TEST_DICT_ID,
+            },
+        )
+        assert response.get_json()["result"] == text
+
+    response = client.post(
+        "/api/process_text",
+        json={"text": text, "operation": "zstd", "action": "encode", "dict_id": 999},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,82 @@
+import hashlib
+import time
+from src.digest_filter import BloomFilter, DigestFilter, NegativeCache
+import pytest
+
+
+def digest(text: str) -> bytes:
+    return hashlib.md5(text.encode()).digest()
+
+
+def test_bloom_filter() -> None:
+    bloom = BloomFilter.for_capacity(10_000, 0.01)
+    for i in range(10_000):
+        bloom.add(digest(f"stored {i}"))
+    assert all(digest(f"stored {i}") in bloom for i in range(10_000))
+    false_positives = sum(digest(f"missing {i}") in bloom for i in range(10_000))
+    assert false_positives < 200
+    assert bloom.expected_false_positive_rate == pytest.approx(0.01, rel=0.2)
+
+
+def test_bloom_filter_save_load(tmp_path) -> None:
+    path = str(tmp_path / "filter.bin")
+    bloom = BloomFilter.for_capacity(100)
+    bloom.add(digest("a"))
+    bloom.save(path)
+    loaded = BloomFilter.load(path)
+    assert digest("a") in loaded
+    assert (loaded.bits, loaded.hashes, loaded.count) == (bloom.bits, bloom.hashes, 1)
+
+    (tmp_path / "bad.bin").write_bytes(b"BLOOM01\x00 truncated")
+    with pytest.raises(ValueError):
+        BloomFilter.load(str(tmp_path / "bad.bin"))
+
+
+def test_negative_cache() -> None:
+    cache = NegativeCache(max_size=2, ttl=60)
+    for text in ["a", "b", "c"]:
+        cache.add(digest(text))
+    assert digest("a") not in cache
+    assert digest("c") in cache
+    cache.discard(digest("c"))
+    assert digest("c") not in cache
+
+    cache = NegativeCache(ttl=0.01)
+    cache.add(digest("a"))
+    time.sleep(0.02)
+    assert digest("a") not in cache
+
+
+def test_digest_filter(tmp_path) -> None:
+    digest_filter = DigestFilter()
+    digest_filter.path = str(tmp_path / "filter.bin")
+    # Before a filter is built every digest passes
+    assert digest_filter.might_contain(digest("a"))
+    digest_filter.record_miss(digest("a"))
+    assert digest_filter.known_missing(digest("a"))
+    assert digest_filter.might_contain(digest("a"))
+    digest_filter.add(digest("a"))
+    assert not digest_filter.known_missing(digest("a"))
+
+    digest_filter.rebuild([digest("a")], 1)
+    assert not digest_filter.might_contain(digest("b"))
+    digest_filter.record_stale(digest("b"))
+    assert digest_filter.might_contain(digest("b"))
+    assert not digest_filter.might_contain(digest("d"))
+    digest_filter.record_miss(digest("d"), passed=False)
+    assert digest_filter.known_missing(digest("d"))
+    assert not digest_filter.changed(interval=0)
+
+    other = DigestFilter()
+    other.path = digest_filter.path
+    other.rebuild([digest("a"), digest("b"), digest("c")], 3)
+    assert digest_filter.changed(interval=0)
+    digest_filter.load()
+    assert digest_filter.might_contain(digest("c"))
+
+    metrics = digest_filter.metrics()
+    assert metrics["loaded"]
+    assert metrics["entries"] == 3
+    assert metrics["rejects"] == 2
+    assert metrics["stale_rejects"] == 1
+    assert metrics["false_positive_rate"] == 0.0
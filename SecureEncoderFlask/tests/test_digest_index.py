@@ -0,0 +1,95 @@
+import hashlib
+import threading
+from src.digest_index import DigestIndex
+import pytest
+
+
+def digest_rows(texts):
+    return sorted((hashlib.md5(text.encode()).digest(), text) for text in texts)
+
+
+def test_build_and_get(tmp_path) -> None:
+    path = str(tmp_path / "index.bin")
+    texts = [f"text {i}" for i in range(1000)] + ["", "ünïcode"]
+    assert DigestIndex.build(path, digest_rows(texts)) == len(texts)
+    index = DigestIndex()
+    index.load(path)
+    assert len(index) == len(texts)
+    for text in texts:
+        assert index.get(hashlib.md5(text.encode()).digest()) == text
+
+
+def test_get_missing(tmp_path) -> None:
+    path = str(tmp_path / "index.bin")
+    rows = digest_rows(["a", "b", "c"])
+    DigestIndex.build(path, rows)
+    index = DigestIndex()
+    index.load(path)
+    assert index.get(b"\x00" * 16) is None
+    assert index.get(b"\xff" * 16) is None
+    assert index.get(hashlib.md5(b"d").digest()) is None
+    # Same leading bytes as a stored digest, different tail
+    assert index.get(rows[1][0][:8] + b"\x00" * 8) is None
+
+
+def test_empty_and_unloaded(tmp_path) -> None:
+    index = DigestIndex()
+    assert index.get(hashlib.md5(b"a").digest()) is None
+    path = str(tmp_path / "index.bin")
+    DigestIndex.build(path, [])
+    index.load(path)
+    assert len(index) == 0
+    assert index.get(hashlib.md5(b"a").digest()) is None
+
+
+def test_add_recent(tmp_path) -> None:
+    path = str(tmp_path / "index.bin")
+    DigestIndex.build(path, digest_rows(["a"]))
+    index = DigestIndex(max_recent=2)
+    index.load(path)
+    for text in ["b", "c", "d"]:
+        index.add(hashlib.md5(text.encode()).digest(), text)
+    assert index.get(hashlib.md5(b"a").digest()) == "a"
+    assert index.get(hashlib.md5(b"b").digest()) is None
+    assert index.get(hashlib.md5(b"d").digest()) == "d"
+    # Loading a rebuilt index drops the entries it now contains
+    DigestIndex.build(path, digest_rows(["a", "b", "c", "d"]))
+    index.load(path)
+    assert len(index) == 4
+    assert index.get(hashlib.md5(b"b").digest()) == "b"
+
+
+def test_get_during_reload(tmp_path) -> None:
+    """Test that lookups stay correct while indexes of other sizes are loaded."""
+    small, large = str(tmp_path / "small.bin"), str(tmp_path / "large.bin")
+    DigestIndex.build(small, digest_rows(["a", "b"]))
+    DigestIndex.build(large, digest_rows([f"text {i}" for i in range(2000)]))
+    index = DigestIndex()
+    index.load(large)
+    done = threading.Event()
+    errors = []
+
+    def lookup() -> None:
+        digest = hashlib.md5(b"text 1999").digest()
+        while not done.is_set():
+            try:
+                assert index.get(digest) in (None, "text 1999")
+            except Exception as e:
+                errors.append(e)
+                return
+
+    thread = threading.Thread(target=lookup)
+    thread.start()
+    for _ in range(200):
+        index.load(small)
+        index.load(large)
+    done.set()
+    thread.join()
+    assert not errors
+
+
+def test_load_invalid(tmp_path) -> None:
+    path = tmp_path / "index.bin"
+    path.write_bytes(b"not an index at all")
+    with pytest.raises(ValueError):
+        DigestIndex().load(str(path))
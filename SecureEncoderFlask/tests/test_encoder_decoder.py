@@ -1,3 +1,7 @@
+import base64
+import binascii
+import os
+import pytest
 from src.encoder_decoder import (
     encode_base64,
     decode_base64,
@@ -11,6 +15,10 @@ from src.encoder_decoder import (
     decode_ascii,
     encode_url,
     decode_url,
+    encode_base64_stream,
+    decode_base64_stream,
+    encode_hex_stream,
+    decode_hex_stream,
 )
 
 
@@ -120,3 +128,35 @@ def test_decode_url() -> None:
     assert (
         output_text == expected_output
     ), f"URL decoding failed: {output_text} != {expected_output}"
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 1000, 1001])
+@pytest.mark.parametrize("piece", [1, 5, 64])
+def test_base64_and_hex_streams(size: int, piece: int) -> None:
+    """Test that chunked coding matches one-shot coding for any chunk boundaries."""
+    data = os.urandom(size)
+    pieces = [data[i : i + piece] for i in range(0, len(data), piece)]
+    for encode, decode, expected in [
+        (encode_base64_stream, decode_base64_stream, base64.b64encode(data)),
+        (encode_hex_stream, decode_hex_stream, binascii.hexlify(data)),
+    ]:
+        encoded = b"".join(encode(pieces))
+        assert encoded == expected
+        chunks = [encoded[i : i + piece] for i in range(0, len(encoded), piece)]
+        assert b"".join(decode(chunks)) == data
+
+
+@pytest.mark.parametrize(
+    "decode, chunks",
+    [
+        (decode_base64_stream, [b"SGVsbG8"]),
+        (decode_base64_stream, [b"SGk=", b"SGk="]),
+        (decode_base64_stream, [b"SG k"]),
+        (decode_hex_stream, [b"48656", b"c6"]),
+        (decode_hex_stream, [b"zz"]),
+    ],
+)
+def test_base64_and_hex_streams_reject_bad_input(decode, chunks) -> None:
+    """Test truncated groups, data after padding and invalid characters."""
+    with pytest.raises(ValueError):
+        b"".join(decode(chunks))
@@ -3,11 +3,21 @@ import os
 
 from src.encryption_decryption import (
     ensure_aes_key,
+    ensure_rsa_private_key,
+    ensure_rsa_public_key,
+    get_aesgcm,
+    invalidate_key_cache,
     aes_encrypt,
     aes_decrypt,
+    aes_encrypt_bytes,
+    aes_decrypt_bytes,
     generate_rsa_keys,
     rsa_encrypt,
     rsa_decrypt,
+    rsa_envelope_encrypt,
+    rsa_envelope_decrypt,
+    rsa_envelope_encrypt_batch,
+    rsa_envelope_decrypt_batch,
 )
 
 
@@ -52,6 +62,46 @@ def test_ensure_aes_key_retrieval() -> None:
     assert retrieved_key == key, "Retrieved key should match the one in the key file"
 
 
+def test_aes_key_cache_detects_replaced_file() -> None:
+    """Test that a cached AES key is re-read once the key file changes."""
+    first_key = ensure_aes_key(test_key_file)
+    assert ensure_aes_key(test_key_file) == first_key
+    new_key = os.urandom(32)
+    os.remove(test_key_file)
+    with open(test_key_file, "wb") as f:
+        f.write(new_key)
+    assert ensure_aes_key(test_key_file) == new_key
+    assert get_aesgcm(new_key) is get_aesgcm(new_key)
+
+
+def test_invalidate_key_cache_drops_aesgcm_objects() -> None:
+    """Test that invalidating a key file also forgets its AESGCM object."""
+    key = ensure_aes_key(test_key_file)
+    aesgcm = get_aesgcm(key)
+    invalidate_key_cache(test_key_file)
+    assert get_aesgcm.cache_info().currsize == 0
+    assert get_aesgcm(key) is not aesgcm
+
+
+def test_rsa_key_cache(tmp_path) -> None:
+    """Test that parsed RSA keys are reused until the cache is invalidated."""
+    private_key_file = str(tmp_path / "rsa_private_key.pem")
+    public_key_file = str(tmp_path / "rsa_public_key.pem")
+    ensure_rsa_private_key(private_key_file)
+    cached_private_key = ensure_rsa_private_key(private_key_file)
+    assert ensure_rsa_private_key(private_key_file) is cached_private_key
+    assert ensure_rsa_public_key(public_key_file) is ensure_rsa_public_key(
+        public_key_file
+    )
+
+    invalidate_key_cache(private_key_file)
+    reloaded_private_key = ensure_rsa_private_key(private_key_file)
+    assert reloaded_private_key is not cached_private_key
+    assert (
+        reloaded_private_key.private_numbers() == cached_private_key.private_numbers()
+    )
+
+
 def test_aes_encrypt_decrypt() -> None:
     """Test that text is correctly encrypted and decrypted back to its original form."""
     key = ensure_aes_key(test_key_file)  # Use the helper function to manage the key
@@ -61,6 +111,18 @@ def test_aes_encrypt_decrypt() -> None:
     assert decrypted == plaintext, "Decrypted text should match the original"
 
 
+def test_aes_bytes_cycle() -> None:
+    """Test that the binary AES form round-trips arbitrary bytes."""
+    key = ensure_aes_key(test_key_file)
+    data = os.urandom(100) + b"\xff\xfe"
+    encrypted = aes_encrypt_bytes(data, key)
+    assert len(encrypted) == 12 + len(data) + 16
+    assert aes_decrypt_bytes(encrypted, key) == data
+    assert aes_decrypt_bytes(bytes.fromhex(aes_encrypt("Hello", key)), key) == b"Hello"
+    with pytest.raises(ValueError):
+        aes_decrypt_bytes(encrypted[:-1], key)
+
+
 def test_aes_encryption_decryption_empty_string() -> None:
     """Test encryption and decryption of an empty string."""
     key = ensure_aes_key(test_key_file)
@@ -210,3 +272,39 @@ def test_rsa_padding_oracle_attack_scenario() -> None:
         assert (
             False
         ), f"Unexpected exception type: {type(e).__name__}, message: {str(e)}"
+
+
+def test_rsa_envelope_large_data() -> None:
+    """Test that envelope encryption handles input far beyond the OAEP limit."""
+    private_key, public_key = generate_rsa_keys()
+    plaintext = "Envelope ✓ " * 10_000
+    encrypted = rsa_envelope_encrypt(plaintext, public_key)
+    assert rsa_envelope_decrypt(encrypted, private_key) == plaintext
+
+
+def test_rsa_envelope_decrypts_legacy_ciphertext() -> None:
+    """Test that raw RSA-OAEP ciphertexts still decrypt through the envelope path."""
+    private_key, public_key = generate_rsa_keys()
+    encrypted = rsa_encrypt("Legacy message", public_key)
+    assert rsa_envelope_decrypt(encrypted, private_key) == "Legacy message"
+
+
+def test_rsa_envelope_batch_shares_session_key() -> None:
+    """Test that a batch reuses one wrapped session key with distinct nonces."""
+    private_key, public_key = generate_rsa_keys()
+    plaintexts = ["Message 1", "Message 2", ""]
+    encrypted = rsa_envelope_encrypt_batch(plaintexts, public_key)
+    wrapped_keys = {bytes.fromhex(envelope)[3:259] for envelope in encrypted}
+    assert len(wrapped_keys) == 1
+    assert len(set(encrypted)) == len(plaintexts)
+    assert rsa_envelope_decrypt_batch(encrypted, private_key) == plaintexts
+
+
+def test_rsa_envelope_tampering() -> None:
+    """Test that a modified envelope fails authentication."""
+    private_key, public_key = generate_rsa_keys()
+    encrypted = bytes.fromhex(rsa_envelope_encrypt("Critical data", public_key))
+    tampered = encrypted[:-1] + bytes([encrypted[-1] ^ 0x01])
+    with pytest.raises(ValueError) as excinfo:
+        rsa_envelope_decrypt(tampered.hex(), private_key)
+    assert "decryption failed" in str(excinfo.value).lower()
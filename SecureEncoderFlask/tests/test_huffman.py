@@ -1,5 +1,14 @@
+import base64
+import json
 import pytest
-from src.huffman import huffman_compress, huffman_decompress
+from collections import Counter
+from src.huffman import (
+    huffman_compress,
+    huffman_decompress,
+    HuffmanCoding,
+    HuffmanDecodeTable,
+    get_decode_table,
+)
 
 TEST_TEXT = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed non risus. Suspendisse lectus tortor, dignissim sit amet, adipiscing nec, ultricies sed, dolor. Cras elementum ultrices diam. Maecenas ligula massa, varius a, semper congue, euismod non, mi. Proin porttitor, orci nec nonummy molestie, enim est eleifend mi, non fermentum diam nisl sit amet erat. Duis semper. Duis arcu massa, scelerisque vitae, consequat in, pretium a, enim. Pellentesque congue. Ut in risus volutpat libero pharetra tempor. Cras vestibulum bibendum augue. Praesent egestas leo in pede. Praesent blandit odio eu enim. Pellentesque sed dui ut augue blandit sodales. Vestibulum ante ipsum primis in faucibus orci luctus et ultrices posuere cubilia Curae; Aliquam nibh. Mauris ac mauris sed pede pellentesque fermentum. Maecenas adipiscing ante non diam sodales hendrerit."
 SPECIAL_TEST_TEXT = "~!#$%^&*()_+"
@@ -8,15 +17,167 @@ SPECIAL_TEST_TEXT = "~!#$%^&*()_+"
 def test_huffman_compression_cycle() -> None:
     """Test Huffman compression and decompression."""
     encoded_data = huffman_compress("he")
-    assert (
-        encoded_data
-        == "eyJjb21wcmVzc2VkX2RhdGEiOiAiTVRBPSIsICJzZXJpYWxpemVkX3RyZWUiOiB7ImxlZnQiOiB7ImNoYXIiOiAiZSJ9LCAicmlnaHQiOiB7ImNoYXIiOiAiaCJ9fX0="
-    )
+    assert base64.b64decode(encoded_data).startswith(b"HUF\x01")
 
     decoded_data = huffman_decompress(encoded_data)
     assert decoded_data == "he"
 
 
+def test_huffman_legacy_payload() -> None:
+    """Test that payloads in the legacy JSON format still decode."""
+    legacy_data = "eyJjb21wcmVzc2VkX2RhdGEiOiAiTVRBPSIsICJzZXJpYWxpemVkX3RyZWUiOiB7ImxlZnQiOiB7ImNoYXIiOiAiZSJ9LCAicmlnaHQiOiB7ImNoYXIiOiAiaCJ9fX0="
+    assert huffman_decompress(legacy_data) == "he"
+
+
+def test_huffman_legacy_payload_with_long_codes() -> None:
+    """Test legacy trees whose codes are not canonical nor fit the primary table."""
+    huffman = HuffmanCoding()
+    frequencies = [1, 1]
+    while len(frequencies) < 20:
+        frequencies.append(frequencies[-1] + frequencies[-2])
+    text = "".join(chr(65 + i) * f for i, f in enumerate(frequencies)) * 3
+    huffman.build_huffman_tree(huffman.build_frequency_table(text))
+    codebook = huffman.build_codes(huffman.huffman_tree)
+    assert max(len(code) for code in codebook.values()) > 16
+    bits = "".join(codebook[char] for char in text)
+    legacy = {
+        "compressed_data": base64.b64encode(bits.encode()).decode(),
+        "serialized_tree": huffman.serialize_tree(huffman.huffman_tree),
+    }
+    legacy_data = base64.b64encode(json.dumps(legacy).encode()).decode()
+    assert huffman_decompress(legacy_data) == text
+
+
+@pytest.mark.parametrize(
+    "lengths",
+    [[0, 1], [1, 25], [1, 255], [1, 1, 1], [2, 2, 2, 2, 3]],
+)
+def test_huffman_rejects_bad_code_lengths(lengths: list[int]) -> None:
+    """Test that impossible code lengths in the header raise a ValueError."""
+    header = bytearray(b"HUF\x01")
+    header.append(len(lengths))
+    for i, length in enumerate(lengths):
+        header.extend([97 + i, length])
+    header.append(0)
+    with pytest.raises(ValueError):
+        HuffmanCoding().decode(bytes(header))
+
+
+def test_huffman_decode_tables_are_shared() -> None:
+    """Test that payloads with the same code lengths reuse one decode table."""
+    get_decode_table.cache_clear()
+    for text in ("abbccc", "cccbba", "abcabc"):
+        assert huffman_decompress(huffman_compress(text)) == text
+    assert get_decode_table.cache_info().hits >= 1
+
+
+def test_huffman_output_smaller_than_input() -> None:
+    """Test that the bit-packed payload is smaller than the text it encodes."""
+    encoded_data = huffman_compress(TEST_TEXT)
+    assert len(base64.b64decode(encoded_data)) < len(TEST_TEXT.encode())
+
+
+@pytest.mark.parametrize("text", ["aaaa", "héllo wörld ✓ 日本語"])
+def test_huffman_unusual_alphabets(text: str) -> None:
+    """Test single-symbol and non-Latin alphabets."""
+    assert huffman_decompress(huffman_compress(text)) == text
+
+
+@pytest.mark.parametrize("length", [0, 1, 21, 22, 23, 200])
+def test_pack_codes(length: int) -> None:
+    """Test packing across 64-bit flushes and a zero-padded final byte."""
+    codebook = {"a": "0", "b": "10", "c": "110", "d": "111"}
+    text = "abcd" * (length // 4) + "abcd"[: length % 4]
+    bits = "".join(codebook[char] for char in text)
+    payload, bit_count = HuffmanCoding().pack_codes(text, codebook)
+    assert bit_count == len(bits)
+    assert payload == bytes(
+        int(bits[i : i + 8].ljust(8, "0"), 2) for i in range(0, len(bits), 8)
+    )
+
+
+def test_decode_table_multiple_symbols_per_byte() -> None:
+    """Test that one table lookup can resolve several symbols."""
+    table = HuffmanDecodeTable({"a": "0", "b": "10", "c": "11"})
+    # 0 10 11 0 0 0 | 10 -> "abcaaab"
+    assert table.decode(bytes([0b01011000, 0b10000000]), 10) == "abcaaab"
+
+
+@pytest.mark.parametrize(
+    "payload, bit_count", [(bytes([0b11000000]), 2), (bytes([0b10000000]), 1)]
+)
+def test_decode_table_rejects_bad_codes(payload: bytes, bit_count: int) -> None:
+    """Test that invalid or truncated codes raise a ValueError."""
+    table = HuffmanDecodeTable({"a": "0", "b": "10"})
+    with pytest.raises(ValueError):
+        table.decode(payload, bit_count)
+
+
+def test_decode_table_long_codes_and_large_payloads() -> None:
+    """Test codes longer than the primary table on both decode paths."""
+    frequencies = [1, 1]
+    while len(frequencies) < 22:
+        frequencies.append(frequencies[-1] + frequencies[-2])
+    freq_table = Counter({chr(0x4E00 + i): f for i, f in enumerate(frequencies)})
+    huffman = HuffmanCoding()
+    codebook = huffman.build_canonical_codes(
+        huffman.build_limited_code_lengths(freq_table)
+    )
+    assert (
+        max(len(code) for code in codebook.values()) > HuffmanDecodeTable.PRIMARY_BITS
+    )
+    table = HuffmanDecodeTable(codebook)
+    for text in ("".join(freq_table) * 3, "".join(freq_table.elements()) * 3):
+        payload, bit_count = huffman.pack_codes(text, codebook)
+        assert table.decode(payload, bit_count) == text
+
+
+def test_limited_code_lengths_are_bounded() -> None:
+    """Test that package-merge caps code lengths and keeps a complete code."""
+    frequencies = [1, 1]
+    while len(frequencies) < 40:
+        frequencies.append(frequencies[-1] + frequencies[-2])
+    freq_table = Counter({chr(65 + i): f for i, f in enumerate(frequencies)})
+    code_lengths = HuffmanCoding().build_limited_code_lengths(freq_table, max_length=12)
+    assert max(code_lengths.values()) == 12
+    assert sum(2**-length for length in code_lengths.values()) == 1
+
+
+def test_bounded_code_lengths_fall_back_only_when_needed() -> None:
+    """Test that heap-built lengths are kept unless a code is too long."""
+    huffman = HuffmanCoding()
+    freq_table = huffman.build_frequency_table(TEST_TEXT)
+    huffman.build_huffman_tree(freq_table)
+    tree_lengths = huffman.build_code_lengths(huffman.huffman_tree)
+    bounded = huffman.build_bounded_code_lengths(freq_table)
+    assert sum(freq_table[c] * bounded[c] for c in freq_table) == sum(
+        freq_table[c] * tree_lengths[c] for c in freq_table
+    )
+
+    frequencies = [1, 1]
+    while len(frequencies) < 40:
+        frequencies.append(frequencies[-1] + frequencies[-2])
+    deep = Counter({chr(65 + i): f for i, f in enumerate(frequencies)})
+    assert huffman.build_bounded_code_lengths(
+        deep, max_length=12
+    ) == huffman.build_limited_code_lengths(deep, max_length=12)
+
+
+def test_deep_tree_traversal() -> None:
+    """Test that very deep trees do not hit the recursion limit."""
+    huffman = HuffmanCoding()
+    root = node = HuffmanCoding.Node()
+    for i in range(5000):
+        node.left = HuffmanCoding.Node(char=chr(0x4E00 + i))
+        node.right = HuffmanCoding.Node()
+        node = node.right
+    node.char = "end"
+    codebook = huffman.build_codes(root)
+    rebuilt = huffman.deserialize_tree(huffman.serialize_tree(root))
+    assert huffman.build_codes(rebuilt) == codebook
+    assert len(codebook["end"]) == 5000
+
+
 # Additional tests for edge cases
 @pytest.mark.parametrize("text", ["", "a", TEST_TEXT, SPECIAL_TEST_TEXT])
 def test_compression_with_varied_text(text: str) -> None:
@@ -0,0 +1,84 @@
+import hashlib
+import os
+from flask import Flask
+from src.create_app import create_app
+from src.ingestion import WordlistLoader, read_chunks
+from src.md5_model import Digest, MD5Hash, db, digest_decode, md5_decode
+import pytest
+
+
+@pytest.fixture
+def app(tmp_path) -> Flask:
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "MD5_INDEX_PATH": str(tmp_path / "md5_index.bin"),
+            "MD5_FILTER_PATH": str(tmp_path / "md5_filter.bin"),
+        }
+    )
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def wordlist(tmp_path) -> str:
+    path = tmp_path / "words.txt"
+    path.write_bytes(b"".join(f"word {i}\r\n".encode() for i in range(25)) + b"\n")
+    return str(path)
+
+
+def test_read_chunks(wordlist) -> None:
+    chunks = list(read_chunks(wordlist, 10))
+    assert [len(lines) for _, lines in chunks] == [10, 10, 6]
+    assert chunks[-1][0] == os.path.getsize(wordlist)
+    resumed = list(read_chunks(wordlist, 10, chunks[0][0]))
+    assert resumed[0][1][0] == b"word 10\r\n"
+
+
+def test_wordlist_loader(app, wordlist) -> None:
+    checkpoint = wordlist + ".checkpoint"
+    seen = []
+    with app.app_context():
+        loader = WordlistLoader(wordlist, ["md5", "sha256"], 10, 1, checkpoint)
+        inserted = loader.run(lambda loader: seen.append(loader.lines))
+        assert inserted == {"md5": 25, "sha256": 25}
+        assert seen == [10, 20, 26]
+        assert not os.path.exists(checkpoint)
+        assert md5_decode(hashlib.md5(b"word 7").hexdigest()) == "word 7"
+        assert digest_decode("sha256", hashlib.sha256(b"word 7").hexdigest()) == (
+            "word 7"
+        )
+
+
+def test_wordlist_loader_resume(app, wordlist) -> None:
+    """Test that a failed load resumes after the last stored chunk."""
+    checkpoint = wordlist + ".checkpoint"
+
+    def fail(loader: WordlistLoader) -> None:
+        raise RuntimeError("interrupted")
+
+    with app.app_context():
+        with pytest.raises(RuntimeError):
+            WordlistLoader(wordlist, ["md5"], 10, 1, checkpoint).run(fail)
+        assert os.path.exists(checkpoint)
+        assert MD5Hash.query.count() == 10
+
+        # A different algorithm set starts over instead of resuming
+        other = WordlistLoader(wordlist, ["md5", "sha1"], 10, 1, checkpoint)
+        other.load_checkpoint()
+        assert other.offset == 0
+
+        loader = WordlistLoader(wordlist, ["md5"], 10, 1, checkpoint)
+        assert loader.run() == {"md5": 25}
+        assert loader.resumed_lines == 10
+        assert loader.lines == 26
+        assert MD5Hash.query.count() == 25
+
+
+def test_wordlist_loader_workers(app, wordlist) -> None:
+    with app.app_context():
+        loader = WordlistLoader(wordlist, ["md5", "blake2b"], 5, 2)
+        assert loader.run() == {"md5": 25, "blake2b": 25}
+        assert Digest.query.count() == 25
@@ -0,0 +1,98 @@
+import os
+import time
+from flask import Flask
+import pytest
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from src.create_app import create_app
+from src.key_pool import RSAKeyPool
+
+
+@pytest.fixture
+def pool() -> RSAKeyPool:
+    pool = RSAKeyPool(pool_size=1, key_sizes=(1024,))
+    pool.start()
+    yield pool
+    pool.stop()
+
+
+@pytest.fixture
+def app(tmp_path) -> Flask:
+    return create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "UPLOAD_FOLDER": str(tmp_path),
+        }
+    )
+
+
+def wait_for_depth(pool: RSAKeyPool, key_size: int, depth: int) -> None:
+    deadline = time.monotonic() + 30
+    while pool.pools[key_size].qsize() < depth:
+        assert time.monotonic() < deadline, "Key pool did not refill in time"
+        time.sleep(0.01)
+
+
+def test_pool_serves_pregenerated_pairs(pool: RSAKeyPool) -> None:
+    """Test that pooled pairs are handed out and the pool refills."""
+    wait_for_depth(pool, 1024, 1)
+    private_key, public_key = pool.take(1024)
+    assert private_key.key_size == 1024
+    assert private_key.public_key().public_numbers() == public_key.public_numbers()
+    wait_for_depth(pool, 1024, 1)
+    metrics = pool.metrics()["key_sizes"]["1024"]
+    assert metrics["hits"] == 1
+    assert metrics["generated"] >= 2
+    assert metrics["average_generation_ms"] > 0
+
+
+def test_pool_generates_in_worker_process(pool: RSAKeyPool) -> None:
+    """Test that pooled pairs come from the worker process."""
+    assert pool.executor is not None
+    wait_for_depth(pool, 1024, 1)
+    private_key, public_key = pool.take(1024)
+    message = b"pooled"
+    signature = private_key.sign(message, padding.PKCS1v15(), hashes.SHA256())
+    public_key.verify(signature, message, padding.PKCS1v15(), hashes.SHA256())
+
+
+def test_init_app_pools_configured_key_size() -> None:
+    """Test that init_app skips testing apps and always pools RSA_KEY_SIZE."""
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True, RSA_KEY_SIZE=1024, RSA_KEY_POOL_SIZE=1, RSA_KEY_POOL_SIZES=[]
+    )
+    pool = RSAKeyPool()
+    pool.init_app(app)
+    assert not pool.running
+
+    app.config["TESTING"] = False
+    pool.init_app(app)
+    try:
+        assert pool.running
+        assert pool.key_sizes == (1024,)
+    finally:
+        pool.stop()
+
+
+def test_pool_generates_unpooled_sizes(pool: RSAKeyPool) -> None:
+    """Test that sizes without a pool are generated synchronously as misses."""
+    private_key, _ = pool.take(2048)
+    assert private_key.key_size == 2048
+    assert pool.metrics()["key_sizes"]["2048"]["misses"] == 1
+
+
+def test_rotate_rsa_keys_endpoint(app, tmp_path) -> None:
+    """Test key rotation and the metrics endpoint."""
+    client = app.test_client()
+    response = client.post("/api/rotate_rsa_keys")
+    assert response.status_code == 201
+    first_key = (tmp_path / "rsa_private_key.pem").read_bytes()
+    client.post("/api/rotate_rsa_keys")
+    assert (tmp_path / "rsa_private_key.pem").read_bytes() != first_key
+    assert os.path.exists(tmp_path / "rsa_public_key.pem")
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert "2048" in response.get_json()["rsa_key_pool"]["key_sizes"]
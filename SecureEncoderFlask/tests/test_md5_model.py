@@ -1,15 +1,33 @@
+import hashlib
 from flask import Flask
-from src.md5_model import db, MD5Hash, md5_encode, md5_decode
+from src.md5_model import (
+    db,
+    Digest,
+    HASH_ALGORITHMS,
+    MD5Hash,
+    md5_encode,
+    md5_decode,
+    md5_filter,
+    md5_index,
+    bulk_insert_hashes,
+    build_md5_index,
+    digest_decode,
+    digest_decode_batch,
+    digest_encode,
+    ingest_texts,
+)
 from src.create_app import create_app
 import pytest
 
 
 @pytest.fixture
-def app() -> Flask:
+def app(tmp_path) -> Flask:
     app = create_app(
         {
             "TESTING": True,
             "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "MD5_INDEX_PATH": str(tmp_path / "md5_index.bin"),
+            "MD5_FILTER_PATH": str(tmp_path / "md5_filter.bin"),
             "WTF_CSRF_ENABLED": False,  # Disable CSRF tokens in the form for testing purposes.
         }
     )
@@ -49,3 +67,141 @@ def test_md5_decode_no_match(app) -> None:
         assert (
             decoded == "No match found"
         )  # Ensure correct message is returned when no match is found
+
+
+def test_md5_decode_after_miss(app) -> None:
+    """Test that a miss is not remembered once the text is stored."""
+    with app.app_context():
+        encoded = hashlib.md5(b"later").hexdigest()
+        assert md5_decode(encoded) == "No match found"
+        assert md5_encode("later") == encoded
+        assert md5_decode(encoded) == "later"
+
+
+def test_build_md5_index(app) -> None:
+    """Test that decoding goes through the index once it is built."""
+    with app.app_context():
+        texts = [f"word{i}" for i in range(200)]
+        bulk_insert_hashes(texts)
+        assert build_md5_index(app.config["MD5_INDEX_PATH"]) == 200
+        assert len(md5_index) == 200
+        MD5Hash.query.delete()
+        db.session.commit()
+        for text in texts:
+            assert md5_decode(hashlib.md5(text.encode()).hexdigest()) == text
+        assert md5_decode("0" * 32) == "No match found"
+
+
+def test_md5_filter(app) -> None:
+    """Test that misses are remembered once confirmed and forgotten on insert."""
+    with app.app_context():
+        bulk_insert_hashes(["stored"])
+        build_md5_index(app.config["MD5_INDEX_PATH"])
+        for i in range(100):
+            assert md5_decode(hashlib.md5(f"missing {i}".encode()).hexdigest()) == (
+                "No match found"
+            )
+        metrics = md5_filter.metrics()
+        assert metrics["rejects"] + metrics["false_positives"] == 100
+        assert metrics["negative_cache_size"] == 100
+        assert md5_decode(hashlib.md5(b"missing 0").hexdigest()) == "No match found"
+        assert md5_filter.metrics()["negative_cache_hits"] == 1
+
+        encoded = hashlib.md5(b"new").hexdigest()
+        md5_filter.record_miss(bytes.fromhex(encoded))
+        assert md5_decode(encoded) == "No match found"
+        assert md5_encode("new") == encoded
+        assert md5_decode(encoded) == "new"
+        assert md5_decode(md5_encode("stored")) == "stored"
+        assert MD5Hash.query.count() == 2
+
+    metrics = app.test_client().get("/api/metrics").get_json()["md5_filter"]
+    assert metrics["loaded"]
+    # The stored "new" hash was dropped from the confirmed misses
+    assert metrics["negative_cache_size"] == 100
+
+
+def test_md5_filter_misses_fall_through(app) -> None:
+    """Test that rows stored without updating the filter are still found."""
+    with app.app_context():
+        bulk_insert_hashes(["stored"])
+        build_md5_index(app.config["MD5_INDEX_PATH"])
+        # Bulk inserts, like another process's, bypass the filter
+        bulk_insert_hashes(["unfiltered"])
+        encoded = hashlib.md5(b"unfiltered").hexdigest()
+        assert not md5_filter.might_contain(bytes.fromhex(encoded))
+        assert md5_decode(encoded) == "unfiltered"
+        assert md5_filter.might_contain(bytes.fromhex(encoded))
+        assert md5_filter.metrics()["stale_rejects"] == 1
+
+
+def test_bulk_insert_hashes(app) -> None:
+    """Test batched inserts with duplicates, stored texts and over-long texts."""
+    with app.app_context():
+        md5_encode("stored")
+        texts = ["alpha", "beta", "alpha", "stored", "", "x" * 256, "gamma"]
+        assert bulk_insert_hashes(texts, batch_size=2) == 3
+        assert bulk_insert_hashes(texts) == 0
+        assert MD5Hash.query.count() == 4
+        assert md5_decode(md5_encode("gamma")) == "gamma"
+
+
+def test_ingest_texts(app) -> None:
+    """Test that one pass stores raw digests for every algorithm."""
+    with app.app_context():
+        inserted = ingest_texts(["alpha", "beta", "alpha", ""], HASH_ALGORITHMS, 2)
+        assert inserted == dict.fromkeys(HASH_ALGORITHMS, 2)
+        assert Digest.query.count() == 2 * (len(HASH_ALGORITHMS) - 1)
+        for name, constructor in HASH_ALGORITHMS.items():
+            hash_hex = constructor(b"beta").hexdigest()
+            if name == "md5":
+                assert md5_decode(hash_hex) == "beta"
+            else:
+                assert digest_decode(name, hash_hex) == "beta"
+                assert digest_decode(name, hash_hex.upper()) == "beta"
+        stored = Digest.query.filter_by(algorithm="sha256", text="beta").one()
+        assert len(stored.digest) == 32
+
+        with pytest.raises(ValueError):
+            ingest_texts(["alpha"], ["sha3"])
+
+
+def test_digest_encode_decode(app) -> None:
+    with app.app_context():
+        encoded = digest_encode("blake2s", "hello")
+        assert encoded == hashlib.blake2s(b"hello").hexdigest()
+        assert digest_encode("blake2s", "hello") == encoded
+        assert Digest.query.count() == 1
+        assert digest_decode_batch("blake2s", [encoded, "zz", "00" * 32]) == [
+            "hello",
+            "No match found",
+            "No match found",
+        ]
+        # Digests are looked up per algorithm
+        assert digest_decode("blake2b", encoded) == "No match found"
+
+
+def test_load_wordlist(app, tmp_path) -> None:
+    """Test loading wordlist files through the CLI command."""
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("one\r\ntwo\n\nthree\n", encoding="utf-8")
+    result = app.test_cli_runner().invoke(
+        args=["load-wordlist", str(wordlist), "--workers", "1", "--batch-size", "2"]
+    )
+    assert result.exit_code == 0
+    assert "Inserted 3 md5, 3 sha1, 3 sha256" in result.output
+    with app.app_context():
+        assert md5_decode(md5_encode("two")) == "two"
+
+    wordlist.write_text("three\nfour\n", encoding="utf-8")
+    result = app.test_cli_runner().invoke(
+        args=["load-wordlist", str(wordlist), "--workers", "1"]
+    )
+    assert result.exit_code == 0
+    assert "Inserted 1 md5, 1 sha1, 1 sha256" in result.output
+    assert "lines/s" in result.output
+    result = app.test_cli_runner().invoke(args=["populate-db", "--entries", "5"])
+    assert result.exit_code == 0
+    result = app.test_cli_runner().invoke(args=["build-md5-index"])
+    assert result.exit_code == 0
+    assert "Indexed 9 hashes" in result.output
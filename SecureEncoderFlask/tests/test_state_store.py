@@ -0,0 +1,82 @@
+from flask import Flask
+import pytest
+from src.create_app import create_app
+from src.state_store import StateStore, state_store
+
+
+@pytest.fixture
+def app(tmp_path) -> Flask:
+    return create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "UPLOAD_FOLDER": str(tmp_path),
+        }
+    )
+
+
+def test_state_is_kept_per_session(app) -> None:
+    """Test that state is found again through the session's state id."""
+    store = StateStore()
+    with app.test_request_context():
+        assert store.get("text") is None
+        store.update(text="first", operation="hex")
+        store.update(action="encode")
+        assert store.get("text") == "first"
+        assert store.get("action") == "encode"
+    with app.test_request_context():
+        assert store.get("text") is None
+    assert store.metrics() == {"sessions": 1, "size": len("firsthexencode")}
+
+
+def test_state_expires_after_ttl(app, monkeypatch) -> None:
+    """Test that unused state is dropped after the TTL."""
+    now = [1000.0]
+    monkeypatch.setattr("src.state_store.time.monotonic", lambda: now[0])
+    store = StateStore(ttl=60)
+    with app.test_request_context():
+        store.update(text="short lived")
+        now[0] += 30
+        assert store.get("text") == "short lived"
+        now[0] += 61
+        assert store.get("text") is None
+    assert store.metrics()["size"] == 0
+
+
+def test_state_size_cap_evicts_least_recently_used(app) -> None:
+    """Test the size cap, and that state over the cap alone is not stored."""
+    store = StateStore(max_size=10)
+    with app.test_request_context():
+        store.update(text="a" * 6)
+        with app.test_request_context():
+            store.update(text="b" * 6)
+            assert store.get("text") == "b" * 6
+        assert store.get("text") is None
+        store.update(text="c" * 11)
+        assert store.get("text") is None
+    assert store.metrics()["sessions"] == 1
+
+
+def test_text_routes_keep_state_out_of_cookies(app) -> None:
+    """Test save_text semantics with server-side state and an id-only cookie."""
+    state_store.clear()
+    client = app.test_client()
+    response = client.patch("/api/save_text", json={"new_text": "Saved"})
+    assert response.status_code == 201
+    response = client.patch("/api/save_text", json={"new_text": "Other"})
+    assert response.status_code == 409
+    response = client.patch(
+        "/api/save_text?force_update=true", json={"new_text": "Other"}
+    )
+    assert response.status_code == 200
+
+    text = "x" * 10_000
+    response = client.post(
+        "/api/process_text",
+        json={"text": text, "operation": "hex", "action": "encode"},
+    )
+    assert response.status_code == 200
+    assert client.get_cookie("text") is None
+    assert len(client.get_cookie("session").value) < 200
+    response = client.patch("/api/save_text", json={"new_text": "Again"})
+    assert response.status_code == 409
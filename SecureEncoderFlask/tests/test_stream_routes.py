@@ -0,0 +1,211 @@
+import os
+import struct
+from flask import Flask
+import pytest
+from src.create_app import create_app
+from src.encryption_decryption import (
+    AES_STREAM_VERSION,
+    aes_encrypt_stream,
+    aes_decrypt_stream,
+)
+
+TEST_DATA = os.urandom(200_000)
+
+
+@pytest.fixture
+def app(tmp_path) -> Flask:
+    return create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "UPLOAD_FOLDER": str(tmp_path),
+        }
+    )
+
+
+@pytest.fixture
+def client(app) -> Flask.test_client:
+    return app.test_client()
+
+
+@pytest.mark.parametrize("data", [b"", b"a", TEST_DATA])
+@pytest.mark.parametrize("chunk_size", [16, 64 * 1024])
+def test_aes_stream_cycle(data: bytes, chunk_size: int) -> None:
+    """Test chunked AES-GCM encryption with uneven input and output chunking."""
+    key = os.urandom(32)
+    chunks = [data[i : i + 777] for i in range(0, len(data), 777)]
+    encrypted = b"".join(aes_encrypt_stream(chunks, key, chunk_size))
+    pieces = [encrypted[i : i + 1000] for i in range(0, len(encrypted), 1000)]
+    assert b"".join(aes_decrypt_stream(pieces, key)) == data
+
+
+def test_aes_stream_detects_truncation() -> None:
+    """Test that dropping trailing chunks fails authentication."""
+    key = os.urandom(32)
+    encrypted = b"".join(aes_encrypt_stream([TEST_DATA], key, 1024))
+    with pytest.raises(ValueError):
+        b"".join(aes_decrypt_stream([encrypted[: 12 + 2 * (1024 + 16)]], key))
+
+
+def test_aes_stream_rejects_bad_chunk_sizes() -> None:
+    """Test that zero chunk sizes and oversized header chunk sizes are refused."""
+    key = os.urandom(32)
+    with pytest.raises(ValueError):
+        next(aes_encrypt_stream([b"data"], key, 0))
+    header = struct.pack(">BI7s", AES_STREAM_VERSION, 2**32 - 1, os.urandom(7))
+    with pytest.raises(ValueError):
+        next(aes_decrypt_stream([header, b"x" * 100], key, max_chunk_size=1024))
+
+
+@pytest.mark.parametrize(
+    "tamper", [lambda data: b"short", lambda data: data[:-1] + b"!"]
+)
+def test_stream_aes_endpoint_rejects_bad_body(client, tamper) -> None:
+    """Test that short or tampered bodies get a 400 before the stream starts."""
+    response = client.post(
+        "/api/stream/aes/encode",
+        data=b"secret",
+        content_type="application/octet-stream",
+    )
+    response = client.post(
+        "/api/stream/aes/decode",
+        data=tamper(response.data),
+        content_type="application/octet-stream",
+    )
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_stream_aes_endpoint(client) -> None:
+    """Test streaming a request body through the AES endpoints."""
+    response = client.post(
+        "/api/stream/aes/encode",
+        data=TEST_DATA,
+        content_type="application/octet-stream",
+    )
+    assert response.status_code == 200
+    response = client.post(
+        "/api/stream/aes/decode",
+        data=response.data,
+        content_type="application/octet-stream",
+    )
+    assert response.data == TEST_DATA
+
+
+@pytest.mark.parametrize("operation", ["zstd", "deflate", "brotli"])
+def test_stream_compression_endpoint(client, operation: str) -> None:
+    """Test streaming a request body through the compression endpoints."""
+    data = TEST_DATA + b"a" * 100_000
+    response = client.post(
+        f"/api/stream/{operation}/encode",
+        data=data,
+        content_type="application/octet-stream",
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/octet-stream"
+    assert len(response.data) < len(data)
+    response = client.post(
+        f"/api/stream/{operation}/decode",
+        data=response.data,
+        content_type="application/octet-stream",
+    )
+    assert response.data == data
+
+
+def test_stream_compression_parameters(app, client) -> None:
+    """Test that streams use the configured profile and query parameters."""
+    data = TEST_DATA + bytes(range(256)) * 2000
+
+    def encode(url: str) -> bytes:
+        response = client.post(url, data=data, content_type="application/octet-stream")
+        assert response.status_code == 200
+        return response.data
+
+    default = encode("/api/stream/deflate/encode")
+    assert encode("/api/stream/deflate/encode?level=9") == default
+    assert encode("/api/stream/deflate/encode?level=1") != default
+    assert encode("/api/stream/deflate/encode?profile=fast") != default
+    app.config["COMPRESSION_PROFILE"] = "fast"
+    assert encode("/api/stream/deflate/encode") != default
+    for url in [
+        "/api/stream/deflate/encode?level=10",
+        "/api/stream/deflate/encode?quality=5",
+        "/api/stream/zstd/encode?level=22",
+        "/api/stream/zstd/decode?level=3",
+    ]:
+        assert client.post(url, data=data).status_code == 400
+
+
+def test_stream_compression_rejects_bad_input(client) -> None:
+    """Test that unknown codecs and undecodable bodies return a 400."""
+    response = client.post("/api/stream/lz77/encode", data=b"abc")
+    assert response.status_code == 400
+    response = client.post(
+        "/api/stream/zstd/decode",
+        data=b"not a zstd frame",
+        content_type="application/octet-stream",
+    )
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize("operation", ["aes", "zstd", "deflate", "brotli", "auto"])
+def test_bytes_endpoint(client, operation: str) -> None:
+    """Test raw request and response bodies without base64 or hex wrapping."""
+    response = client.post(
+        f"/api/bytes/{operation}/encode",
+        data=TEST_DATA,
+        content_type="application/octet-stream",
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/octet-stream"
+    response = client.post(
+        f"/api/bytes/{operation}/decode",
+        data=response.data,
+        content_type="application/octet-stream",
+    )
+    assert response.data == TEST_DATA
+
+
+def test_bytes_endpoint_rejects_bad_input(client) -> None:
+    """Test that unknown operations and undecodable bodies return a 400."""
+    assert client.post("/api/bytes/md5/encode", data=b"abc").status_code == 400
+    response = client.post("/api/bytes/zstd/decode", data=b"not a zstd frame")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize(
+    "stages", ["zstd,aes", "brotli", "aes,deflate,aes", "zstd,aes,base64", "hex"]
+)
+def test_stream_pipeline_endpoint(client, stages: str) -> None:
+    """Test streaming through several stages and back in reverse order."""
+    data = TEST_DATA + b"a" * 100_000
+    response = client.post(
+        f"/api/stream/pipeline/encode?stages={stages}",
+        data=data,
+        content_type="application/octet-stream",
+    )
+    assert response.status_code == 200
+    response = client.post(
+        f"/api/stream/pipeline/decode?stages={stages}",
+        data=response.data,
+        content_type="application/octet-stream",
+    )
+    assert response.data == data
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/stream/pipeline/encode?stages=auto",
+        "/api/stream/pipeline/decode?stages=base64",
+        "/api/stream/pipeline/decode?stages=hex",
+        "/api/stream/pipeline/encode",
+        "/api/stream/pipeline/compress?stages=zstd",
+        "/api/stream/pipeline/decode?stages=zstd,aes",
+    ],
+)
+def test_stream_pipeline_rejects_bad_requests(client, url: str) -> None:
+    """Test unknown stages or actions and undecodable bodies."""
+    assert client.post(url, data=b"not encoded").status_code == 400
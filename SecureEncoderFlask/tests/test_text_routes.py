@@ -0,0 +1,358 @@
+import hashlib
+from flask import Flask
+import pytest
+import zstandard
+from src.create_app import create_app
+from src.md5_model import db
+
+
+@pytest.fixture
+def app(tmp_path) -> Flask:
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "UPLOAD_FOLDER": str(tmp_path),
+            "BATCH_MAX_ITEMS": 200,
+        }
+    )
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def client(app) -> Flask.test_client:
+    return app.test_client()
+
+
+def test_process_text(client) -> None:
+    """Test a single operation through the process_text endpoint."""
+    response = client.post(
+        "/api/process_text",
+        json={"text": "Hello, World!", "operation": "base64", "action": "encode"},
+    )
+    assert response.status_code == 200
+    assert response.get_json()["result"] == "SGVsbG8sIFdvcmxkIQ=="
+
+
+def test_process_text_octet_stream(client) -> None:
+    """Test that clients accepting raw bytes skip the base64 wrapping."""
+    response = client.post(
+        "/api/process_text",
+        json={"text": "Hello, World!", "operation": "zstd", "action": "encode"},
+        headers={"Accept": "application/octet-stream"},
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/octet-stream"
+    assert zstandard.ZstdDecompressor().decompress(response.data) == b"Hello, World!"
+
+    response = client.post(
+        "/api/process_text",
+        json={"text": "Hello", "operation": "hex", "action": "encode"},
+        headers={"Accept": "application/octet-stream"},
+    )
+    assert response.data == b"48656c6c6f"
+
+
+def test_process_text_compression_params(client) -> None:
+    """Test per-request compression parameters and their limits."""
+    text = "Compress me, compress me again. " * 200
+    sizes = {}
+    for level in (1, 19):
+        response = client.post(
+            "/api/process_text",
+            json={
+                "text": text,
+                "operation": "zstd",
+                "action": "encode",
+                "params": {"level": level, "long_distance_matching": True},
+            },
+        )
+        assert response.status_code == 200
+        sizes[level] = len(response.get_json()["result"])
+    assert sizes[19] <= sizes[1]
+
+    response = client.post(
+        "/api/process_text",
+        json={
+            "text": text,
+            "operation": "brotli",
+            "action": "encode",
+            "params": {"profile": "fast"},
+        },
+    )
+    compressed = response.get_json()["result"]
+    response = client.post(
+        "/api/process_text",
+        json={"text": compressed, "operation": "brotli", "action": "decode"},
+    )
+    assert response.get_json()["result"] == text
+
+
+def test_process_text_auto(client) -> None:
+    """Test the auto operation with the server profile and a request target."""
+    text = "Automatic codec selection. " * 100
+    for params in (None, {"target": "ratio"}):
+        response = client.post(
+            "/api/process_text",
+            json={
+                "text": text,
+                "operation": "auto",
+                "action": "encode",
+                "params": params,
+            },
+        )
+        compressed = response.get_json()["result"]
+        assert len(compressed) < len(text)
+        response = client.post(
+            "/api/process_text",
+            json={"text": compressed, "operation": "auto", "action": "decode"},
+        )
+        assert response.get_json()["result"] == text
+
+
+@pytest.mark.parametrize("operation", ["sha1", "sha256", "blake2b"])
+def test_process_text_hash(client, operation) -> None:
+    response = client.post(
+        "/api/process_text",
+        json={"text": "Hash me", "operation": operation, "action": "encode"},
+    )
+    hash_hex = response.get_json()["result"]
+    assert hash_hex == hashlib.new(operation, b"Hash me").hexdigest()
+    response = client.post(
+        "/api/process_text",
+        json={"text": hash_hex, "operation": operation, "action": "decode"},
+    )
+    assert response.get_json()["result"] == "Hash me"
+
+
+@pytest.mark.parametrize(
+    "operation, params",
+    [
+        ("zstd", {"level": 22}),
+        ("zstd", {"threads": 64}),
+        ("zstd", {"quality": 5}),
+        ("deflate", {"level": 12}),
+        ("hex", {"level": 1}),
+        ("brotli", {"profile": "unknown"}),
+        ("auto", {"target": "smallest"}),
+        ("auto", {"level": 3}),
+    ],
+)
+def test_process_text_rejects_bad_compression_params(
+    client, operation: str, params: dict
+) -> None:
+    """Test that unsupported or over-limit parameters are rejected."""
+    response = client.post(
+        "/api/process_text",
+        json={
+            "text": "Hello",
+            "operation": operation,
+            "action": "encode",
+            "params": params,
+        },
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "stages", [["zstd", "aes", "base64"], ["auto", "hex"], ["base64", "hex"]]
+)
+def test_process_pipeline_cycle(client, stages: list) -> None:
+    """Test that a pipeline decodes with the same stage list it encoded with."""
+    text = "Pipeline text. " * 50
+    response = client.post(
+        "/api/process_pipeline",
+        json={"text": text, "stages": stages, "action": "encode"},
+    )
+    assert response.status_code == 200
+    encoded = response.get_json()["result"]
+    response = client.post(
+        "/api/process_pipeline",
+        json={"text": encoded, "stages": stages, "action": "decode"},
+    )
+    assert response.get_json()["result"] == text
+
+
+def test_process_pipeline_raw_result(client) -> None:
+    """Test that octet-stream clients get bytes without a final text stage."""
+    response = client.post(
+        "/api/process_pipeline",
+        json={"text": "Hello, World!", "stages": ["zstd"], "action": "encode"},
+        headers={"Accept": "application/octet-stream"},
+    )
+    assert zstandard.ZstdDecompressor().decompress(response.data) == b"Hello, World!"
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"text": "a", "stages": ["zstd"], "action": "encode"},
+        {"text": "a", "stages": [], "action": "encode"},
+        {"text": "a", "stages": ["rsa", "base64"], "action": "encode"},
+        {"text": "a", "stages": ["base64"] * 9, "action": "encode"},
+    ],
+)
+def test_process_pipeline_rejects_invalid_requests(client, payload: dict) -> None:
+    assert client.post("/api/process_pipeline", json=payload).status_code == 400
+
+
+def test_process_batch_texts(client) -> None:
+    """Test one operation applied to many texts."""
+    texts = [f"Text number {i}" for i in range(10)]
+    response = client.post(
+        "/api/process_batch",
+        json={"texts": texts, "operation": "zstd", "action": "encode"},
+    )
+    assert response.status_code == 200
+    compressed = [item["result"] for item in response.get_json()["results"]]
+
+    response = client.post(
+        "/api/process_batch",
+        json={"texts": compressed, "operation": "zstd", "action": "decode"},
+    )
+    assert [item["result"] for item in response.get_json()["results"]] == texts
+
+
+def test_process_batch_hashes(client) -> None:
+    """Test batch hashing and reverse lookup for a digest table algorithm."""
+    texts = [f"Word {i}" for i in range(10)] + ["Word 0"]
+    response = client.post(
+        "/api/process_batch",
+        json={"texts": texts, "operation": "sha512", "action": "encode"},
+    )
+    hashes = [item["result"] for item in response.get_json()["results"]]
+    assert hashes == [hashlib.sha512(text.encode()).hexdigest() for text in texts]
+
+    response = client.post(
+        "/api/process_batch",
+        json={
+            "texts": hashes + ["00" * 64],
+            "operation": "sha512",
+            "action": "decode",
+        },
+    )
+    results = [item["result"] for item in response.get_json()["results"]]
+    assert results == texts + ["No match found"]
+
+
+def test_process_batch_items_with_errors(client) -> None:
+    """Test that failing items report errors without failing the batch."""
+    response = client.post(
+        "/api/process_batch",
+        json={
+            "items": [
+                {"text": "Hello", "operation": "hex", "action": "encode"},
+                {"text": "not hex", "operation": "hex", "action": "decode"},
+                {
+                    "text": "Hello",
+                    "operation": "zstd",
+                    "action": "encode",
+                    "dict_id": 999,
+                },
+            ]
+        },
+    )
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert results[0] == {"result": "48656c6c6f"}
+    assert "error" in results[1]
+    assert results[2] == {"error": "Unknown dictionary id"}
+
+
+def test_process_batch_group_errors_stay_per_item(client) -> None:
+    """Test that one failing item of a grouped operation fails alone."""
+    texts = ["Word 1", "\ud800", "Word 2"]
+    response = client.post(
+        "/api/process_batch",
+        json={"texts": texts, "operation": "sha256", "action": "encode"},
+    )
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert results[0] == {"result": hashlib.sha256(b"Word 1").hexdigest()}
+    assert "error" in results[1]
+    assert results[2] == {"result": hashlib.sha256(b"Word 2").hexdigest()}
+
+
+def test_process_batch_parallel(client) -> None:
+    """Test that parallel batches keep results in input order."""
+    texts = [f"Parallel text {i}" for i in range(150)]
+    response = client.post(
+        "/api/process_batch",
+        json={
+            "texts": texts,
+            "operation": "aes",
+            "action": "encode",
+            "parallel": True,
+        },
+    )
+    encrypted = [item["result"] for item in response.get_json()["results"]]
+    response = client.post(
+        "/api/process_batch",
+        json={
+            "texts": encrypted,
+            "operation": "aes",
+            "action": "decode",
+            "parallel": True,
+        },
+    )
+    assert [item["result"] for item in response.get_json()["results"]] == texts
+
+
+def test_process_batch_rsa_shares_session_key(client, monkeypatch) -> None:
+    """Test that rsa items in a batch need one private key operation."""
+    import src.operations
+
+    texts = [f"Secret {i}" for i in range(5)]
+    response = client.post(
+        "/api/process_batch",
+        json={"texts": texts, "operation": "rsa", "action": "encode"},
+    )
+    encrypted = [item["result"] for item in response.get_json()["results"]]
+    # The header is a version byte, a 2-byte key length and the wrapped key
+    header_length = 2 * (3 + int(encrypted[0][2:6], 16))
+    assert len({ciphertext[:header_length] for ciphertext in encrypted}) == 1
+
+    decrypt_calls = []
+    ensure_private_key = src.operations.ensure_rsa_private_key
+
+    class CountingKey:
+        def __init__(self, key) -> None:
+            self.key = key
+            self.key_size = key.key_size
+
+        def decrypt(self, *args):
+            decrypt_calls.append(args)
+            return self.key.decrypt(*args)
+
+    monkeypatch.setattr(
+        src.operations,
+        "ensure_rsa_private_key",
+        lambda *args: CountingKey(ensure_private_key(*args)),
+    )
+    response = client.post(
+        "/api/process_batch",
+        json={
+            "texts": encrypted + ["not hex"],
+            "operation": "rsa",
+            "action": "decode",
+        },
+    )
+    results = response.get_json()["results"]
+    assert [item["result"] for item in results[:-1]] == texts
+    assert "error" in results[-1]
+    assert len(decrypt_calls) == 1
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"texts": ["a"]},
+        {"texts": ["a"], "items": [], "operation": "hex", "action": "encode"},
+        {"texts": ["a"] * 201, "operation": "hex", "action": "encode"},
+    ],
+)
+def test_process_batch_rejects_invalid_requests(client, payload: dict) -> None:
+    """Test validation of batch requests."""
+    assert client.post("/api/process_batch", json=payload).status_code == 400